@@ -0,0 +1,116 @@
+import io
+import os
+import glob
+import time
+import functools
+from concurrent import futures
+from typing import Iterable, Iterator, TextIO
+from repl import repl
+from evaluator import evaluator, memo, budget
+
+
+class Options:
+    # How each file is run, as main.py would run it on its own.
+    def __init__(self, mode: str = 'e', engine: str = 'eval', optimize: bool = False, stream: bool = False, cache_dir: str | None = None, limits: budget.Budget | None = None, memo_size: int | None = None) -> None:
+        self.mode = mode
+        self.engine = engine
+        self.optimize = optimize
+        self.stream = stream
+        self.cache_dir = cache_dir
+        self.limits = limits
+        self.memo_size = memo_size
+
+
+class Result:
+    def __init__(self, path: str, output: str, error: str | None, seconds: float) -> None:
+        self.path = path
+        self.output = output
+        # Set when the file could not be read or running it raised.
+        self.error = error
+        self.seconds = seconds
+
+
+class Summary:
+    def __init__(self) -> None:
+        self.files = 0
+        self.failures: list[Result] = []
+        self.seconds = 0.0
+
+    def report(self, err: TextIO) -> None:
+        rate = self.files / self.seconds if self.seconds > 0 else 0.0
+        err.write(f"{self.files} scripts in {self.seconds:.2f} s ({rate:.1f} scripts/s), {len(self.failures)} failed\n")
+        for result in self.failures:
+            err.write(f"  {result.path}: {result.error}\n")
+
+
+def expand_paths(paths: Iterable[str], pattern: str = "*") -> list[str]:
+    # Directories are searched recursively for files matching pattern, and
+    # globs are expanded, both in sorted order. Anything else is kept as
+    # given, so a missing file is reported as a failure of its own.
+    files: list[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = glob.glob(os.path.join(glob.escape(path), "**", pattern), recursive=True)
+            files.extend(sorted(match for match in matches if os.path.isfile(match)))
+        elif glob.has_magic(path) and not os.path.exists(path):
+            files.extend(sorted(match for match in glob.glob(path, recursive=True)
+                                if os.path.isfile(match)))
+        else:
+            files.append(path)
+    return files
+
+
+def init_worker(options: Options) -> None:
+    if options.memo_size is not None:
+        evaluator.memo_cache = memo.Memo(options.memo_size)
+
+
+def run_file(path: str, options: Options) -> Result:
+    out = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with open(path) as f:
+            repl.interpret_file(f, out, options.mode, options.engine, options.optimize,
+                                options.stream, options.cache_dir, options.limits)
+    except Exception as e:
+        return Result(path, out.getvalue(), f"{type(e).__name__}: {e}", time.perf_counter() - start)
+    return Result(path, out.getvalue(), None, time.perf_counter() - start)
+
+
+def results(paths: list[str], options: Options, jobs: int, ordered: bool) -> Iterator[Result]:
+    if jobs == 1:
+        init_worker(options)
+        for path in paths:
+            yield run_file(path, options)
+        return
+    run = functools.partial(run_file, options=options)
+    # Each worker runs many files, so it pays for starting Python and
+    # importing the interpreter once.
+    with futures.ProcessPoolExecutor(jobs, initializer=init_worker, initargs=(options,)) as pool:
+        if ordered:
+            chunksize = max(1, min(64, len(paths) // (jobs * 4)))
+            yield from pool.map(run, paths, chunksize=chunksize)
+        else:
+            pending = [pool.submit(run, path) for path in paths]
+            for future in futures.as_completed(pending):
+                yield future.result()
+
+
+def run_batch(paths: list[str], out: TextIO, options: Options, jobs: int = 1, prefix: bool = False) -> Summary:
+    # Output is written in the order of paths, as if each file had been
+    # run on its own. With prefix, each file's output is written as soon
+    # as it is done instead, every line starting with the file's path.
+    summary = Summary()
+    start = time.perf_counter()
+    for result in results(paths, options, jobs, not prefix):
+        summary.files += 1
+        if result.error is not None:
+            summary.failures.append(result)
+        if prefix:
+            for line in result.output.splitlines():
+                out.write(f"{result.path}: {line}\n")
+        else:
+            out.write(result.output)
+        out.flush()
+    summary.seconds = time.perf_counter() - start
+    return summary
@@ -0,0 +1,71 @@
+import sys
+import argparse
+import tracemalloc
+from object import object, environment
+from my_ast import ast
+from bench.engines import parse, PROGRAMS
+from repl import repl
+
+
+def strip_literal_objects(node: ast.Node | None) -> None:
+    # Undoes the parser's pre-built Integers, to measure the old behaviour.
+    if isinstance(node, ast.IntegerLiteral):
+        node.obj = None
+    for child in vars(node).values() if isinstance(node, ast.Node) else []:
+        if isinstance(child, list):
+            for item in child:
+                strip_literal_objects(item)
+        elif isinstance(child, ast.Node):
+            strip_literal_objects(child)
+
+
+def measure(source: str, engine: str, cached: bool) -> tuple[int, int]:
+    if cached:
+        object.set_small_integer_range(
+            object.SMALL_INTEGER_MIN, object.SMALL_INTEGER_MAX)
+    else:
+        object.set_small_integer_range(0, -1)
+    program = parse(source)
+    if not cached:
+        strip_literal_objects(program)
+
+    created = 0
+    init = object.Integer.__init__
+
+    def counting_init(self: object.Integer, value: int) -> None:
+        nonlocal created
+        created += 1
+        init(self, value)
+
+    object.Integer.__init__ = counting_init
+    tracemalloc.start()
+    try:
+        repl.engines[engine](program, environment.Environment())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        object.Integer.__init__ = init
+    return created, peak
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Integer allocations with and without the small-integer cache")
+    arg_parser.add_argument("--engine", choices=list(repl.engines), default="eval")
+    args = arg_parser.parse_args()
+    sys.setrecursionlimit(100_000)
+
+    with open("example.txt") as f:
+        programs = {"example.txt": f.read(), **PROGRAMS}
+    print(f"{'program':<14}{'cache':<7}{'Integers created':>18}{'peak traced (KiB)':>20}")
+    for name, source in programs.items():
+        # Warm-up, so one-off allocations are not charged to either run.
+        measure(source, args.engine, True)
+        for cached in (False, True):
+            created, peak = measure(source, args.engine, cached)
+            print(f"{name:<14}{'on' if cached else 'off':<7}{created:>18}{peak / 1024:>20.1f}")
+    object.set_small_integer_range(object.SMALL_INTEGER_MIN, object.SMALL_INTEGER_MAX)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import os
+from bench.startup import identifier
+
+# Programs the benchmark suite runs, one for each kind of load the
+# interpreter sees.
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "example.txt")
+
+DEEP_RECURSION = '''
+let count = fn(n) {
+    if (n == 0) { return 0; }
+    1 + count(n - 1);
+};
+let sum = fn(n, acc) {
+    if (n == 0) { acc } else { sum(n - 1, acc + n) }
+};
+count(1000) + sum(5000, 0);
+'''
+
+FIB = '''
+let fib = fn(n) {
+    if (n < 2) { return n; }
+    fib(n - 1) + fib(n - 2);
+};
+fib(18);
+'''
+
+CLOSURES = '''
+let compose = fn(f, g) { fn(x) { g(f(x)) } };
+let adder = fn(n) { fn(x) { x + n } };
+let inc = adder(1);
+let twice = compose(inc, inc);
+let loop = fn(n, f, acc) {
+    if (n == 0) { acc } else { loop(n - 1, compose(f, adder(n)), f(acc)) }
+};
+loop(100, twice, 0);
+'''
+
+
+def wide_expression(terms: int = 5000) -> str:
+    # One statement whose expression tree is as wide as it gets.
+    ops = ["+", "-", "*", "/"]
+    parts = ["1"]
+    for i in range(1, terms):
+        parts.append(f"{ops[i % 4]} {i % 7 + 1}")
+    return " ".join(parts) + ";\n"
+
+
+def long_script(definitions: int = 3000) -> str:
+    # Many top-level statements, each cheap to run.
+    lines = []
+    for i in range(definitions):
+        name = identifier(i)
+        lines.append(f"let f_{name} = fn(x) {{ if (x > {i}) {{ x - {i} }} else {{ x + {i} }} }};")
+        lines.append(f"let v_{name} = f_{name}({i * 7 % 101});")
+    return "\n".join(lines) + "\n"
+
+
+def programs() -> dict[str, str]:
+    with open(EXAMPLE) as f:
+        example = f.read()
+    return {
+        "example": example,
+        "deep_recursion": DEEP_RECURSION,
+        "fib": FIB,
+        "closures": CLOSURES,
+        "wide_expression": wide_expression(),
+        "long_script": long_script(),
+    }
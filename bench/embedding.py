@@ -0,0 +1,51 @@
+import io
+import time
+import argparse
+from repl import repl
+from object import environment
+from monkey import monkey
+
+PRICING = """
+let discount = fn(total, vip) { if (vip) { total / 10 } else { if (total > 1000) { total / 20 } else { 0 } } };
+let price = fn(quantity, unit, vip) { let total = quantity * unit; total - discount(total, vip) };
+"""
+
+
+def rerun_script(calls: int, engine: str) -> float:
+    # What an embedder has to do without the API: build the script text
+    # for every call and read the result back from the output.
+    start = time.perf_counter()
+    for i in range(calls):
+        out = io.StringIO()
+        source = f"{PRICING}price({i % 50}, {i % 300}, {'true' if i % 3 == 0 else 'false'})"
+        repl.print_evaluated_program(out, source, environment.Environment(), engine)
+        int(out.getvalue())
+    return time.perf_counter() - start
+
+
+def call(calls: int, engine: str) -> float:
+    start = time.perf_counter()
+    session = monkey.Session(monkey.compile(PRICING), engine)
+    for i in range(calls):
+        session.call("price", i % 50, i % 300, i % 3 == 0)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Throughput of calling a Monkey function through the embedding API, against re-running the script text")
+    arg_parser.add_argument("--calls", type=int, default=20000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    print(f"{'engine':<12}{'script (calls/s)':>20}{'call (calls/s)':>20}{'speedup':>10}")
+    for engine in monkey.ENGINES:
+        # The script path is much slower, so it gets fewer calls.
+        script_calls = max(1, args.calls // 20)
+        script = min(rerun_script(script_calls, engine) for _ in range(args.repeat)) / script_calls
+        direct = min(call(args.calls, engine) for _ in range(args.repeat)) / args.calls
+        print(f"{engine:<12}{1 / script:>20.0f}{1 / direct:>20.0f}{script / direct:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
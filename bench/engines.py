@@ -0,0 +1,91 @@
+import sys
+import time
+import argparse
+from lexer import lexer
+from parser import parser
+from my_ast import ast
+from object import object, environment
+from repl import repl
+
+PROGRAMS: dict[str, str] = {
+    "fib": '''
+let fib = fn(n) {
+    if (n < 2) { return n; }
+    fib(n - 1) + fib(n - 2);
+};
+fib(20);
+''',
+    "factorial": '''
+let factorial = fn(n) {
+    if (n == 0) { return 1; }
+    return factorial(n - 1) * n;
+};
+let repeat = fn(i) {
+    if (i == 0) { return 0; }
+    factorial(60);
+    repeat(i - 1);
+};
+repeat(60);
+''',
+    "closures": '''
+let compose = fn(f, g) { fn(x) { g(f(x)) } };
+let inc = fn(x) { x + 1 };
+let twice = compose(inc, inc);
+let loop = fn(n, acc) {
+    if (n == 0) { acc } else { loop(n - 1, twice(acc)) }
+};
+loop(150, 0);
+''',
+    "sum": '''
+let sum = fn(n, acc) {
+    if (n == 0) { acc } else { sum(n - 1, acc + n) }
+};
+sum(20000, 0);
+''',
+}
+
+
+def parse(source: str) -> ast.Program:
+    p = parser.Parser(lexer.Lexer(source))
+    program = p.parse_program()
+    if len(p.errors) != 0:
+        raise ValueError(f"parser errors: {p.errors}")
+    return program
+
+
+def time_engine(engine: str, program: ast.Program, repeat: int) -> tuple[float, str]:
+    run = repl.engines[engine]
+    best = float("inf")
+    result = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run(program, environment.Environment()).inspect()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Compare evaluation engines on recursive Monkey programs")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--engines", nargs="+",
+                            choices=list(repl.engines), default=list(repl.engines))
+    args = arg_parser.parse_args()
+
+    # The tree-walker needs several Python frames per Monkey call.
+    sys.setrecursionlimit(100_000)
+    baseline = args.engines[0]
+    print(f"{'program':<12}{'engine':<10}{'best (ms)':>12}{'speedup':>10}")
+    for name, source in PROGRAMS.items():
+        program = parse(source)
+        base_time, base_result = time_engine(baseline, program, args.repeat)
+        for engine in args.engines:
+            elapsed, result = time_engine(engine, program, args.repeat)
+            if result != base_result:
+                raise AssertionError(
+                    f"{engine} returned {result} for {name}, {baseline} returned {base_result}")
+            print(f"{name:<12}{engine:<10}{elapsed * 1000:>12.2f}{base_time / elapsed:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
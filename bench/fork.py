@@ -0,0 +1,70 @@
+import gc
+import time
+import argparse
+import tracemalloc
+from bench.engines import parse
+from bench.startup import DEFINITION, identifier
+from object import environment
+from evaluator import evaluator
+
+SCRIPT = "let x = fib_a(3); let y = x + 1; y"
+
+
+def fork(env: environment.Environment) -> environment.Environment:
+    return env.fork()
+
+
+def copy(env: environment.Environment) -> environment.Environment:
+    # What isolating a session costs without forks: its own copy of every
+    # binding.
+    session = environment.Environment()
+    session.store = dict(env.store)
+    return session
+
+
+def per_session_time(make, env: environment.Environment, sessions: int, program=None) -> float:
+    start = time.perf_counter()
+    for _ in range(sessions):
+        session = make(env)
+        if program is not None:
+            evaluator.eval(program, session)
+        del session
+    return (time.perf_counter() - start) / sessions
+
+
+def per_session_memory(make, env: environment.Environment, sessions: int, program) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = []
+    for _ in range(sessions):
+        session = make(env)
+        evaluator.eval(program, session)
+        kept.append(session)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / sessions
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Cost of isolating sessions over a large prelude by forking its environment, against copying it")
+    arg_parser.add_argument("--definitions", type=int, default=2000)
+    arg_parser.add_argument("--sessions", type=int, default=20000)
+    args = arg_parser.parse_args()
+
+    env = environment.Environment()
+    evaluator.eval(parse("".join(DEFINITION.format(name=identifier(i)) for i in range(args.definitions))), env)
+    program = parse(SCRIPT)
+    print(f"prelude: {args.definitions} functions; script: {SCRIPT}")
+    print(f"{'':<8}{'create+discard (us)':>22}{'with script (us)':>20}{'memory (bytes)':>18}")
+    for name, make in (("fork", fork), ("copy", copy)):
+        sessions = args.sessions if make is fork else max(1, args.sessions // 20)
+        empty = per_session_time(make, env, sessions)
+        scripted = per_session_time(make, env, sessions, program)
+        memory = per_session_memory(make, env, max(1, sessions // 10), program)
+        print(f"{name:<8}{empty * 1e6:>22.2f}{scripted * 1e6:>20.1f}{memory:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
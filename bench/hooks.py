@@ -0,0 +1,57 @@
+import sys
+import time
+import argparse
+from bench.engines import parse, PROGRAMS
+from my_ast import ast
+from object import environment
+from evaluator import evaluator, hooks
+
+
+def noop(*args: object) -> None:
+    pass
+
+
+def run(program: ast.Program) -> float:
+    start = time.perf_counter()
+    evaluator.eval(program, environment.Environment())
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Cost of the evaluator's tracing hooks, with and without subscribers")
+    arg_parser.add_argument("--repeat", type=int, default=10)
+    args = arg_parser.parse_args()
+    sys.setrecursionlimit(100_000)
+
+    # "disabled" runs after callbacks were subscribed and unsubscribed
+    # again, the path every run takes once a tool has detached.
+    configs = {
+        "baseline": [],
+        "disabled": [],
+        "on_call": [hooks.ON_CALL],
+        "on_node": [hooks.ON_NODE],
+    }
+    print(f"{'program':<12}" + "".join(f"{name + ' (ms)':>16}" for name in configs) + f"{'disabled':>10}")
+    for name, source in PROGRAMS.items():
+        program = parse(source)
+        best = dict.fromkeys(configs, float("inf"))
+        # Configurations alternate, so all see the same background load.
+        for _ in range(args.repeat):
+            for config, events in configs.items():
+                if config == "disabled":
+                    hooks.subscribe(hooks.ON_NODE, noop)
+                    hooks.unsubscribe(hooks.ON_NODE, noop)
+                for event in events:
+                    hooks.subscribe(event, noop)
+                try:
+                    best[config] = min(best[config], run(program))
+                finally:
+                    for event in events:
+                        hooks.unsubscribe(event, noop)
+        line = f"{name:<12}" + "".join(f"{best[config] * 1000:>16.2f}" for config in configs)
+        print(line + f"{best['disabled'] / best['baseline'] - 1:>+10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import time
+import argparse
+from my_token import token
+from lexer import lexer, scanner
+from bench.engines import PROGRAMS
+
+lexers = {
+    'lexer': lexer.Lexer,
+    'scanner': scanner.Scanner,
+}
+
+
+def count_tokens(new_lexer, source: str) -> int:
+    l = new_lexer(source)
+    count = 1
+    while l.next_token().type != token.EOF:
+        count += 1
+    return count
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Lexing throughput of lexer.Lexer and scanner.Scanner")
+    arg_parser.add_argument("--copies", type=int, default=200,
+                            help="how many times the sample programs are repeated")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    with open("example.txt") as f:
+        source = "\n".join([f.read(), *PROGRAMS.values()]) * args.copies
+    print(f"{len(source)} chars")
+    print(f"{'lexer':<10}{'tokens':>10}{'time (ms)':>12}{'tokens/s':>14}")
+    for name, new_lexer in lexers.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            count = count_tokens(new_lexer, source)
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:<10}{count:>10}{best * 1000:>12.1f}{count / best:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from prefork import prefork
+from server import server
+
+PRELUDE = '''let max = fn(a, b) { if (a > b) { a } else { b } };
+let min = fn(a, b) { if (a < b) { a } else { b } };
+let abs = fn(n) { if (n < 0) { -n } else { n } };
+let pow = fn(b, e) { if (e == 0) { 1 } else { b * pow(b, e - 1) } };
+'''
+SCRIPT = "max(abs(-3), pow(2, 5))"
+
+
+def plain(path: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "main.py", "--no-cache", path],
+                   check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def forked(address: str) -> float:
+    start = time.perf_counter()
+    prefork.run(address, SCRIPT)
+    return time.perf_counter() - start
+
+
+def wait_for(address: str, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(address):
+        if time.monotonic() > deadline:
+            sys.exit(f"server did not start on {address}")
+        time.sleep(0.01)
+
+
+def report(name: str, latencies: list[float]) -> None:
+    latency = server.latency_report(latencies)
+    print(f"{name:<10}{latency['p50']:>12.2f}{latency['p99']:>12.2f}{latency['max']:>12.2f}")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Latency of tiny scripts run by plain main.py against pre-forked workers with the prelude loaded")
+    arg_parser.add_argument("--plain-runs", type=int, default=50)
+    arg_parser.add_argument("--forked-runs", type=int, default=2000)
+    arg_parser.add_argument("--workers", type=int, default=1)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # main.py has to run the prelude every time.
+        path = os.path.join(tmp, "script.mk")
+        with open(path, "w") as f:
+            f.write(PRELUDE + SCRIPT)
+        prelude = os.path.join(tmp, "prelude.mk")
+        with open(prelude, "w") as f:
+            f.write(PRELUDE)
+        address = os.path.join(tmp, "sock")
+        proc = subprocess.Popen([sys.executable, "main.py", "--prefork", address, "--prelude", prelude,
+                                 "--jobs", str(args.workers)], stderr=subprocess.DEVNULL)
+        try:
+            wait_for(address)
+            expected = subprocess.run([sys.executable, "main.py", path], capture_output=True, text=True).stdout
+            assert prefork.run(address, SCRIPT) == expected, "pre-forked output differs from main.py"
+            print(f"{'':<10}{'p50 (ms)':>12}{'p99 (ms)':>12}{'max (ms)':>12}")
+            report("main.py", [plain(path) for _ in range(args.plain_runs)])
+            report("prefork", [forked(address) for _ in range(args.forked_runs)])
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import time
+import argparse
+from object import object, environment
+from bench.engines import parse
+from repl import repl
+
+SOURCE = '''
+let count = fn(n) {
+    if (n == 0) { 0 } else { 1 + count(n - 1) }
+};
+count({depth});
+'''
+
+
+def run_depth(engine: str, depth: int) -> str:
+    program = parse(SOURCE.replace("{depth}", str(depth)))
+    start = time.perf_counter()
+    try:
+        result = repl.engines[engine](program, environment.Environment())
+    except RecursionError:
+        return "RecursionError"
+    elapsed = time.perf_counter() - start
+    if not isinstance(result, object.Integer):
+        return result.inspect()
+    return f"{elapsed * 1000:.1f}ms ({elapsed / depth * 1e6:.2f}us/call)"
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Non-tail recursion depth reachable by each engine, at the default recursion limit")
+    arg_parser.add_argument("--depths", nargs="+", type=int,
+                            default=[50, 90, 1000, 10_000, 100_000, 1_000_000])
+    arg_parser.add_argument("--engines", nargs="+",
+                            choices=list(repl.engines), default=["eval", "stack"])
+    args = arg_parser.parse_args()
+
+    print(f"{'depth':>10}  " + "".join(f"{engine:<32}" for engine in args.engines))
+    for depth in args.depths:
+        results = [run_depth(engine, depth) for engine in args.engines]
+        print(f"{depth:>10}  " + "".join(f"{r:<32}" for r in results))
+
+
+if __name__ == "__main__":
+    main()
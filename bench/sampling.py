@@ -0,0 +1,68 @@
+import sys
+import time
+import argparse
+from typing import Callable
+from bench.engines import parse, PROGRAMS
+from object import environment
+from evaluator import evaluator
+from profiler import sampler
+
+# Python stack depths runs start at. CPython allocates frames in chunks,
+# and recursion that keeps crossing a chunk boundary can run twice as
+# slow, so a single starting depth can make either side of the comparison
+# look much faster than it is.
+START_DEPTHS = range(0, 64, 8)
+
+
+def at_depth(depth: int, fn: Callable[[], float]) -> float:
+    if depth == 0:
+        return fn()
+    return at_depth(depth - 1, fn)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Overhead of the sampling profiler on the tree-walking evaluator")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--rate", type=float, default=sampler.DEFAULT_RATE)
+    args = arg_parser.parse_args()
+    sys.setrecursionlimit(100_000)
+
+    print(f"{'program':<12}{'off (ms)':>10}{'on (ms)':>10}{'overhead':>10}{'samples':>9}")
+    for name, source in PROGRAMS.items():
+        program = parse(source)
+        samples = 0
+
+        def run_off() -> float:
+            start = time.perf_counter()
+            evaluator.eval(program, environment.Environment())
+            return time.perf_counter() - start
+
+        def run_on() -> float:
+            nonlocal samples
+            sampling = sampler.Sampler(args.rate)
+            sampling.enable()
+            try:
+                start = time.perf_counter()
+                evaluator.eval(program, environment.Environment())
+                return time.perf_counter() - start
+            finally:
+                sampling.disable()
+                samples += sum(sampling.samples.values())
+
+        # Runs with and without sampling alternate, so both see the same
+        # background load. Each side is the mean over START_DEPTHS of its
+        # best time at that depth.
+        off = on = 0.0
+        for depth in START_DEPTHS:
+            best_off = best_on = float("inf")
+            for _ in range(args.repeat):
+                best_off = min(best_off, at_depth(depth, run_off))
+                best_on = min(best_on, at_depth(depth, run_on))
+            off += best_off / len(START_DEPTHS)
+            on += best_on / len(START_DEPTHS)
+        print(f"{name:<12}{off * 1000:>10.2f}{on * 1000:>10.2f}{on / off - 1:>10.1%}{samples:>9}")
+
+
+if __name__ == "__main__":
+    main()
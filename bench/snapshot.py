@@ -0,0 +1,49 @@
+import os
+import time
+import argparse
+import tempfile
+from bench.engines import parse
+from bench.startup import DEFINITION, identifier
+from repl import repl
+from object import environment
+from cache import snapshot
+
+
+def best(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Time to restore a prelude from a snapshot against evaluating it again")
+    arg_parser.add_argument("--definitions", type=int, default=2000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    source = "".join(DEFINITION.format(name=identifier(i)) for i in range(args.definitions))
+    print(f"prelude: {args.definitions} functions, {len(source) / 2**10:.0f} KiB of source")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "prelude.snap")
+        print(f"{'engine':<10}{'parse+eval (ms)':>18}{'eval (ms)':>12}{'load (ms)':>12}{'size (KiB)':>12}{'speedup':>10}")
+        for engine in ("eval", "closure", "vm"):
+            run = repl.engines[engine]
+            env = environment.Environment()
+            run(parse(source), env)
+            snapshot.save(env, path, engine)
+            # "eval" starts from an already parsed program, as with a warm
+            # parse cache.
+            full = best(lambda: run(parse(source), environment.Environment()), args.repeat)
+            programs = [parse(source) for _ in range(args.repeat)]
+            evaluated = best(lambda: run(programs.pop(), environment.Environment()), args.repeat)
+            loaded = best(lambda: snapshot.load(path, engine), args.repeat)
+            print(f"{engine:<10}{full * 1000:>18.1f}{evaluated * 1000:>12.1f}{loaded * 1000:>12.1f}"
+                  f"{os.path.getsize(path) / 2**10:>12.0f}{full / loaded:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+from my_token import token
+from lexer import scanner, source_file
+from bench.engines import PROGRAMS
+
+
+def lex(source: str | memoryview) -> int:
+    l = scanner.Scanner(source)
+    count = 1
+    while l.next_token().type != token.EOF:
+        count += 1
+    return count
+
+
+def child(path: str, method: str) -> None:
+    # Runs in its own process so ru_maxrss is the peak of this method alone.
+    start = time.perf_counter()
+    with open(path) as f:
+        if method == "read":
+            count = lex(f.read())
+        else:
+            with source_file.open_source(f) as source:
+                count = lex(source)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(count, seconds, peak)
+
+
+def write_source(path: str, size: int) -> None:
+    with open("example.txt") as f:
+        chunk = "\n".join([f.read(), *PROGRAMS.values()]) + "\n"
+    with open(path, "w") as f:
+        for _ in range(size // len(chunk) + 1):
+            f.write(chunk)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Peak RSS of lexing a large file read as text vs memory-mapped")
+    arg_parser.add_argument("--size-mb", type=int, default=100)
+    arg_parser.add_argument("--child", nargs=2, metavar=("PATH", "METHOD"),
+                            help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large.mk")
+        write_source(path, args.size_mb * 1024 * 1024)
+        size = os.path.getsize(path)
+        print(f"source: {size / 2**20:.1f} MiB")
+        print(f"{'method':<8}{'tokens':>12}{'time (s)':>10}{'peak RSS (MiB)':>16}{'x file':>8}")
+        for method in ["read", "mmap"]:
+            output = subprocess.run(
+                [sys.executable, "-m", "bench.source_input", "--child", path, method],
+                check=True, capture_output=True, text=True).stdout
+            count, seconds, peak = output.split()
+            # ru_maxrss is in KiB on Linux.
+            peak_mb = int(peak) / 1024
+            print(f"{method:<8}{count:>12}{float(seconds):>10.1f}{peak_mb:>16.1f}{peak_mb * 2**20 / size:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
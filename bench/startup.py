@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+# Many function definitions and a single cheap call, so a run is mostly
+# lexing and parsing.
+DEFINITION = '''let fib_{name} = fn(n) {{
+    if (n < 2) {{ return n; }}
+    let a = fib_{name}(n - 1);
+    let b = fib_{name}(n - 2);
+    return a + b;
+}};
+'''
+
+
+def identifier(i: int) -> str:
+    # Identifiers are letters and underscores only.
+    letters = ""
+    while True:
+        i, digit = divmod(i, 26)
+        letters += chr(ord("a") + digit)
+        if i == 0:
+            return letters
+
+
+def run(args: list[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "main.py", *args],
+                   check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="main.py startup time with no cache, a cold cache and a warm cache")
+    arg_parser.add_argument("--definitions", type=int, default=5000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "defs.mk")
+        with open(path, "w") as f:
+            for i in range(args.definitions):
+                f.write(DEFINITION.format(name=identifier(i)))
+            f.write("fib_a(10)\n")
+        cache_dir = os.path.join(tmp, "cache")
+        print(f"source: {args.definitions} definitions, {os.path.getsize(path) / 2**20:.1f} MiB")
+
+        no_cache, cold, warm = [], [], []
+        for _ in range(args.repeat):
+            no_cache.append(run(["--no-cache", path]))
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            cold.append(run(["--cache-dir", cache_dir, path]))
+            warm.append(run(["--cache-dir", cache_dir, path]))
+        entry = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+        print(f"cache entry: {os.path.getsize(entry) / 2**20:.1f} MiB")
+        print(f"{'run':<10}{'best (s)':>10}{'mean (s)':>10}")
+        for name, times in [("no cache", no_cache), ("cold", cold), ("warm", warm)]:
+            print(f"{name:<10}{min(times):>10.3f}{sum(times) / len(times):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
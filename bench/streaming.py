@@ -0,0 +1,70 @@
+import io
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+from repl import repl
+from evaluator import resolver
+
+
+def child(path: str, stream: bool) -> None:
+    # Runs in its own process so ru_maxrss is the peak of this mode alone.
+    start = time.perf_counter()
+    first = None
+    resolve = resolver.resolve
+
+    def timed_resolve(*args, **kwargs) -> None:
+        # Both modes resolve right before evaluating their first statement.
+        nonlocal first
+        if first is None:
+            first = time.perf_counter() - start
+        resolve(*args, **kwargs)
+
+    resolver.resolve = timed_resolve
+    out = io.StringIO()
+    with open(path) as f:
+        repl.interpret_file(f, out, 'e', stream=stream)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(out.getvalue().strip(), first, seconds, peak)
+
+
+def write_source(path: str, statements: int) -> None:
+    with open(path, "w") as f:
+        f.write("let sq = fn(x) { x * x };\nlet a = 0;\nlet b = 0;\n")
+        for _ in range(statements // 2):
+            f.write("let a = a + 1;\nlet b = sq(a) - a * a + b;\n")
+        f.write("a + b\n")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Whole-program vs streamed evaluation of a long script")
+    arg_parser.add_argument("--statements", type=int, default=200_000)
+    arg_parser.add_argument("--child", nargs=2, metavar=("PATH", "MODE"),
+                            help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    if args.child:
+        path, mode = args.child
+        child(path, mode == "stream")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "long.mk")
+        write_source(path, args.statements)
+        print(f"source: {args.statements} statements, {os.path.getsize(path) / 2**20:.1f} MiB")
+        print(f"{'mode':<8}{'result':>10}{'first eval (s)':>16}{'total (s)':>11}{'peak RSS (MiB)':>16}")
+        for mode in ["whole", "stream"]:
+            output = subprocess.run(
+                [sys.executable, "-m", "bench.streaming", "--child", path, mode],
+                check=True, capture_output=True, text=True).stdout
+            result, first, seconds, peak = output.split()
+            # ru_maxrss is in KiB on Linux.
+            print(f"{mode:<8}{result:>10}{float(first):>16.3f}{float(seconds):>11.1f}{int(peak) / 1024:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
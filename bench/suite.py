@@ -0,0 +1,301 @@
+import gc
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from typing import Any, Callable
+from lexer import scanner, buffer
+from parser import parser
+from my_token import token
+from my_ast import ast
+from object import object, environment
+from repl import repl
+from bench import corpus
+
+# Runs the corpus phase by phase: lexing alone, parsing from already lexed
+# tokens, then resolving and evaluating. Times are the median of --repeat
+# runs, in CPU time, so that other processes on a busy machine do not
+# count. Memory and allocations come from one more run of each phase, kept
+# apart because tracing slows everything down.
+#
+# Each program is measured in fresh interpreters, --processes of them,
+# taking turns with the other programs, and keeps the fastest of their
+# medians: a burst of load on the machine then slows down one of them,
+# not all. In a single interpreter, peaks and times would also depend
+# on what ran before: free lists, caches and the heap are left in
+# whatever state the earlier programs put them in.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PHASES = ["lex", "parse", "eval"]
+METRICS = [*(f"{phase}_seconds" for phase in PHASES),
+           *(f"{phase}_peak_bytes" for phase in PHASES),
+           *(f"{phase}_allocations" for phase in PHASES)]
+
+
+def lex(source: str) -> int:
+    s = scanner.Scanner(source)
+    count = 0
+    while s.next_token().type != token.EOF:
+        count += 1
+    return count
+
+
+def parse(tokens: buffer.TokenBuffer) -> ast.Program:
+    p = parser.Parser(tokens.cursor())
+    program = p.parse_program()
+    if len(p.errors) != 0:
+        raise ValueError(f"parser errors: {p.errors}")
+    return program
+
+
+def phases(source: str, engine: str) -> dict[str, Callable[[], Any]]:
+    # Each phase gets fresh input, so runs do not see each other's results
+    # (the resolver and evaluator annotate the tree).
+    tokens = buffer.tokenize_all(source)
+    run = repl.engines[engine]
+    return {
+        "lex": lambda: lex(source),
+        "parse": lambda: parse(tokens),
+        "eval": lambda: run(parse(tokens), environment.Environment()),
+    }
+
+
+def count_allocations(fn: Callable[[], Any]) -> int:
+    # Interpreter objects created by fn: tokens, AST nodes, Monkey objects
+    # and scopes.
+    classes = [token.Token, *all_subclasses(ast.Node),
+               environment.Environment, *all_subclasses(environment.Environment), *all_subclasses(object.Object)]
+    created = 0
+    originals = {}
+
+    def counting(init: Callable[..., None]) -> Callable[..., None]:
+        def counting_init(self: Any, *args: Any, **kwargs: Any) -> None:
+            nonlocal created
+            created += 1
+            init(self, *args, **kwargs)
+        return counting_init
+
+    for cls in classes:
+        if "__init__" in cls.__dict__:
+            originals[cls] = cls.__init__
+            cls.__init__ = counting(cls.__init__)
+    try:
+        fn()
+    finally:
+        for cls, init in originals.items():
+            cls.__init__ = init
+    return created
+
+
+def all_subclasses(cls: type) -> list[type]:
+    classes = []
+    for sub in cls.__subclasses__():
+        classes.append(sub)
+        classes.extend(all_subclasses(sub))
+    return classes
+
+
+def peak_memory(fn: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def median_time(fn: Callable[[], Any], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        # Garbage from the previous run is not charged to this one.
+        gc.collect()
+        start = time.process_time()
+        fn()
+        times.append(time.process_time() - start)
+    return statistics.median(times)
+
+
+def measure(source: str, engine: str, repeat: int) -> dict[str, float]:
+    result: dict[str, float] = {"tokens": lex(source)}
+    fns = phases(source, engine)
+    # Memory is measured before any timing, so it does not depend on
+    # --repeat either.
+    for phase, fn in fns.items():
+        # Warm-up, so one-off costs such as imports are not charged.
+        fn()
+        gc.collect()
+        result[f"{phase}_peak_bytes"] = peak_memory(fn)
+        result[f"{phase}_allocations"] = count_allocations(fn)
+    for phase, fn in fns.items():
+        result[f"{phase}_seconds"] = median_time(fn, repeat)
+    return result
+
+
+def measure_in_subprocess(name: str, engine: str, repeat: int) -> dict[str, float]:
+    command = [sys.executable, "-m", "bench.suite", "--engine", engine,
+               "--repeat", str(repeat), "--measure", name]
+    done = subprocess.run(command, cwd=ROOT, stdout=subprocess.PIPE, text=True, check=True)
+    return json.loads(done.stdout)
+
+
+def run_suite(names: list[str], engine: str, repeat: int, processes: int) -> dict[str, Any]:
+    results: dict[str, dict[str, float]] = {}
+    for i in range(processes):
+        for name in names:
+            result = measure_in_subprocess(name, engine, repeat)
+            if name in results:
+                keep_best(results[name], result)
+            else:
+                results[name] = result
+            print(f"measured {name} ({i + 1}/{processes})", file=sys.stderr)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "engine": engine,
+        "repeat": repeat,
+        "processes": processes,
+        "results": results,
+    }
+
+
+def keep_best(result: dict[str, float], other: dict[str, float]) -> None:
+    for metric, value in other.items():
+        result[metric] = min(result[metric], value)
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float, time_threshold: float, min_seconds: float) -> list[str]:
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is not None:
+            regressions.extend(program_regressions(name, result, base, threshold, time_threshold, min_seconds))
+    return regressions
+
+
+def program_regressions(name: str, result: dict[str, float], base: dict[str, float], threshold: float, time_threshold: float, min_seconds: float) -> list[str]:
+    # Regressions: metrics that grew by more than threshold (0.1 = 10%),
+    # or time_threshold for times. Peaks and allocations come out the same
+    # on every run, but times can vary by 20% between identical runs on a
+    # virtual machine. Times under min_seconds are mostly timer noise and
+    # are left out.
+    regressions = []
+    for metric in METRICS:
+        old, new = base.get(metric), result[metric]
+        if old is None or old == 0:
+            continue
+        limit = threshold
+        if metric.endswith("_seconds"):
+            if max(old, new) < min_seconds:
+                continue
+            limit = time_threshold
+        if new / old > 1 + limit:
+            regressions.append(f"{name} {metric}: {format_metric(metric, old)} -> {format_metric(metric, new)} (+{new / old - 1:.1%})")
+    return regressions
+
+
+def confirm_regressions(current: dict[str, Any], baseline: dict[str, Any], threshold: float, time_threshold: float, min_seconds: float) -> None:
+    # Programs that look slower are measured once more and keep their best
+    # times, so a regression has to show up twice to be reported.
+    suspects = [name for name, result in current["results"].items()
+                if name in baseline["results"]
+                and program_regressions(name, result, baseline["results"][name], threshold, time_threshold, min_seconds)]
+    if not suspects:
+        return
+    print(f"measuring {', '.join(suspects)} again", file=sys.stderr)
+    again = run_suite(suspects, current["engine"], current["repeat"], current["processes"])
+    for name, result in again["results"].items():
+        keep_best(current["results"][name], result)
+
+
+def format_metric(metric: str, value: float) -> str:
+    if metric.endswith("_seconds"):
+        return f"{value * 1000:.2f} ms"
+    if metric.endswith("_bytes"):
+        return f"{value / 1024:.1f} KiB"
+    return f"{value:.0f}"
+
+
+def print_table(current: dict[str, Any], baseline: dict[str, Any] | None) -> None:
+    header = f"{'program':<16}{'tokens':>8}"
+    for phase in PHASES:
+        header += f"{phase + ' (ms)':>12}{'peak (KiB)':>12}{'allocs':>10}"
+    print(header)
+    for name, result in current["results"].items():
+        line = f"{name:<16}{result['tokens']:>8.0f}"
+        for phase in PHASES:
+            line += f"{result[f'{phase}_seconds'] * 1000:>12.2f}"
+            line += f"{result[f'{phase}_peak_bytes'] / 1024:>12.1f}"
+            line += f"{result[f'{phase}_allocations']:>10.0f}"
+        print(line)
+        base = None if baseline is None else baseline["results"].get(name)
+        if base is not None:
+            line = f"{'  vs baseline':<24}"
+            for phase in PHASES:
+                for metric, width in (("seconds", 12), ("peak_bytes", 12), ("allocations", 10)):
+                    old, new = base.get(f"{phase}_{metric}"), result[f"{phase}_{metric}"]
+                    change = f"{new / old - 1:+.1%}" if old else "n/a"
+                    line += f"{change:>{width}}"
+            print(line)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Time, memory and allocations of lexing, parsing and evaluating the benchmark corpus")
+    arg_parser.add_argument("--engine", choices=list(repl.engines), default="eval")
+    arg_parser.add_argument("--repeat", type=int, default=5,
+                            help="Timed runs of each phase per process (default: 5)")
+    arg_parser.add_argument("--processes", type=int, default=5,
+                            help="Fresh interpreters each program is measured in (default: 5)")
+    arg_parser.add_argument("--programs", nargs="+", choices=list(corpus.programs()),
+                            default=list(corpus.programs()))
+    arg_parser.add_argument("--output", help="Write the results to this JSON file")
+    arg_parser.add_argument("--baseline", help="Compare against results saved with --output")
+    arg_parser.add_argument("--threshold", type=float, default=0.10,
+                            help="Relative increase of a peak or allocation count that counts as a regression (default: 0.10)")
+    arg_parser.add_argument("--time-threshold", type=float, default=0.25,
+                            help="Relative increase of a time that counts as a regression (default: 0.25)")
+    arg_parser.add_argument("--min-seconds", type=float, default=0.005,
+                            help="Ignore timing changes of phases faster than this (default: 0.005)")
+    # Internal: measure one program and print its results as JSON.
+    arg_parser.add_argument("--measure", choices=list(corpus.programs()), help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    # The tree-walker needs several Python frames per Monkey call.
+    sys.setrecursionlimit(100_000)
+    if args.measure is not None:
+        json.dump(measure(corpus.programs()[args.measure], args.engine, args.repeat), sys.stdout)
+        return
+    current = run_suite(args.programs, args.engine, args.repeat, args.processes)
+
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        confirm_regressions(current, baseline, args.threshold, args.time_threshold, args.min_seconds)
+    print_table(current, baseline)
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.threshold, args.time_threshold, args.min_seconds)
+        limits = f"{args.threshold:.0%} ({args.time_threshold:.0%} for times)"
+        if regressions:
+            print(f"\n{len(regressions)} regressions over {limits}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nno regressions over {limits}")
+
+
+if __name__ == "__main__":
+    main()
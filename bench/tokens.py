@@ -0,0 +1,69 @@
+import time
+import argparse
+import tracemalloc
+from my_token import token
+from lexer import lexer, buffer
+from parser import parser
+from bench.engines import PROGRAMS
+
+
+def lex_tokens(source: str) -> list[token.Token]:
+    l = lexer.Lexer(source)
+    tokens = []
+    while True:
+        tok = l.next_token()
+        tokens.append(tok)
+        if tok.type == token.EOF:
+            return tokens
+
+
+def parse_lexer(source: str) -> object:
+    return parser.Parser(lexer.Lexer(source)).parse_program()
+
+
+def parse_buffer(source: str) -> object:
+    return parser.Parser(buffer.tokenize_all(source).cursor()).parse_program()
+
+
+def measure(fn, source: str, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(source)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        result = fn(source)
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Kept alive until after the snapshot, so this is the retained size.
+    del result
+    return best, current
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Token-list vs columnar token buffer throughput and memory")
+    arg_parser.add_argument("--copies", type=int, default=200,
+                            help="how many times the sample programs are repeated")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    with open("example.txt") as f:
+        source = "\n".join([f.read(), *PROGRAMS.values()]) * args.copies
+    count = len(buffer.tokenize_all(source))
+    print(f"{len(source)} chars, {count} tokens")
+    print(f"{'path':<24}{'time (ms)':>12}{'tokens/s':>14}{'retained (KiB)':>16}")
+    for name, fn in [
+        ("lex: Token list", lex_tokens),
+        ("lex: tokenize_all", buffer.tokenize_all),
+        ("parse: Lexer", parse_lexer),
+        ("parse: TokenBuffer", parse_buffer),
+    ]:
+        seconds, retained = measure(fn, source, args.repeat)
+        print(f"{name:<24}{seconds * 1000:>12.1f}{count / seconds:>14.0f}{retained / 1024:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import gc
+import io
+import os
+import sys
+import zlib
+import pickle
+import copyreg
+import hashlib
+import tempfile
+from types import ModuleType
+from typing import Any
+from my_ast import ast
+from object import object
+from my_token import token
+from lexer import scanner, buffer
+from parser import parser
+
+# Parsed programs are cached like .pyc files: one file per source, named by
+# a hash of the source text and of the interpreter that parsed it.
+#
+# Entries are pickles compressed at the fastest zlib level. Every node is
+# an instance with its own attribute dict, so the raw pickle is about ten
+# times the size of the source; compressed it is about half the source.
+#
+# The directory is bounded: once it holds more than MAX_CACHE_BYTES, the
+# least recently used entries are deleted. Hits refresh an entry's mtime.
+MAGIC = b"MONKEYAST\x02"
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "monkey")
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# Modules whose code decides what a source parses to. Editing any of them
+# changes the interpreter version and so invalidates every cached program.
+parser_modules = [ast, object, token, scanner, buffer, parser]
+_interpreter_version: str | None = None
+
+
+def interpreter_version() -> str:
+    global _interpreter_version
+    if _interpreter_version is None:
+        _interpreter_version = modules_version(MAGIC, parser_modules)
+    return _interpreter_version
+
+
+def modules_version(magic: bytes, modules: list[ModuleType]) -> str:
+    digest = hashlib.sha256(magic)
+    digest.update(sys.version.encode())
+    for module in modules:
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def cache_key(source: str | memoryview) -> str:
+    digest = hashlib.sha256(interpreter_version().encode())
+    if isinstance(source, str):
+        source = source.encode("utf-8", "surrogatepass")
+    digest.update(source)
+    return digest.hexdigest()
+
+
+def fixed_token(token_type: token.TokenType) -> token.Token:
+    return buffer.fixed_tokens[token_type]
+
+
+def reduce_integer(obj: object.Integer) -> tuple[Any, ...]:
+    return object.new_integer, (obj.value,)
+
+
+def reduce_token(obj: token.Token) -> tuple[Any, ...]:
+    if obj.type in buffer.fixed_tokens:
+        return fixed_token, (obj.type,)
+    return obj.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+
+
+class ProgramPickler(pickle.Pickler):
+    # Integers built by the parser are stored by value and fixed-literal
+    # tokens by type, so loading keeps small integers and tokens shared.
+    # A dispatch table, unlike persistent_id, is only consulted for these
+    # two types, so the rest of the tree is pickled without calling back
+    # into Python.
+    dispatch_table = {
+        **copyreg.dispatch_table,
+        object.Integer: reduce_integer,
+        token.Token: reduce_token,
+    }
+
+
+def module_classes(modules: list[ModuleType]) -> set[tuple[str, str]]:
+    return {(module.__name__, name) for module in modules for name, value in vars(module).items()
+            if isinstance(value, type) and value.__module__ == module.__name__}
+
+
+class ProgramUnpickler(pickle.Unpickler):
+    # Shared integers and tokens are rebuilt by the functions the pickle
+    # names, object.new_integer and fixed_token. Nothing but those and the
+    # classes of the tree can be looked up, so a crafted file cannot have
+    # loading call anything else.
+    allowed = module_classes([ast, token]) | {(object.__name__, "new_integer"), (__name__, "fixed_token")}
+
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) not in self.allowed:
+            raise pickle.UnpicklingError(f"{module}.{name} is not allowed")
+        return super().find_class(module, name)
+
+
+def load(cache_dir: str, key: str) -> ast.Program | None:
+    path = os.path.join(cache_dir, key)
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            data = zlib.decompress(f.read())
+        # Loading allocates nothing but AST nodes, so the cyclic garbage
+        # collector would only rescan them over and over.
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            program = ProgramUnpickler(io.BytesIO(data)).load()
+        finally:
+            if enabled:
+                gc.enable()
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Truncated or otherwise unreadable entries count as misses and are
+        # overwritten by the next store.
+        return None
+    if not isinstance(program, ast.Program):
+        return None
+    touch(path)
+    return program
+
+
+def store(cache_dir: str, key: str, program: ast.Program) -> None:
+    data = io.BytesIO()
+    # As in load, the collector would only rescan the nodes being dumped.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        ProgramPickler(data, pickle.HIGHEST_PROTOCOL).dump(program)
+    except (RecursionError, pickle.PicklingError):
+        # Pickle recurses once per level of nesting, so a long enough
+        # expression cannot be dumped. It is simply not cached.
+        return
+    finally:
+        if enabled:
+            gc.enable()
+    write_atomic(cache_dir, key, MAGIC + zlib.compress(data.getbuffer(), 1))
+
+
+def touch(path: str) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def write_atomic(cache_dir: str, name: str, data: bytes | memoryview) -> None:
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        # Written under a temporary name and renamed into place, so
+        # concurrent runs only ever see complete entries.
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, os.path.join(cache_dir, name))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        evict(cache_dir)
+    except OSError:
+        # The cache is an optimization; a read-only or full disk is not an error.
+        pass
+
+
+def evict(cache_dir: str, max_bytes: int | None = None) -> None:
+    if max_bytes is None:
+        max_bytes = MAX_CACHE_BYTES
+    entries = []
+    total = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            # Temporary files belong to writes still in progress.
+            if entry.is_file(follow_symlinks=False) and not entry.name.startswith(".tmp-"):
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+    if total <= max_bytes:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def parse(source: str | memoryview, cache_dir: str) -> tuple[ast.Program, list[str]]:
+    # Programs with parse errors are never cached, so a miss always reports
+    # the same errors as parsing directly.
+    key = cache_key(source)
+    program = load(cache_dir, key)
+    if program is not None:
+        return program, []
+    p = parser.Parser(scanner.Scanner(source))
+    program = p.parse_program()
+    if len(p.errors) == 0:
+        store(cache_dir, key, program)
+    return program, p.errors
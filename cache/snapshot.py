@@ -0,0 +1,99 @@
+import gc
+import io
+import zlib
+import pickle
+from typing import Any
+from my_ast import ast
+from my_token import token
+from object import object, environment
+from evaluator import evaluator, resolver
+from cache import cache
+
+# Snapshots of a global environment, with every function in it, their
+# ASTs and the environments they captured. Pickle keeps shared objects
+# shared and follows cycles, such as a recursive function whose
+# environment holds the function itself. As in the program cache,
+# integers are stored by value and tokens by type; TRUE, FALSE and NULL
+# are stored by name, since the engines compare them by identity.
+#
+# The pickle is compressed: ASTs repeat the same few shapes over and over,
+# so snapshots shrink by a factor of about 50 for little load time.
+#
+# Functions are only called by the engine that made them, so a snapshot
+# records its engine and can only be loaded for the same one. Functions
+# of the transpile engine are Python code and cannot be saved at all.
+MAGIC = b"MONKEYENV\x01"
+NULL_ID = ("NULL",)
+
+# The resolver is listed for the slots and layouts it stores in the tree.
+snapshot_modules = [ast, token, object, environment, resolver, cache]
+_snapshot_version: str | None = None
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def snapshot_version() -> bytes:
+    global _snapshot_version
+    if _snapshot_version is None:
+        _snapshot_version = cache.modules_version(MAGIC, snapshot_modules)
+    return _snapshot_version.encode()
+
+
+class SnapshotPickler(cache.ProgramPickler):
+    def persistent_id(self, obj: Any) -> Any:
+        if obj is evaluator.NULL:
+            return NULL_ID
+        if type(obj) is object.Boolean:
+            return obj.value
+        if type(obj) is object.TranspiledFunction:
+            raise SnapshotError("functions of the transpile engine cannot be saved")
+        return None
+
+
+class SnapshotUnpickler(cache.ProgramUnpickler):
+    allowed = cache.ProgramUnpickler.allowed | cache.module_classes([object, environment])
+
+    def persistent_load(self, pid: Any) -> Any:
+        if pid == NULL_ID:
+            return evaluator.NULL
+        if type(pid) is bool:
+            return evaluator.TRUE if pid else evaluator.FALSE
+        raise pickle.UnpicklingError(f"unknown persistent id {pid!r}")
+
+
+def save(env: environment.Environment, path: str, engine: str = 'eval') -> None:
+    data = io.BytesIO()
+    try:
+        SnapshotPickler(data, pickle.HIGHEST_PROTOCOL).dump((engine, env))
+    except RecursionError:
+        raise SnapshotError("environment is nested too deeply to be saved") from None
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(snapshot_version())
+        f.write(zlib.compress(data.getbuffer()))
+
+
+def load(path: str, engine: str = 'eval') -> environment.Environment:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise SnapshotError(f"{path} is not a snapshot")
+        version = snapshot_version()
+        if f.read(len(version)) != version:
+            raise SnapshotError(f"{path} was saved by a different version of the interpreter")
+        compressed = f.read()
+    # As when loading cached programs, the collector would only rescan the
+    # objects being loaded.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        saved_engine, env = SnapshotUnpickler(io.BytesIO(zlib.decompress(compressed))).load()
+    except Exception as e:
+        raise SnapshotError(f"{path} is corrupt: {e}") from None
+    finally:
+        if enabled:
+            gc.enable()
+    if saved_engine != engine:
+        raise SnapshotError(f"{path} was saved with the {saved_engine} engine, not {engine}")
+    return env
@@ -0,0 +1,278 @@
+import operator
+from typing import Callable
+from my_ast import ast
+from object import object, environment
+from evaluator import evaluator
+from evaluator.evaluator import NULL, TRUE, FALSE
+
+# A compiled node is a Python closure taking the environment it runs in.
+# All dispatch on node types and operators happens once, in compile_node.
+compiled_fn = Callable[[environment.Environment], object.Object]
+
+arithmetic_operators: dict[str, Callable[[int, int], int]] = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.floordiv,
+}
+
+comparison_operators: dict[str, Callable[[int, int], bool]] = {
+    '<': operator.lt,
+    '>': operator.gt,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+
+def run(program: ast.Program, env: environment.Environment) -> object.Object:
+    return compile_node(program)(env)
+
+
+def compile_node(node: ast.Node | None) -> compiled_fn:
+    match node:
+        # Statements
+        case ast.Program():
+            return compile_program(node)
+        case ast.ExpressionStatement():
+            return compile_node(node.expression)
+        case ast.BlockStatement():
+            return compile_block_statement(node)
+        case ast.ReturnStatement():
+            return compile_return_statement(node)
+        case ast.LetStatement():
+            return compile_let_statement(node)
+
+        # Expressions
+        case ast.IntegerLiteral():
+            return compile_integer_literal(node)
+        case ast.Boolean():
+            return compile_constant(evaluator.native_bool_to_boolean_object(node.value))
+        case ast.Identifier():
+            return compile_identifier(node)
+        case ast.FunctionLiteral():
+            return compile_function_literal(node)
+        case ast.CallExpression():
+            return compile_call_expression(node)
+        case ast.PrefixExpression():
+            return compile_prefix_expression(node)
+        case ast.InfixExpression():
+            return compile_infix_expression(node)
+        case ast.IfExpression():
+            return compile_if_expression(node)
+        case _:
+            return compile_constant(NULL)
+
+
+def compile_program(program: ast.Program) -> compiled_fn:
+    stmts = [compile_node(stmt) for stmt in program.statements]
+
+    def run_program(env: environment.Environment) -> object.Object:
+        result = NULL
+        for stmt in stmts:
+            result = stmt(env)
+            rt = type(result)
+            if rt is object.ReturnValue:
+                return result.value
+            if rt is object.Error:
+                return result
+        return result
+    return run_program
+
+
+def compile_block_statement(block: ast.BlockStatement) -> compiled_fn:
+    stmts = [compile_node(stmt) for stmt in block.statements]
+    if len(stmts) == 1:
+        return stmts[0]
+
+    def run_block(env: environment.Environment) -> object.Object:
+        result = NULL
+        for stmt in stmts:
+            result = stmt(env)
+            rt = type(result)
+            if rt is object.ReturnValue or rt is object.Error:
+                return result
+        return result
+    return run_block
+
+
+def compile_return_statement(node: ast.ReturnStatement) -> compiled_fn:
+    value = compile_node(node.return_value)
+
+    def run_return(env: environment.Environment) -> object.Object:
+        val = value(env)
+        if type(val) is object.Error:
+            return val
+        return object.ReturnValue(val)
+    return run_return
+
+
+def compile_let_statement(node: ast.LetStatement) -> compiled_fn:
+    value = compile_node(node.value)
+    name = node.name.value
+
+    def run_let(env: environment.Environment) -> object.Object:
+        val = value(env)
+        if type(val) is object.Error:
+            return val
+        env.set(name, val)
+        return NULL
+    return run_let
+
+
+def compile_constant(obj: object.Object) -> compiled_fn:
+    def run_constant(env: environment.Environment) -> object.Object:
+        return obj
+    return run_constant
+
+
+def compile_integer_literal(node: ast.IntegerLiteral) -> compiled_fn:
+    if node.obj is not None:
+        return compile_constant(node.obj)
+    return compile_constant(object.new_integer(node.value))
+
+
+def compile_identifier(node: ast.Identifier) -> compiled_fn:
+    name = node.value
+
+    def run_identifier(env: environment.Environment) -> object.Object:
+        val = env.get(name)
+        if val is None:
+            return object.Error(f"identifier not found: {name}")
+        return val
+    return run_identifier
+
+
+def compile_function_literal(node: ast.FunctionLiteral) -> compiled_fn:
+    params = node.parameters
+    body = node.body
+    compiled_body = compile_node(body)
+
+    def run_function_literal(env: environment.Environment) -> object.Object:
+        return object.Function(params, env, body, compiled_body)
+    return run_function_literal
+
+
+def compile_call_expression(node: ast.CallExpression) -> compiled_fn:
+    function = compile_node(node.function)
+    arguments = [compile_node(arg) for arg in node.arguments]
+    Error = object.Error
+
+    def run_call_expression(env: environment.Environment) -> object.Object:
+        fn = function(env)
+        if type(fn) is Error:
+            return fn
+        args: list[object.Object] = []
+        for arg in arguments:
+            evaluated = arg(env)
+            if type(evaluated) is Error:
+                return evaluated
+            args.append(evaluated)
+        return apply_function(fn, args)
+    return run_call_expression
+
+
+def apply_function(fn: object.Object, args: list[object.Object]) -> object.Object:
+    if not isinstance(fn, object.Function):
+        return object.Error(f"not a function: {fn.type()}")
+    if fn.compiled is None:
+        fn.compiled = compile_node(fn.body)
+    extended_env = evaluator.extend_function_env(fn, args)
+    evaluated = fn.compiled(extended_env)
+    if type(evaluated) is object.ReturnValue:
+        return evaluated.value
+    return evaluated
+
+
+def compile_prefix_expression(node: ast.PrefixExpression) -> compiled_fn:
+    right = compile_node(node.right)
+    Error = object.Error
+    Integer = object.Integer
+    new_integer = object.new_integer
+    match node.operator:
+        case '!':
+            def run_bang(env: environment.Environment) -> object.Object:
+                val = right(env)
+                if type(val) is Error:
+                    return val
+                return TRUE if val is FALSE or val is NULL else FALSE
+            return run_bang
+        case '-':
+            def run_minus(env: environment.Environment) -> object.Object:
+                val = right(env)
+                if type(val) is Integer:
+                    return new_integer(-val.value)
+                if type(val) is Error:
+                    return val
+                return evaluator.eval_minus_prefix_operator_expression(val)
+            return run_minus
+        case _:
+            op = node.operator
+
+            def run_prefix(env: environment.Environment) -> object.Object:
+                val = right(env)
+                if type(val) is Error:
+                    return val
+                return evaluator.eval_prefix_expression(op, val)
+            return run_prefix
+
+
+def compile_infix_expression(node: ast.InfixExpression) -> compiled_fn:
+    left = compile_node(node.left)
+    right = compile_node(node.right)
+    op = node.operator
+    Error = object.Error
+    Integer = object.Integer
+    new_integer = object.new_integer
+
+    arithmetic = arithmetic_operators.get(op)
+    if arithmetic is not None:
+        def run_arithmetic(env: environment.Environment) -> object.Object:
+            l = left(env)
+            if type(l) is Error:
+                return l
+            r = right(env)
+            if type(l) is Integer and type(r) is Integer:
+                return new_integer(arithmetic(l.value, r.value))
+            if type(r) is Error:
+                return r
+            return evaluator.eval_infix_expression(op, l, r)
+        return run_arithmetic
+
+    comparison = comparison_operators.get(op)
+    if comparison is not None:
+        def run_comparison(env: environment.Environment) -> object.Object:
+            l = left(env)
+            if type(l) is Error:
+                return l
+            r = right(env)
+            if type(l) is Integer and type(r) is Integer:
+                return TRUE if comparison(l.value, r.value) else FALSE
+            if type(r) is Error:
+                return r
+            return evaluator.eval_infix_expression(op, l, r)
+        return run_comparison
+
+    def run_infix(env: environment.Environment) -> object.Object:
+        l = left(env)
+        if type(l) is Error:
+            return l
+        r = right(env)
+        if type(r) is Error:
+            return r
+        return evaluator.eval_infix_expression(op, l, r)
+    return run_infix
+
+
+def compile_if_expression(node: ast.IfExpression) -> compiled_fn:
+    condition = compile_node(node.condition)
+    consequence = compile_node(node.consequence)
+    alternative = compile_node(node.alternative)
+
+    def run_if_expression(env: environment.Environment) -> object.Object:
+        cond = condition(env)
+        if type(cond) is object.Error:
+            return cond
+        if cond is FALSE or cond is NULL:
+            return alternative(env)
+        return consequence(env)
+    return run_if_expression
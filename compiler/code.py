@@ -0,0 +1,107 @@
+from typing import NewType
+
+Opcode = NewType('Opcode', int)
+Instructions = list[int]
+
+# Each instruction is its opcode followed by its operands, flattened into a
+# single list of ints so the VM can index it without decoding.
+OP_CONSTANT = Opcode(0)
+OP_POP = Opcode(1)
+OP_ADD = Opcode(2)
+OP_SUB = Opcode(3)
+OP_MUL = Opcode(4)
+OP_DIV = Opcode(5)
+OP_TRUE = Opcode(6)
+OP_FALSE = Opcode(7)
+OP_NULL = Opcode(8)
+OP_EQUAL = Opcode(9)
+OP_NOT_EQUAL = Opcode(10)
+OP_GREATER_THAN = Opcode(11)
+OP_LESS_THAN = Opcode(12)
+OP_MINUS = Opcode(13)
+OP_BANG = Opcode(14)
+OP_JUMP_NOT_TRUTHY = Opcode(15)
+OP_JUMP = Opcode(16)
+OP_GET_NAME = Opcode(17)
+OP_SET_NAME = Opcode(18)
+OP_CLOSURE = Opcode(19)
+OP_CALL = Opcode(20)
+OP_RETURN_VALUE = Opcode(21)
+OP_WRAP_RETURN = Opcode(22)
+OP_POP_UNLESS_RETURN = Opcode(23)
+
+
+class Definition:
+    def __init__(self, name: str, operand_count: int = 0) -> None:
+        self.name = name
+        self.operand_count = operand_count
+
+
+definitions: dict[Opcode, Definition] = {
+    OP_CONSTANT: Definition("OpConstant", 1),
+    OP_POP: Definition("OpPop"),
+    OP_ADD: Definition("OpAdd"),
+    OP_SUB: Definition("OpSub"),
+    OP_MUL: Definition("OpMul"),
+    OP_DIV: Definition("OpDiv"),
+    OP_TRUE: Definition("OpTrue"),
+    OP_FALSE: Definition("OpFalse"),
+    OP_NULL: Definition("OpNull"),
+    OP_EQUAL: Definition("OpEqual"),
+    OP_NOT_EQUAL: Definition("OpNotEqual"),
+    OP_GREATER_THAN: Definition("OpGreaterThan"),
+    OP_LESS_THAN: Definition("OpLessThan"),
+    OP_MINUS: Definition("OpMinus"),
+    OP_BANG: Definition("OpBang"),
+    OP_JUMP_NOT_TRUTHY: Definition("OpJumpNotTruthy", 1),
+    OP_JUMP: Definition("OpJump", 1),
+    OP_GET_NAME: Definition("OpGetName", 1),
+    OP_SET_NAME: Definition("OpSetName", 1),
+    OP_CLOSURE: Definition("OpClosure", 1),
+    OP_CALL: Definition("OpCall", 1),
+    OP_RETURN_VALUE: Definition("OpReturnValue"),
+    OP_WRAP_RETURN: Definition("OpWrapReturn"),
+    OP_POP_UNLESS_RETURN: Definition("OpPopUnlessReturn", 1),
+}
+
+infix_opcodes: dict[str, Opcode] = {
+    "+": OP_ADD,
+    "-": OP_SUB,
+    "*": OP_MUL,
+    "/": OP_DIV,
+    "==": OP_EQUAL,
+    "!=": OP_NOT_EQUAL,
+    ">": OP_GREATER_THAN,
+    "<": OP_LESS_THAN,
+}
+
+prefix_opcodes: dict[str, Opcode] = {
+    "-": OP_MINUS,
+    "!": OP_BANG,
+}
+
+
+def lookup(op: int) -> Definition:
+    definition = definitions.get(Opcode(op))
+    if definition is None:
+        raise ValueError(f"opcode {op} undefined")
+    return definition
+
+
+def make(op: Opcode, *operands: int) -> Instructions:
+    definition = lookup(op)
+    if len(operands) != definition.operand_count:
+        raise ValueError(
+            f"{definition.name} expects {definition.operand_count} operands, got {len(operands)}")
+    return [op, *operands]
+
+
+def disassemble(ins: Instructions) -> str:
+    lines: list[str] = []
+    i = 0
+    while i < len(ins):
+        definition = lookup(ins[i])
+        operands = ins[i+1:i+1+definition.operand_count]
+        lines.append(' '.join([f"{i:04d}", definition.name, *map(str, operands)]))
+        i += 1 + definition.operand_count
+    return '\n'.join(lines)
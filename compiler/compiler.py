@@ -0,0 +1,197 @@
+from my_ast import ast
+from object import object
+from compiler import code
+from compiler.code import Instructions, Opcode
+
+
+class Bytecode:
+    def __init__(self, instructions: Instructions, constants: list[object.Object], names: list[str]) -> None:
+        self.instructions = instructions
+        self.constants = constants
+        self.names = names
+
+
+class Compiler:
+    def __init__(self) -> None:
+        # The pools are shared by every function compiled here, so closures
+        # keep working after the Bytecode that created them is gone.
+        self.constants: list[object.Object] = []
+        self.names: list[str] = []
+        self.integer_constants: dict[int, int] = {}
+        self.name_indexes: dict[str, int] = {}
+        self.scopes: list[Instructions] = [[]]
+        # Whether a return compiled now leaves the function. Inside an
+        # expression it does not: like the evaluator, it makes a
+        # ReturnValue object, which ends the blocks around it.
+        self.return_leaves = True
+
+    def bytecode(self) -> Bytecode:
+        return Bytecode(self.scopes[-1], self.constants, self.names)
+
+    def compile(self, node: ast.Node | None) -> None:
+        match node:
+            # Statements
+            case ast.Program():
+                self.compile_statements(node.statements)
+            case ast.BlockStatement():
+                self.compile_statements(node.statements)
+            case ast.ExpressionStatement():
+                self.compile(node.expression)
+            case ast.ReturnStatement():
+                self.compile_value(node.return_value)
+                if not self.return_leaves:
+                    self.emit(code.OP_WRAP_RETURN)
+                    return
+                if may_return_value(node.return_value):
+                    # OP_RETURN_VALUE unwraps one ReturnValue, which must
+                    # be the one this return makes.
+                    self.emit(code.OP_WRAP_RETURN)
+                self.emit(code.OP_RETURN_VALUE)
+            case ast.LetStatement():
+                self.compile_value(node.value)
+                self.emit(code.OP_SET_NAME, self.add_name(node.name.value))
+                self.emit(code.OP_NULL)
+
+            # Expressions
+            case ast.IntegerLiteral():
+                self.emit(code.OP_CONSTANT, self.add_integer(node.value))
+            case ast.Boolean():
+                self.emit(code.OP_TRUE if node.value else code.OP_FALSE)
+            case ast.Identifier():
+                self.emit(code.OP_GET_NAME, self.add_name(node.value))
+            case ast.PrefixExpression():
+                self.compile_value(node.right)
+                op = code.prefix_opcodes.get(node.operator)
+                if op is None:
+                    raise ValueError(f"unknown operator {node.operator}")
+                self.emit(op)
+            case ast.InfixExpression():
+                self.compile_value(node.left)
+                self.compile_value(node.right)
+                op = code.infix_opcodes.get(node.operator)
+                if op is None:
+                    raise ValueError(f"unknown operator {node.operator}")
+                self.emit(op)
+            case ast.IfExpression():
+                self.compile_if_expression(node)
+            case ast.FunctionLiteral():
+                self.compile_function_literal(node)
+            case ast.CallExpression():
+                self.compile_value(node.function)
+                for arg in node.arguments:
+                    self.compile_value(arg)
+                self.emit(code.OP_CALL, len(node.arguments))
+            case _:
+                self.emit(code.OP_NULL)
+
+    def compile_value(self, node: ast.Node | None) -> None:
+        return_leaves = self.return_leaves
+        self.return_leaves = False
+        self.compile(node)
+        self.return_leaves = return_leaves
+
+    def compile_statements(self, stmts: list[ast.Statement]) -> None:
+        # Every statement leaves exactly one value on the stack; all but the
+        # last are popped so a block evaluates to its final statement. A
+        # ReturnValue ends the block instead and is left as its value.
+        if len(stmts) == 0:
+            self.emit(code.OP_NULL)
+            return
+        last = len(stmts) - 1
+        returns: list[int] = []
+        for i, stmt in enumerate(stmts):
+            if isinstance(stmt, ast.LetStatement) and i != last:
+                self.compile_value(stmt.value)
+                self.emit(code.OP_SET_NAME, self.add_name(stmt.name.value))
+                continue
+            self.compile(stmt)
+            if i == last or (isinstance(stmt, ast.ReturnStatement) and self.return_leaves):
+                continue
+            if isinstance(stmt, ast.ReturnStatement) or (
+                    isinstance(stmt, ast.ExpressionStatement) and may_return_value(stmt.expression)):
+                returns.append(self.emit(code.OP_POP_UNLESS_RETURN, 0))
+            else:
+                self.emit(code.OP_POP)
+        for pos in returns:
+            self.change_operand(pos, len(self.current_instructions()))
+
+    def compile_if_expression(self, node: ast.IfExpression) -> None:
+        self.compile_value(node.condition)
+        jump_not_truthy = self.emit(code.OP_JUMP_NOT_TRUTHY, 0)
+        self.compile(node.consequence)
+        jump = self.emit(code.OP_JUMP, 0)
+        self.change_operand(jump_not_truthy, len(self.current_instructions()))
+        if node.alternative is None:
+            self.emit(code.OP_NULL)
+        else:
+            self.compile(node.alternative)
+        self.change_operand(jump, len(self.current_instructions()))
+
+    def compile_function_literal(self, node: ast.FunctionLiteral) -> None:
+        self.scopes.append([])
+        return_leaves = self.return_leaves
+        self.return_leaves = True
+        self.compile(node.body)
+        self.emit(code.OP_RETURN_VALUE)
+        self.return_leaves = return_leaves
+        instructions = self.scopes.pop()
+        fn = object.CompiledFunction(
+            instructions, self.constants, self.names, node.parameters, node.body)
+        self.emit(code.OP_CLOSURE, self.add_constant(fn))
+
+    def current_instructions(self) -> Instructions:
+        return self.scopes[-1]
+
+    def emit(self, op: Opcode, *operands: int) -> int:
+        ins = self.current_instructions()
+        pos = len(ins)
+        ins.extend(code.make(op, *operands))
+        return pos
+
+    def change_operand(self, op_pos: int, operand: int) -> None:
+        self.current_instructions()[op_pos + 1] = operand
+
+    def add_constant(self, obj: object.Object) -> int:
+        self.constants.append(obj)
+        return len(self.constants) - 1
+
+    def add_integer(self, value: int) -> int:
+        idx = self.integer_constants.get(value)
+        if idx is None:
+            idx = self.add_constant(object.new_integer(value))
+            self.integer_constants[value] = idx
+        return idx
+
+    def add_name(self, name: str) -> int:
+        idx = self.name_indexes.get(name)
+        if idx is None:
+            self.names.append(name)
+            idx = len(self.names) - 1
+            self.name_indexes[name] = idx
+        return idx
+
+
+def may_return_value(node: ast.Expression | None) -> bool:
+    # A variable or a call can hold a ReturnValue object, and an if can end
+    # its block with one.
+    match node:
+        case ast.Identifier() | ast.CallExpression():
+            return True
+        case ast.IfExpression():
+            return block_may_return_value(node.consequence) or block_may_return_value(node.alternative)
+        case _:
+            return False
+
+
+def block_may_return_value(block: ast.BlockStatement | None) -> bool:
+    if block is None:
+        return False
+    return any(isinstance(stmt, ast.ReturnStatement) or (
+        isinstance(stmt, ast.ExpressionStatement) and may_return_value(stmt.expression))
+        for stmt in block.statements)
+
+
+def compile_program(program: ast.Program) -> Bytecode:
+    c = Compiler()
+    c.compile(program)
+    return c.bytecode()
@@ -0,0 +1,556 @@
+import os
+import sys
+import marshal
+import hashlib
+import importlib.util
+from types import CodeType
+from typing import Callable, NoReturn
+from my_ast import ast
+from object import object, environment
+from evaluator import evaluator, resolver
+from evaluator.evaluator import NULL, TRUE, FALSE
+from optimizer import optimizer
+from cache import cache
+
+# Translates a program into the source of a Python module with one Python
+# function per Monkey function literal, so CPython's own interpreter runs
+# them. Values stay object.Object instances. An error always ends the
+# whole program in the evaluator, so here it is raised as MonkeyError and
+# turned back into the object.Error result at the top.
+#
+# Generated names cannot clash: Monkey identifiers have no digits and
+# become name_level, temporaries and helpers are letters followed by a
+# number, and runtime names have neither.
+
+MAGIC = b"MONKEYPY\x01" + importlib.util.MAGIC_NUMBER
+
+FUNCTION = 'function'
+VALUE = 'value'
+
+arithmetic_operators = {'+': '+', '-': '-', '*': '*', '/': '//'}
+comparison_operators = {'<': '<', '>': '>', '==': '==', '!=': '!='}
+
+# Raised by CPython's compiler for programs nested too deeply for it.
+compile_errors = (RecursionError, SyntaxError, MemoryError)
+
+
+class MonkeyError(Exception):
+    def __init__(self, error: object.Error) -> None:
+        super().__init__(error.message)
+        self.error = error
+
+
+# Runtime support called by generated code.
+
+def fail(message: str) -> NoReturn:
+    raise MonkeyError(object.Error(message))
+
+
+def infix(operator: str, left: object.Object, right: object.Object) -> object.Object:
+    result = evaluator.eval_infix_expression(operator, left, right)
+    if type(result) is object.Error:
+        raise MonkeyError(result)
+    return result
+
+
+def prefix(operator: str, right: object.Object) -> object.Object:
+    result = evaluator.eval_prefix_expression(operator, right)
+    if type(result) is object.Error:
+        raise MonkeyError(result)
+    return result
+
+
+def not_a_function(fn: object.Object) -> Callable[..., NoReturn]:
+    # Called in place of the function, so the arguments are still
+    # evaluated first and their errors win, as in the evaluator.
+    def call(*args: object.Object) -> NoReturn:
+        fail(f"not a function: {fn.type()}")
+    return call
+
+
+def lookup(env: environment.Environment, name: str) -> object.Object:
+    val = env.get(name)
+    if val is None:
+        fail(f"identifier not found: {name}")
+    return val
+
+
+def truthy(obj: object.Object) -> bool:
+    return obj is not FALSE and obj is not NULL
+
+
+def unwrap(obj: object.Object, count: int) -> object.Object:
+    while count > 0 and type(obj) is object.ReturnValue:
+        obj = obj.value
+        count -= 1
+    return obj
+
+
+runtime = {
+    'Integer': object.Integer,
+    'ReturnValue': object.ReturnValue,
+    'Function': object.TranspiledFunction,
+    'new_integer': object.new_integer,
+    'TRUE': TRUE,
+    'FALSE': FALSE,
+    'NULL': NULL,
+    'infix': infix,
+    'prefix': prefix,
+    'not_a_function': not_a_function,
+    'lookup': lookup,
+    'truthy': truthy,
+    'unwrap': unwrap,
+}
+
+
+class Scope:
+    # Bindings of one Monkey function: its parameters and every name its
+    # body declares with let. The program itself is level 0 and binds
+    # nothing; its names live in the environment.
+    def __init__(self, outer: 'Scope | None', params: list[str], names: list[str]) -> None:
+        self.outer = outer
+        self.level = 0 if outer is None else outer.level + 1
+        self.params = set(params)
+        self.names = self.params | set(names)
+
+    def var(self, name: str) -> str:
+        if not name.isascii():
+            name = 'u' + name.encode().hex()
+        return f"{name}_{self.level}"
+
+
+class PyFunction:
+    # A Python function being generated: nested definitions are hoisted to
+    # the start of its body, ahead of the translated statements.
+    def __init__(self, name: str, params: list[str], scope: Scope, helper: bool = False) -> None:
+        self.name = name
+        self.params = params
+        self.scope = scope
+        # Helpers evaluate a block used as a value inside the same Monkey
+        # function and write its variables through nonlocal.
+        self.helper = helper
+        self.nonlocals: set[str] = set()
+        self.tco = False
+        self.param_vars: list[str] = []
+        self.let_vars: list[str] = []
+        self.prelude: list[str] = []
+        self.body: list[str] = []
+        self.depth = 1
+        self.temps = 0
+
+    def emit(self, line: str) -> None:
+        self.body.append('    ' * self.depth + line)
+
+    def lines(self) -> list[str]:
+        lines = [f"def {self.name}({', '.join(self.params)}):"]
+        if self.nonlocals:
+            lines.append(f"    nonlocal {', '.join(sorted(self.nonlocals))}")
+        lines.extend('    ' + line for line in self.prelude)
+        lines.extend(self.body)
+        return lines
+
+
+class Transpiler:
+    def __init__(self) -> None:
+        self.constants: list[str] = []
+        self.integers: dict[int, str] = {}
+        self.counter = 0
+        self.fn = PyFunction('program', ['env'], Scope(None, [], []))
+
+    def unique(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def temp(self) -> str:
+        self.fn.temps += 1
+        return f"t{self.fn.temps}"
+
+    def constant(self, value: str) -> str:
+        name = self.unique('k')
+        self.constants.append(f"{name} = {value}")
+        return name
+
+    def integer(self, value: int) -> str:
+        name = self.integers.get(value)
+        if name is None:
+            name = self.integers[value] = self.constant(f"new_integer({value!r})")
+        return name
+
+    def transpile_program(self, program: ast.Program) -> str:
+        fn = self.fn
+        fn.prelude.extend([
+            "genv = env.globals",
+            "gget = genv.store.get",
+            "gset = env.set",
+        ])
+        self.emit_block(program.statements, True, FUNCTION)
+        return '\n'.join([*self.constants, *fn.lines()]) + '\n'
+
+    # Statements
+
+    def emit_block(self, stmts: list[ast.Statement], tail: bool, mode: str) -> None:
+        # tail: the block's value is the result of the Python function.
+        # mode: FUNCTION unwraps returns like apply_function does, VALUE
+        # keeps the ReturnValue, like a block evaluated inside an expression.
+        for i, stmt in enumerate(stmts):
+            self.emit_statement(stmt, tail and i == len(stmts) - 1, mode)
+        if len(stmts) == 0:
+            self.fn.emit("return NULL" if tail else "pass")
+
+    def emit_statement(self, stmt: ast.Statement, tail: bool, mode: str) -> None:
+        fn = self.fn
+        match stmt:
+            case ast.LetStatement():
+                self.emit_let(stmt)
+                if tail:
+                    fn.emit("return NULL")
+            case ast.ReturnStatement():
+                if mode == VALUE:
+                    fn.emit(
+                        f"return ReturnValue({self.expression(stmt.return_value)})")
+                else:
+                    self.emit_return(stmt.return_value, 0)
+            case ast.ExpressionStatement() if isinstance(stmt.expression, ast.IfExpression):
+                ie = stmt.expression
+                fn.emit(f"if {self.condition(ie.condition)}:")
+                fn.depth += 1
+                self.emit_block(ie.consequence.statements, tail, mode)
+                fn.depth -= 1
+                if ie.alternative is not None:
+                    fn.emit("else:")
+                    fn.depth += 1
+                    self.emit_block(ie.alternative.statements, tail, mode)
+                    fn.depth -= 1
+                elif tail:
+                    fn.emit("return NULL")
+            case ast.ExpressionStatement():
+                expr = stmt.expression
+                if tail and mode == VALUE:
+                    fn.emit(f"return {self.expression(expr)}")
+                elif tail:
+                    self.emit_return(expr, 1)
+                elif may_return_value(expr):
+                    # A ReturnValue as a statement's value ends the block.
+                    t = self.temp()
+                    fn.emit(
+                        f"if type({t} := {self.expression(expr)}) is ReturnValue:")
+                    fn.depth += 1
+                    if mode == VALUE:
+                        fn.emit(f"return {t}")
+                    elif fn.tco:
+                        fn.emit(f"return unwrap({t}, pending + 1)")
+                    else:
+                        fn.emit(f"return {t}.value")
+                    fn.depth -= 1
+                else:
+                    fn.emit(self.expression(expr))
+
+    def emit_let(self, stmt: ast.LetStatement) -> None:
+        fn = self.fn
+        value = self.expression(stmt.value)
+        name = stmt.name.value
+        if fn.scope.level == 0:
+            fn.emit(f"gset({name!r}, {value})")
+            return
+        var = fn.scope.var(name)
+        if fn.helper:
+            fn.nonlocals.add(var)
+        fn.emit(f"{var} = {value}")
+
+    def emit_return(self, expr: ast.Expression | None, unwraps: int) -> None:
+        # Returns expr's value from a Monkey function (or the program).
+        # unwraps is how many ReturnValues the evaluator would strip here:
+        # 1 for a value that ends the body, 0 for a return statement.
+        fn = self.fn
+        if fn.tco and isinstance(expr, ast.CallExpression) and len(expr.arguments) == len(fn.param_vars):
+            value = self.emit_tail_call(expr, unwraps)
+        else:
+            value = self.expression(expr)
+        if not may_return_value(expr) or (unwraps == 0 and not fn.tco):
+            fn.emit(f"return {value}")
+            return
+        t = self.temp()
+        if fn.tco:
+            # Calls turned into loop iterations still owe their unwraps.
+            fn.emit(
+                f"return {t} if type({t} := {value}) is not ReturnValue else unwrap({t}, pending + {unwraps})")
+        else:
+            fn.emit(
+                f"return {t}.value if type({t} := {value}) is ReturnValue else {t}")
+
+    def emit_tail_call(self, call: ast.CallExpression, unwraps: int) -> str:
+        # A call back into the same function is run as another iteration of
+        # the loop around its body instead of a nested Python call.
+        fn = self.fn
+        c = self.temp()
+        fn.emit(f"{c} = {self.expression(call.function)}")
+        args = []
+        for arg in call.arguments:
+            t = self.temp()
+            fn.emit(f"{t} = {self.expression(arg)}")
+            args.append(t)
+        fn.emit(f"if type({c}) is Function and {c}.fn is {fn.name}:")
+        fn.depth += 1
+        for var, arg in zip(fn.param_vars, args):
+            fn.emit(f"{var} = {arg}")
+        for var in fn.let_vars:
+            fn.emit(f"{var} = None")
+        if unwraps:
+            fn.emit(f"pending += {unwraps}")
+        fn.emit("continue")
+        fn.depth -= 1
+        return f"({c}.fn if type({c}) is Function else not_a_function({c}))({', '.join(args)})"
+
+    # Expressions
+
+    def expression(self, node: ast.Expression | None) -> str:
+        match node:
+            case ast.Identifier():
+                return self.read(node.value)
+            case ast.IntegerLiteral():
+                return self.integer(node.value)
+            case ast.Boolean():
+                return 'TRUE' if node.value else 'FALSE'
+            case ast.InfixExpression():
+                return self.infix_expression(node)
+            case ast.PrefixExpression():
+                return self.prefix_expression(node)
+            case ast.CallExpression():
+                c = self.temp()
+                function = self.expression(node.function)
+                args = ', '.join(self.expression(arg) for arg in node.arguments)
+                return f"({c}.fn if type({c} := {function}) is Function else not_a_function({c}))({args})"
+            case ast.IfExpression():
+                condition = self.condition(node.condition)
+                consequence = self.block_value(node.consequence)
+                alternative = self.block_value(node.alternative)
+                return f"({consequence} if {condition} else {alternative})"
+            case ast.FunctionLiteral():
+                return self.function_literal(node)
+            case _:
+                return 'NULL'
+
+    def condition(self, node: ast.Expression | None) -> str:
+        # A Python bool that is true when node's value is truthy.
+        match node:
+            case ast.Boolean():
+                return 'True' if node.value else 'False'
+            case ast.InfixExpression() if node.operator in comparison_operators:
+                check, left, right, left_obj, right_obj = self.integer_operands(node)
+                op = comparison_operators[node.operator]
+                return f"({left} {op} {right} if {check} else truthy(infix({node.operator!r}, {left_obj}, {right_obj})))"
+            case ast.PrefixExpression() if node.operator == '!':
+                return f"(not {self.condition(node.right)})"
+            case _:
+                t = self.temp()
+                return f"(({t} := {self.expression(node)}) is not FALSE and {t} is not NULL)"
+
+    def infix_expression(self, node: ast.InfixExpression) -> str:
+        op = node.operator
+        if op in arithmetic_operators:
+            check, left, right, left_obj, right_obj = self.integer_operands(node)
+            return f"(new_integer({left} {arithmetic_operators[op]} {right}) if {check} else infix({op!r}, {left_obj}, {right_obj}))"
+        if op in comparison_operators:
+            check, left, right, left_obj, right_obj = self.integer_operands(node)
+            return f"((TRUE if {left} {comparison_operators[op]} {right} else FALSE) if {check} else infix({op!r}, {left_obj}, {right_obj}))"
+        return f"infix({op!r}, {self.expression(node.left)}, {self.expression(node.right)})"
+
+    def integer_operands(self, node: ast.InfixExpression) -> tuple[str, str, str, str, str]:
+        # Returns a check that both operands are Integers, the Python ints
+        # to use when it holds and the operand objects otherwise. Both
+        # operands are evaluated, left first, whatever their types.
+        if isinstance(node.left, ast.IntegerLiteral):
+            left_obj = self.integer(node.left.value)
+            left, left_expr = repr(node.left.value), None
+        else:
+            left_obj = self.temp()
+            left, left_expr = f"{left_obj}.value", self.expression(node.left)
+        if isinstance(node.right, ast.IntegerLiteral):
+            right_obj = self.integer(node.right.value)
+            right, right_expr = repr(node.right.value), None
+        else:
+            right_obj = self.temp()
+            right, right_expr = f"{right_obj}.value", self.expression(node.right)
+
+        if left_expr is not None and right_expr is not None:
+            check = f"type({left_obj} := {left_expr}) is (Integer if type({right_obj} := {right_expr}) is Integer else None)"
+        elif left_expr is not None:
+            check = f"type({left_obj} := {left_expr}) is Integer"
+        elif right_expr is not None:
+            check = f"type({right_obj} := {right_expr}) is Integer"
+        else:
+            check = "True"
+        return check, left, right, left_obj, right_obj
+
+    def prefix_expression(self, node: ast.PrefixExpression) -> str:
+        t = self.temp()
+        right = self.expression(node.right)
+        match node.operator:
+            case '!':
+                return f"(TRUE if ({t} := {right}) is FALSE or {t} is NULL else FALSE)"
+            case '-':
+                return f"(new_integer(-{t}.value) if type({t} := {right}) is Integer else prefix('-', {t}))"
+            case _:
+                return f"prefix({node.operator!r}, {right})"
+
+    def read(self, name: str) -> str:
+        # Mirrors evaluator.eval_identifier: the innermost scope declaring
+        # name, falling back outwards while it is still unbound there.
+        scopes: list[Scope] = []
+        scope: Scope | None = self.fn.scope
+        while scope is not None:
+            if name in scope.names:
+                scopes.append(scope)
+            scope = scope.outer
+        expr = f"(gget({name!r}) or lookup(genv, {name!r}))"
+        for scope in reversed(scopes):
+            var = scope.var(name)
+            if name in scope.params:
+                expr = var
+            else:
+                expr = f"({var} if {var} is not None else {expr})"
+        return expr
+
+    def block_value(self, block: ast.BlockStatement | None) -> str:
+        if block is None or len(block.statements) == 0:
+            return 'NULL'
+        stmts = block.statements
+        if len(stmts) == 1 and isinstance(stmts[0], ast.ExpressionStatement):
+            return self.expression(stmts[0].expression)
+        outer = self.fn
+        helper = PyFunction(self.unique('block'), [], outer.scope, helper=True)
+        self.fn = helper
+        self.emit_block(stmts, True, VALUE)
+        self.fn = outer
+        outer.prelude.extend(helper.lines())
+        return f"{helper.name}()"
+
+    def function_literal(self, node: ast.FunctionLiteral) -> str:
+        outer = self.fn
+        params = [param.value for param in node.parameters]
+        scope = Scope(outer.scope, params, resolver.declared_names(node.body))
+        fn = PyFunction(self.unique('fn'), [], scope)
+        for i, param in enumerate(params):
+            var = scope.var(param)
+            if var in fn.params:
+                # fn(x, x): the last argument wins, as with frame slots.
+                fn.params.append(f"p{i}")
+                fn.prelude.append(f"{var} = p{i}")
+            else:
+                fn.params.append(var)
+            fn.param_vars.append(var)
+        fn.params.append('*args')
+        fn.let_vars = sorted({scope.var(name) for name in scope.names - scope.params})
+        fn.prelude.extend(f"{var} = None" for var in fn.let_vars)
+        # Closures made in the body could see a loop rebind the variables
+        # they captured, so only functions without any get the loop.
+        fn.tco = not contains_function_literal(node.body)
+        if fn.tco:
+            fn.prelude.append("pending = 0")
+            fn.emit("while True:")
+            fn.depth += 1
+
+        self.fn = fn
+        self.emit_block(node.body.statements, True, FUNCTION)
+        self.fn = outer
+        outer.prelude.extend(fn.lines())
+
+        parameters = self.constant(repr(tuple(params)))
+        body = self.constant(repr(str(node.body)))
+        return f"Function({fn.name}, {parameters}, {body})"
+
+
+def may_return_value(node: ast.Expression | None) -> bool:
+    # Only these can evaluate to a ReturnValue object: a call whose function
+    # returned one, a variable holding one, or an if whose block returned.
+    return isinstance(node, (ast.Identifier, ast.CallExpression, ast.IfExpression))
+
+
+def contains_function_literal(node: ast.Node | None) -> bool:
+    match node:
+        case ast.FunctionLiteral():
+            return True
+        case ast.BlockStatement():
+            return any(contains_function_literal(stmt) for stmt in node.statements)
+        case ast.LetStatement():
+            return contains_function_literal(node.value)
+        case ast.ExpressionStatement():
+            return contains_function_literal(node.expression)
+        case ast.ReturnStatement():
+            return contains_function_literal(node.return_value)
+        case ast.IfExpression():
+            return contains_function_literal(node.condition) or contains_function_literal(node.consequence) \
+                or contains_function_literal(node.alternative)
+        case ast.PrefixExpression():
+            return contains_function_literal(node.right)
+        case ast.InfixExpression():
+            return contains_function_literal(node.left) or contains_function_literal(node.right)
+        case ast.CallExpression():
+            return contains_function_literal(node.function) \
+                or any(contains_function_literal(arg) for arg in node.arguments)
+        case _:
+            return False
+
+
+def transpile(program: ast.Program) -> str:
+    return Transpiler().transpile_program(program)
+
+
+def compile_program(program: ast.Program) -> CodeType:
+    return compile(transpile(program), '<monkey>', 'exec')
+
+
+def run_code(code: CodeType, env: environment.Environment) -> object.Object:
+    namespace = dict(runtime)
+    exec(code, namespace)
+    try:
+        return namespace['program'](env)
+    except MonkeyError as e:
+        return e.error
+
+
+def run(program: ast.Program, env: environment.Environment) -> object.Object:
+    try:
+        code = compile_program(program)
+    except compile_errors:
+        # The evaluator copes with any nesting the parser produced.
+        return evaluator.eval(program, env)
+    return run_code(code, env)
+
+
+# Code objects are cached next to parsed programs, keyed by the source,
+# the optimize flag and the code of everything that decides what the
+# generated module does.
+
+transpiler_modules = [sys.modules[__name__], evaluator, optimizer, object]
+_transpiler_version: str | None = None
+
+
+def code_key(source: str | memoryview, optimize: bool) -> str:
+    global _transpiler_version
+    if _transpiler_version is None:
+        _transpiler_version = cache.modules_version(MAGIC, transpiler_modules)
+    key = f"{cache.cache_key(source)}:{_transpiler_version}:{optimize}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def load_code(cache_dir: str, key: str) -> CodeType | None:
+    try:
+        with open(os.path.join(cache_dir, key), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if not data.startswith(MAGIC):
+        return None
+    try:
+        code = marshal.loads(data[len(MAGIC):])
+    except (EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(code, CodeType):
+        return None
+    cache.touch(os.path.join(cache_dir, key))
+    return code
+
+
+def store_code(cache_dir: str, key: str, code: CodeType) -> None:
+    cache.write_atomic(cache_dir, key, MAGIC + marshal.dumps(code))
@@ -0,0 +1,116 @@
+import time
+from my_ast import ast
+from object import object, environment
+from evaluator import evaluator
+
+# Messages of the errors an evaluation ends with when it runs out of budget.
+NODES_EXCEEDED = "budget exceeded: more than {} nodes evaluated"
+DEPTH_EXCEEDED = "budget exceeded: call depth over {}"
+STACK_EXHAUSTED = "budget exceeded: call depth over what the Python stack allows"
+DEADLINE_EXCEEDED = "budget exceeded: deadline of {} seconds passed"
+ALLOCATIONS_EXCEEDED = "budget exceeded: more than {} objects allocated"
+
+# Nodes that can create an object when evaluated.
+allocating_nodes = (ast.CallExpression, ast.FunctionLiteral,
+                    ast.InfixExpression, ast.PrefixExpression)
+
+
+class Budget(evaluator.CallHook):
+    # Limits for evaluations by the tree-walking evaluator. Work is
+    # accounted for per statement, which keeps the cost low enough to leave
+    # on: a statement is charged its nodes and the number of them that may
+    # allocate, not counting the statements of blocks inside it, which are
+    # charged when they run. A call is charged one node and one allocation
+    # for its frame. The deadline is checked before every statement, so
+    # call-free code, such as a run of statements squaring a big integer,
+    # is stopped too, though only once the statement running at the
+    # deadline has finished.
+    #
+    # While enabled, it is registered as a call hook and keeps the accounts
+    # as calls enter and statements start. A limit that is hit ends the
+    # evaluation with an object.Error, like any other error.
+    def __init__(self, max_nodes: int | None = None, max_depth: int | None = None, timeout: float | None = None, max_allocations: int | None = None) -> None:
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.max_allocations = max_allocations
+        self.nodes = 0
+        self.depth = 0
+        self.allocations = 0
+        self.deadline: float | None = None
+        # (nodes, allocations) charged for one run of a statement.
+        self.costs: dict[ast.Statement, tuple[int, int]] = {}
+
+    def enable(self) -> None:
+        self.nodes = 0
+        self.depth = 0
+        self.allocations = 0
+        self.deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        evaluator.add_call_hook(self)
+
+    def disable(self) -> None:
+        evaluator.remove_call_hook(self)
+
+    def run(self, program: ast.Program, env: environment.Environment) -> object.Object:
+        self.enable()
+        try:
+            return evaluator.eval(program, env)
+        finally:
+            self.disable()
+
+    def enter(self, fn: object.Function, args: list[object.Object]) -> object.Object | None:
+        # Tail calls do not add to the depth: the call that made one has
+        # left before it enters.
+        self.depth += 1
+        if self.max_depth is not None and self.depth > self.max_depth:
+            return object.Error(DEPTH_EXCEEDED.format(self.max_depth))
+        return self.charge(1, 1)
+
+    def statement(self, stmt: ast.Statement) -> object.Object | None:
+        cost = self.costs.get(stmt)
+        if cost is None:
+            cost = self.costs[stmt] = statement_cost(stmt)
+        stopped = self.charge(*cost)
+        if stopped is not None:
+            return stopped
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            return object.Error(DEADLINE_EXCEEDED.format(self.timeout))
+        return None
+
+    def charge(self, nodes: int, allocations: int) -> object.Object | None:
+        self.nodes += nodes
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            return object.Error(NODES_EXCEEDED.format(self.max_nodes))
+        self.allocations += allocations
+        if self.max_allocations is not None and self.allocations > self.max_allocations:
+            return object.Error(ALLOCATIONS_EXCEEDED.format(self.max_allocations))
+        return None
+
+    def leave(self, fn: object.Function, result: object.Object | None) -> None:
+        self.depth -= 1
+
+    def failed(self, fn: object.Function, error: Exception) -> object.Object | None:
+        # Caught by the innermost call that can still build the error; from
+        # there it propagates like any other.
+        if isinstance(error, RecursionError):
+            return object.Error(STACK_EXHAUSTED)
+        return None
+
+
+def statement_cost(stmt: ast.Statement) -> tuple[int, int]:
+    nodes = allocations = 0
+    pending: list[ast.Node] = [stmt]
+    while pending:
+        node = pending.pop()
+        nodes += 1
+        if isinstance(node, allocating_nodes):
+            allocations += 1
+        if isinstance(node, (ast.BlockStatement, ast.FunctionLiteral)):
+            # Their statements are charged as they run.
+            continue
+        for child in vars(node).values():
+            if isinstance(child, list):
+                pending.extend(item for item in child if isinstance(item, ast.Node))
+            elif isinstance(child, ast.Node):
+                pending.append(child)
+    return nodes, allocations
@@ -1,73 +1,183 @@
 from object import object, environment
 from my_ast import ast
+from evaluator import resolver, memo
 
 NULL = object.Null()
 TRUE = object.Boolean(True)
 FALSE = object.Boolean(False)
 
+# Results of pure function calls, when memoization has been turned on.
+memo_cache: memo.Memo | None = None
+
+
+class CallHook:
+    # Base for tools that watch or limit evaluation: the profilers, hooks
+    # and budgets. While registered, enter is called before each
+    # function runs, including every call of a chain of tail calls, and
+    # leave after it with what its body evaluated to, a TailCall if it
+    # handed over to another call. leave follows every enter, with None if
+    # the body raised. If enter returns an object, the call ends with it
+    # and the body does not run. failed gets the exception a call raised
+    # and may return an object to end the call with instead. done gets
+    # the functions of a chain of tail calls, first first, once the chain
+    # has its result.
+    #
+    # statement is called before each statement runs, whether or not it is
+    # in a call, and may return an object to end the program or block
+    # with instead. node is called before every node is evaluated, the
+    # program itself included, and evaluated after it with its result,
+    # unless it raised.
+    #
+    # Each kind of method is only called on hooks that override one of
+    # them, so that a hook costs nothing where it does not look.
+    def enter(self, fn: object.Function, args: list[object.Object]) -> object.Object | None:
+        return None
+
+    def leave(self, fn: object.Function, result: object.Object | None) -> None:
+        pass
+
+    def failed(self, fn: object.Function, error: Exception) -> object.Object | None:
+        return None
+
+    def done(self, fns: list[object.Function], result: object.Object) -> None:
+        pass
+
+    def statement(self, stmt: ast.Statement) -> object.Object | None:
+        return None
+
+    def node(self, node: ast.Node | None) -> None:
+        pass
+
+    def evaluated(self, node: ast.Node | None, result: object.Object) -> None:
+        pass
+
+
+# Registered hooks, by the methods they override. Replaced rather than
+# changed, so a call sees the same hooks throughout.
+call_hooks: list[CallHook] = []
+statement_hooks: list[CallHook] = []
+node_hooks: list[CallHook] = []
+
+# The node eval_observed is having evaluated, which eval then does not
+# observe a second time.
+NOT_OBSERVED = ast.Program([])
+observed: ast.Node | None = NOT_OBSERVED
+
+
+def overrides(hook: CallHook, *methods: str) -> bool:
+    return any(getattr(type(hook), m) is not getattr(CallHook, m) for m in methods)
+
+
+def add_call_hook(hook: CallHook) -> None:
+    global call_hooks, statement_hooks, node_hooks
+    if overrides(hook, "enter", "leave", "failed", "done"):
+        call_hooks = [*call_hooks, hook]
+    if overrides(hook, "statement"):
+        statement_hooks = [*statement_hooks, hook]
+    if overrides(hook, "node", "evaluated"):
+        node_hooks = [*node_hooks, hook]
+
+
+def remove_call_hook(hook: CallHook) -> None:
+    global call_hooks, statement_hooks, node_hooks
+    call_hooks = [h for h in call_hooks if h is not hook]
+    statement_hooks = [h for h in statement_hooks if h is not hook]
+    node_hooks = [h for h in node_hooks if h is not hook]
+
 
 def eval(node: ast.Node | None, env: environment.Environment) -> object.Object:
+    global observed
+    if node_hooks:
+        if node is not observed:
+            return eval_observed(node, env)
+        observed = NOT_OBSERVED
     match node:
-        # Statements
-        case ast.Program():
-            return eval_program(node, env)
+        # Cases are ordered by how often each node type is evaluated: an
+        # exact class match is cheap, every failed ABC isinstance check is not.
+        case ast.Identifier():
+            return eval_identifier(node, env)
+        case ast.InfixExpression():
+            left = eval(node.left, env)
+            if is_error(left):
+                return left
+            right = eval(node.right, env)
+            if is_error(right):
+                return right
+            return eval_infix_expression(node.operator, left, right)
+        case ast.IntegerLiteral():
+            if node.obj is not None:
+                return node.obj
+            return object.new_integer(node.value)
+        case ast.CallExpression():
+            function = eval(node.function, env)
+            if is_error(function):
+                return function
+            args = eval_expressions(node.arguments, env)
+            if len(args) == 1 and is_error(args[0]):
+                return args[0]
+            if node.tail:
+                return object.TailCall(function, args)
+            return apply_function(function, args)
         case ast.ExpressionStatement():
             return eval(node.expression, env)
         case ast.BlockStatement():
             return eval_block_statement(node, env)
+        case ast.IfExpression():
+            return eval_if_expression(node, env)
         case ast.ReturnStatement():
             val = eval(node.return_value, env)
             if is_error(val):
                 return val
             return object.ReturnValue(val)
+        case ast.PrefixExpression():
+            right = eval(node.right, env)
+            if is_error(right):
+                return right
+            return eval_prefix_expression(node.operator, right)
+        case ast.Boolean():
+            return native_bool_to_boolean_object(node.value)
         case ast.LetStatement():
             val = eval(node.value, env)
             if is_error(val):
                 return val
-            env.set(node.name.value, val)
+            if node.name.depth == 0:
+                env.slots[node.name.slot] = val
+            else:
+                env.set(node.name.value, val)
             return NULL
-
-        # Expressions
-        case ast.IntegerLiteral():
-            return object.Integer(node.value)
-        case ast.Boolean():
-            return native_bool_to_boolean_object(node.value)
-        case ast.Identifier():
-            return eval_identifier(node, env)
         case ast.FunctionLiteral():
             params = node.parameters
             body = node.body
-            return object.Function(params, env, body)
-        case ast.CallExpression():
-            function = eval(node.function, env)
-            if is_error(function):
-                return function
-            args = eval_expressions(node.arguments, env)
-            if len(args) == 1 and is_error(args[0]):
-                return args[0]
-            return apply_function(function, args)
-        case ast.PrefixExpression():
-            right = eval(node.right, env)
-            if is_error(right):
-                return right
-            return eval_prefix_expression(node.operator, right)
-        case ast.InfixExpression():
-            left = eval(node.left, env)
-            if is_error(left):
-                return left
-            right = eval(node.right, env)
-            if is_error(right):
-                return right
-            return eval_infix_expression(node.operator, left, right)
-        case ast.IfExpression():
-            return eval_if_expression(node, env)
+            return object.Function(params, env, body, layout=node.layout)
+        case ast.Program():
+            resolver.resolve(node)
+            return eval_program(node, env)
         case _:
             return NULL
 
 
+def eval_observed(node: ast.Node | None, env: environment.Environment) -> object.Object:
+    global observed
+    hooks = node_hooks
+    for hook in hooks:
+        hook.node(node)
+    observed = node
+    result = eval(node, env)
+    # In case the hooks were removed while node ran, and eval did not
+    # take it.
+    observed = NOT_OBSERVED
+    for hook in hooks:
+        hook.evaluated(node, result)
+    return result
+
+
 def eval_program(stmts: ast.Program, env: environment.Environment) -> object.Object:
     result = NULL
     for stmt in stmts.statements:
+        if statement_hooks:
+            stopped = enter_statement(stmt)
+            if stopped is not None:
+                return stopped
         result = eval(stmt, env)
         match result:
             case object.ReturnValue():
@@ -80,6 +190,10 @@ def eval_program(stmts: ast.Program, env: environment.Environment) -> object.Obj
 def eval_block_statement(block: ast.BlockStatement, env: environment.Environment) -> object.Object:
     result = NULL
     for stmt in block.statements:
+        if statement_hooks:
+            stopped = enter_statement(stmt)
+            if stopped is not None:
+                return stopped
         result = eval(stmt, env)
         rt = result.type()
         if rt == object.RETURN_VALUE_OBJ or rt == object.ERROR_OBJ:
@@ -87,8 +201,28 @@ def eval_block_statement(block: ast.BlockStatement, env: environment.Environment
     return result
 
 
+def enter_statement(stmt: ast.Statement) -> object.Object | None:
+    for hook in statement_hooks:
+        stopped = hook.statement(stmt)
+        if stopped is not None:
+            return stopped
+    return None
+
+
 def eval_identifier(node: ast.Identifier, env: environment.Environment) -> object.Object:
-    val = env.get(node.value)
+    depth = node.depth
+    if depth is None:
+        val = env.get(node.value)
+    elif depth == resolver.GLOBAL:
+        val = env.globals.get(node.value)
+    else:
+        while depth > 0:
+            env = env.outer
+            depth -= 1
+        val = env.slots[node.slot]
+        if val is None:
+            # Not bound yet in its own frame, fall back to enclosing scopes.
+            val = env.outer.get(node.value)
     if val is None:
         return object.Error(f"identifier not found: {node.value}")
     return val
@@ -105,14 +239,84 @@ def eval_expressions(exps: list[ast.Expression], env: environment.Environment) -
 
 
 def apply_function(fn: object.Object, args: list[object.Object]) -> object.Object:
-    if not isinstance(fn, object.Function):
-        return object.Error(f"not a function: {fn.type()}")
-    extended_env = extend_function_env(fn, args)
-    evaluated = eval(fn.body, extended_env)
-    return unwrap_return_value(evaluated)
+    # Trampoline: calls in tail position come back as TailCall and are run
+    # here instead of nesting another Python frame per Monkey call.
+    if call_hooks or memo_cache is not None:
+        return apply_observed_function(fn, args)
+    while True:
+        if not isinstance(fn, object.Function):
+            return object.Error(f"not a function: {fn.type()}")
+        extended_env = extend_function_env(fn, args)
+        evaluated = unwrap_return_value(eval(fn.body, extended_env))
+        if type(evaluated) is not object.TailCall:
+            return evaluated
+        fn, args = evaluated.fn, evaluated.args
+
+
+def apply_observed_function(fn: object.Object, args: list[object.Object]) -> object.Object:
+    # apply_function with memoization and call hooks. Every call in a chain
+    # of tail calls has the chain's result, so it is stored under each of
+    # their keys. A call answered from the memo does not run, so hooks do
+    # not see it.
+    cache = memo_cache
+    hooks = call_hooks
+    keys: list[memo.Key] = []
+    called: list[object.Function] = []
+    while True:
+        if not isinstance(fn, object.Function):
+            evaluated = object.Error(f"not a function: {fn.type()}")
+            break
+        if cache is not None:
+            key = cache.key(fn, args)
+            if key is not None:
+                evaluated = cache.get(key)
+                if evaluated is not None:
+                    break
+                keys.append(key)
+        if hooks:
+            called.append(fn)
+            evaluated = call_hooked(fn, args, hooks)
+        else:
+            evaluated = unwrap_return_value(eval(fn.body, extend_function_env(fn, args)))
+        if type(evaluated) is not object.TailCall:
+            break
+        fn, args = evaluated.fn, evaluated.args
+    for key in keys:
+        cache.put(key, evaluated)
+    for hook in hooks:
+        hook.done(called, evaluated)
+    return evaluated
+
+
+def call_hooked(fn: object.Function, args: list[object.Object], hooks: list[CallHook]) -> object.Object:
+    entered = 0
+    evaluated = None
+    try:
+        for hook in hooks:
+            evaluated = hook.enter(fn, args)
+            entered += 1
+            if evaluated is not None:
+                return evaluated
+        evaluated = unwrap_return_value(eval(fn.body, extend_function_env(fn, args)))
+        return evaluated
+    except Exception as e:
+        for i in range(entered):
+            evaluated = hooks[i].failed(fn, e)
+            if evaluated is not None:
+                return evaluated
+        raise
+    finally:
+        for i in range(entered - 1, -1, -1):
+            hooks[i].leave(fn, evaluated)
 
 
 def extend_function_env(fn: object.Function, args: list[object.Object]) -> environment.Environment:
+    if fn.layout is not None:
+        frame = environment.Frame(fn.layout, fn.env)
+        slots = frame.slots
+        for param_idx, slot in enumerate(fn.layout.param_slots):
+            slots[slot] = args[param_idx]
+        return frame
     env = environment.Environment(fn.env)
     for param_idx, param in enumerate(fn.parameters):
         env.set(param.value, args[param_idx])
@@ -146,7 +350,7 @@ def eval_minus_prefix_operator_expression(right: object.Object) -> object.Object
     if not isinstance(right, object.Integer):
         return object.Error(f"unknown operator: -{right.type()}")
     value = right.value
-    return object.Integer(-value)
+    return object.new_integer(-value)
 
 
 def eval_infix_expression(operator: str, left: object.Object, right: object.Object) -> object.Object:
@@ -166,13 +370,13 @@ def eval_integer_infix_expression(operator: str, left: object.Integer, right: ob
     left_val, right_val = left.value, right.value
     match operator:
         case '+':
-            return object.Integer(left_val+right_val)
+            return object.new_integer(left_val+right_val)
         case '-':
-            return object.Integer(left_val-right_val)
+            return object.new_integer(left_val-right_val)
         case '*':
-            return object.Integer(left_val*right_val)
+            return object.new_integer(left_val*right_val)
         case '/':
-            return object.Integer(left_val//right_val)
+            return object.new_integer(left_val//right_val)
         case '<':
             return native_bool_to_boolean_object(left_val < right_val)
         case '>':
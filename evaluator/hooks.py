@@ -0,0 +1,109 @@
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+from my_ast import ast
+from object import object
+from evaluator import evaluator
+
+# Hooks let embedders observe the tree-walking evaluator. Events and the
+# arguments their callbacks get:
+#
+#   on_call(fn, args)    a Monkey function is about to run
+#   on_return(fn, value) it finished with value (ReturnValue unwrapped);
+#                        every on_call is matched by one on_return unless
+#                        a Python exception ends the evaluation
+#   on_error(error)      an object.Error was produced, once per error as
+#                        it starts propagating
+#   on_node(node)        a node is about to be evaluated
+#
+# Subscribing registers a node hook and/or a call hook with the
+# evaluator; once the last callback that needs one unsubscribes, it is
+# taken out again. With no subscribers the evaluator pays only for
+# checking that there are no hooks. Exceptions raised by callbacks
+# propagate out of the evaluation.
+
+ON_CALL = "on_call"
+ON_RETURN = "on_return"
+ON_ERROR = "on_error"
+ON_NODE = "on_node"
+
+subscribers: dict[str, list[Callable[..., Any]]] = {
+    ON_CALL: [],
+    ON_RETURN: [],
+    ON_ERROR: [],
+    ON_NODE: [],
+}
+
+last_error: object.Error | None = None
+
+
+def subscribe(event: str, callback: Callable[..., Any]) -> None:
+    if event not in subscribers:
+        raise ValueError(f"unknown hook event: {event}")
+    subscribers[event].append(callback)
+    update()
+
+
+def unsubscribe(event: str, callback: Callable[..., Any]) -> None:
+    if event not in subscribers:
+        raise ValueError(f"unknown hook event: {event}")
+    subscribers[event].remove(callback)
+    update()
+
+
+@contextmanager
+def subscribed(event: str, callback: Callable[..., Any]) -> Iterator[None]:
+    subscribe(event, callback)
+    try:
+        yield
+    finally:
+        unsubscribe(event, callback)
+
+
+def update() -> None:
+    global last_error
+    trace_nodes = bool(subscribers[ON_NODE] or subscribers[ON_ERROR])
+    if trace_nodes and node_tracer not in evaluator.node_hooks:
+        evaluator.add_call_hook(node_tracer)
+    elif not trace_nodes:
+        evaluator.remove_call_hook(node_tracer)
+        last_error = None
+
+    trace_calls = bool(subscribers[ON_CALL] or subscribers[ON_RETURN])
+    if trace_calls and call_tracer not in evaluator.call_hooks:
+        evaluator.add_call_hook(call_tracer)
+    elif not trace_calls:
+        evaluator.remove_call_hook(call_tracer)
+
+
+class NodeTracer(evaluator.CallHook):
+    def node(self, node: ast.Node | None) -> None:
+        for callback in subscribers[ON_NODE]:
+            callback(node)
+
+    def evaluated(self, node: ast.Node | None, result: object.Object) -> None:
+        global last_error
+        # An error is returned unchanged by every node it propagates
+        # through, so a new one has just been produced.
+        if type(result) is object.Error and result is not last_error:
+            last_error = result
+            for callback in subscribers[ON_ERROR]:
+                callback(result)
+
+
+class CallTracer(evaluator.CallHook):
+    def enter(self, fn: object.Function, args: list[object.Object]) -> object.Object | None:
+        for callback in subscribers[ON_CALL]:
+            callback(fn, args)
+        return None
+
+    def done(self, fns: list[object.Function], result: object.Object) -> None:
+        # Functions that made a tail call return once the call they handed
+        # over to has returned, with its value, so calls and returns still
+        # pair up.
+        for fn in reversed(fns):
+            for callback in subscribers[ON_RETURN]:
+                callback(fn, result)
+
+
+node_tracer = NodeTracer()
+call_tracer = CallTracer()
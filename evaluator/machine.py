@@ -0,0 +1,184 @@
+from my_ast import ast
+from object import object, environment
+from evaluator import evaluator, resolver
+from evaluator.evaluator import NULL
+
+# Explicit-stack evaluator. Pending work (continuations) and Monkey call
+# frames live in Python lists on the heap instead of in Python recursion, so
+# call depth is bounded by memory and by max_depth, not by the interpreter's
+# recursion limit. Results and errors match evaluator.eval.
+
+DEFAULT_MAX_DEPTH = 2_000_000
+
+# Work item tags. Every item is a tuple whose first element is its tag.
+EVAL = 0             # (EVAL, node, env): evaluate node, push its value
+APPLY_PREFIX = 1     # (APPLY_PREFIX, operator)
+APPLY_INFIX = 2      # (APPLY_INFIX, operator)
+BRANCH = 3           # (BRANCH, if_expression, env)
+NEXT_STATEMENT = 4   # (NEXT_STATEMENT, statements, index, env)
+WRAP_RETURN = 5      # (WRAP_RETURN,)
+BIND = 6             # (BIND, identifier, env)
+CALL = 7             # (CALL, call_expression)
+RETURN = 8           # (RETURN,): leave the current Monkey function
+UNWRAP_PROGRAM = 9   # (UNWRAP_PROGRAM,)
+
+
+def eval(node: ast.Node | None, env: environment.Environment, max_depth: int = DEFAULT_MAX_DEPTH) -> object.Object:
+    if isinstance(node, ast.Program):
+        resolver.resolve(node)
+        work: list[tuple] = [(UNWRAP_PROGRAM,)]
+        push_statements(work, node.statements, env)
+    else:
+        work = [(EVAL, node, env)]
+    return run(work, max_depth)
+
+
+def push_statements(work: list[tuple], stmts: list[ast.Statement], env: environment.Environment) -> None:
+    if len(stmts) == 0:
+        work.append((EVAL, None, env))
+        return
+    if len(stmts) > 1:
+        work.append((NEXT_STATEMENT, stmts, 1, env))
+    work.append((EVAL, stmts[0], env))
+
+
+def run(work: list[tuple], max_depth: int) -> object.Object:
+    values: list[object.Object] = []
+    # Length of `work` below each active call's RETURN item; a tail call
+    # discards everything above it and reuses it.
+    returns: list[int] = []
+    push = work.append
+    pop = work.pop
+    push_value = values.append
+    pop_value = values.pop
+    Error = object.Error
+    ReturnValue = object.ReturnValue
+
+    while work:
+        item = pop()
+        tag = item[0]
+
+        if tag == EVAL:
+            node = item[1]
+            env = item[2]
+            t = type(node)
+            if t is ast.Identifier:
+                val = evaluator.eval_identifier(node, env)
+                if type(val) is Error:
+                    return val
+                push_value(val)
+            elif t is ast.InfixExpression:
+                push((APPLY_INFIX, node.operator))
+                push((EVAL, node.right, env))
+                push((EVAL, node.left, env))
+            elif t is ast.IntegerLiteral:
+                if node.obj is not None:
+                    push_value(node.obj)
+                else:
+                    push_value(object.new_integer(node.value))
+            elif t is ast.CallExpression:
+                push((CALL, node))
+                for arg in reversed(node.arguments):
+                    push((EVAL, arg, env))
+                push((EVAL, node.function, env))
+            elif t is ast.ExpressionStatement:
+                push((EVAL, node.expression, env))
+            elif t is ast.BlockStatement:
+                push_statements(work, node.statements, env)
+            elif t is ast.IfExpression:
+                push((BRANCH, node, env))
+                push((EVAL, node.condition, env))
+            elif t is ast.ReturnStatement:
+                push((WRAP_RETURN,))
+                push((EVAL, node.return_value, env))
+            elif t is ast.PrefixExpression:
+                push((APPLY_PREFIX, node.operator))
+                push((EVAL, node.right, env))
+            elif t is ast.Boolean:
+                push_value(evaluator.native_bool_to_boolean_object(node.value))
+            elif t is ast.LetStatement:
+                push((BIND, node.name, env))
+                push((EVAL, node.value, env))
+            elif t is ast.FunctionLiteral:
+                push_value(object.Function(
+                    node.parameters, env, node.body, layout=node.layout))
+            else:
+                push_value(NULL)
+
+        elif tag == APPLY_INFIX:
+            right = pop_value()
+            left = pop_value()
+            val = evaluator.eval_infix_expression(item[1], left, right)
+            if type(val) is Error:
+                return val
+            push_value(val)
+
+        elif tag == NEXT_STATEMENT:
+            if type(values[-1]) is ReturnValue:
+                continue
+            pop_value()
+            stmts, idx, env = item[1], item[2], item[3]
+            if idx + 1 < len(stmts):
+                push((NEXT_STATEMENT, stmts, idx + 1, env))
+            push((EVAL, stmts[idx], env))
+
+        elif tag == BRANCH:
+            node = item[1]
+            if evaluator.is_truthy(pop_value()):
+                push((EVAL, node.consequence, item[2]))
+            elif node.alternative is not None:
+                push((EVAL, node.alternative, item[2]))
+            else:
+                push_value(NULL)
+
+        elif tag == CALL:
+            num_args = len(item[1].arguments)
+            if num_args:
+                args = values[-num_args:]
+                del values[-num_args:]
+            else:
+                args = []
+            fn = pop_value()
+            if not isinstance(fn, object.Function):
+                return Error(f"not a function: {fn.type()}")
+            if item[1].tail and returns:
+                # Same result as the trampoline in evaluator.apply_function.
+                del work[returns[-1] + 1:]
+            else:
+                if len(returns) >= max_depth:
+                    return Error(f"stack overflow: maximum call depth {max_depth} exceeded")
+                returns.append(len(work))
+                push((RETURN,))
+            push((EVAL, fn.body, evaluator.extend_function_env(fn, args)))
+
+        elif tag == RETURN:
+            returns.pop()
+            val = values[-1]
+            if type(val) is ReturnValue:
+                values[-1] = val.value
+
+        elif tag == WRAP_RETURN:
+            values[-1] = ReturnValue(values[-1])
+
+        elif tag == APPLY_PREFIX:
+            val = evaluator.eval_prefix_expression(item[1], pop_value())
+            if type(val) is Error:
+                return val
+            push_value(val)
+
+        elif tag == BIND:
+            ident = item[1]
+            env = item[2]
+            val = pop_value()
+            if ident.depth == 0:
+                env.slots[ident.slot] = val
+            else:
+                env.set(ident.value, val)
+            push_value(NULL)
+
+        elif tag == UNWRAP_PROGRAM:
+            val = values[-1]
+            if type(val) is ReturnValue:
+                values[-1] = val.value
+
+    return values[-1] if values else NULL
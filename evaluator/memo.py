@@ -0,0 +1,151 @@
+from collections import OrderedDict
+from typing import Hashable
+from my_ast import ast
+from object import object
+
+DEFAULT_SIZE = 1024
+
+Key = tuple[Hashable, ...]
+
+
+class Memo:
+    # Results of pure function calls, most recently used last. A call is
+    # keyed by the function, its arguments and the current values of every
+    # name the function reads from enclosing scopes: a later `let` can
+    # rebind those, so they are part of the key rather than trusted.
+    def __init__(self, size: int = DEFAULT_SIZE) -> None:
+        self.size = size
+        self.results: OrderedDict[Key, object.Object] = OrderedDict()
+        self.free: dict[ast.BlockStatement, tuple[str, ...]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.skipped = 0
+
+    def key(self, fn: object.Function, args: list[object.Object]) -> Key | None:
+        # None when the call must not be memoized.
+        parts: list[Hashable] = [fn]
+        for arg in args:
+            part = value_key(arg)
+            if part is None:
+                self.skipped += 1
+                return None
+            parts.append(part)
+        captured = self.captured(fn, set())
+        if captured is None:
+            self.skipped += 1
+            return None
+        parts.append(captured)
+        return tuple(parts)
+
+    def captured(self, fn: object.Function, seen: set[object.Function]) -> Key | None:
+        # Values of the names fn reads from its enclosing scopes. Functions
+        # among them are followed, since rebinding what they read changes
+        # fn's result too. None when fn reads anything else.
+        seen.add(fn)
+        parts: list[Hashable] = []
+        for name in self.free_names(fn.body, fn.parameters):
+            val = fn.env.get(name)
+            part = None if val is None else value_key(val)
+            if part is None:
+                if type(val) is not object.Function:
+                    return None
+                part = val
+                if val not in seen:
+                    inner = self.captured(val, seen)
+                    if inner is None:
+                        return None
+                    part = (val, inner)
+            parts.append(part)
+        return tuple(parts)
+
+    def free_names(self, body: ast.BlockStatement, parameters: list[ast.Identifier]) -> tuple[str, ...]:
+        names = self.free.get(body)
+        if names is None:
+            names = self.free[body] = tuple(
+                sorted(free_names(body, {param.value for param in parameters})))
+        return names
+
+    def get(self, key: Key) -> object.Object | None:
+        result = self.results.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.results.move_to_end(key)
+        return result
+
+    def put(self, key: Key, result: object.Object) -> None:
+        # Errors are not kept, and neither are functions: each call must
+        # create a new one, which `==` can tell apart.
+        if value_key(result) is None:
+            return
+        self.results[key] = result
+        if len(self.results) > self.size:
+            self.results.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.results.clear()
+        self.free.clear()
+
+    def stats(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return f"memo: {self.hits} hits, {self.misses} misses ({rate:.1%} hit rate), {self.evictions} evictions, {self.skipped} calls not memoizable, {len(self.results)}/{self.size} entries"
+
+
+def value_key(obj: object.Object) -> Hashable | None:
+    # Integers are compared by value; booleans and null by identity, like
+    # the evaluator does.
+    t = type(obj)
+    if t is object.Integer:
+        return obj.value
+    if t is object.Boolean or t is object.Null:
+        return obj
+    return None
+
+
+def free_names(node: ast.Node | None, bound: set[str]) -> set[str]:
+    # Names node may read from enclosing scopes, given the names bound when
+    # it runs. Monkey has no assignment to outer scopes, so reading is the
+    # only way a function's result can depend on anything but its
+    # arguments. A `let` only binds its name for the statements after it in
+    # the same block: until it has run, reads fall through to the enclosing
+    # scope, and a `let` in a branch may not run at all.
+    match node:
+        case ast.Identifier():
+            return set() if node.value in bound else {node.value}
+        case ast.FunctionLiteral():
+            return free_names(node.body, bound | {param.value for param in node.parameters})
+        case ast.BlockStatement():
+            names: set[str] = set()
+            bound = set(bound)
+            for stmt in node.statements:
+                names |= free_names(stmt, bound)
+                if isinstance(stmt, ast.LetStatement):
+                    bound.add(stmt.name.value)
+            return names
+        case ast.LetStatement():
+            if isinstance(node.value, ast.FunctionLiteral):
+                # The function cannot be called before it is bound.
+                return free_names(node.value, bound | {node.name.value})
+            return free_names(node.value, bound)
+        case ast.ExpressionStatement():
+            return free_names(node.expression, bound)
+        case ast.ReturnStatement():
+            return free_names(node.return_value, bound)
+        case ast.IfExpression():
+            return free_names(node.condition, bound) | free_names(node.consequence, bound) \
+                | free_names(node.alternative, bound)
+        case ast.PrefixExpression():
+            return free_names(node.right, bound)
+        case ast.InfixExpression():
+            return free_names(node.left, bound) | free_names(node.right, bound)
+        case ast.CallExpression():
+            names = free_names(node.function, bound)
+            for arg in node.arguments:
+                names |= free_names(arg, bound)
+            return names
+        case _:
+            return set()
@@ -0,0 +1,144 @@
+from my_ast import ast
+from object import environment
+
+# Depth of identifiers that no enclosing function declares. They are looked
+# up by name in the scope the program runs in.
+GLOBAL = -1
+
+
+def resolve(node: ast.Node | None, scopes: list[dict[str, int]] | None = None) -> None:
+    if scopes is None:
+        scopes = []
+    match node:
+        # Statements
+        case ast.Program():
+            for stmt in node.statements:
+                resolve(stmt, scopes)
+        case ast.BlockStatement():
+            for stmt in node.statements:
+                resolve(stmt, scopes)
+        case ast.ExpressionStatement():
+            resolve(node.expression, scopes)
+        case ast.ReturnStatement():
+            resolve(node.return_value, scopes)
+        case ast.LetStatement():
+            resolve(node.value, scopes)
+            resolve_identifier(node.name, scopes)
+
+        # Expressions
+        case ast.Identifier():
+            resolve_identifier(node, scopes)
+        case ast.FunctionLiteral():
+            resolve_function_literal(node, scopes)
+        case ast.CallExpression():
+            resolve(node.function, scopes)
+            for arg in node.arguments:
+                resolve(arg, scopes)
+        case ast.PrefixExpression():
+            resolve(node.right, scopes)
+        case ast.InfixExpression():
+            resolve(node.left, scopes)
+            resolve(node.right, scopes)
+        case ast.IfExpression():
+            resolve(node.condition, scopes)
+            resolve(node.consequence, scopes)
+            resolve(node.alternative, scopes)
+
+
+def resolve_identifier(ident: ast.Identifier, scopes: list[dict[str, int]]) -> None:
+    for depth, scope in enumerate(reversed(scopes)):
+        slot = scope.get(ident.value)
+        if slot is not None:
+            ident.depth = depth
+            ident.slot = slot
+            return
+    ident.depth = GLOBAL
+    ident.slot = None
+
+
+def resolve_function_literal(fn: ast.FunctionLiteral, scopes: list[dict[str, int]]) -> None:
+    # Blocks do not open scopes, so a function's frame holds its parameters
+    # and every name bound by `let` anywhere in its body.
+    slots: dict[str, int] = {}
+    param_slots: list[int] = []
+    for param in fn.parameters:
+        param_slots.append(slots.setdefault(param.value, len(slots)))
+    for name in declared_names(fn.body):
+        slots.setdefault(name, len(slots))
+    fn.layout = environment.FrameLayout(slots, tuple(param_slots))
+
+    scopes.append(slots)
+    for param in fn.parameters:
+        resolve_identifier(param, scopes)
+    resolve(fn.body, scopes)
+    scopes.pop()
+
+    mark_tail_calls(fn.body)
+    for stmt in return_statements(fn.body):
+        mark_tail_calls(stmt)
+
+
+def mark_tail_calls(node: ast.Node | None, in_return: bool = False) -> None:
+    # Marks calls whose value becomes the function's result unchanged. A
+    # return nested in a returned value is left alone: the evaluator only
+    # unwraps one ReturnValue per call.
+    match node:
+        case ast.CallExpression():
+            node.tail = True
+        case ast.ExpressionStatement():
+            mark_tail_calls(node.expression, in_return)
+        case ast.ReturnStatement():
+            if not in_return:
+                mark_tail_calls(node.return_value, True)
+        case ast.BlockStatement():
+            if len(node.statements) > 0:
+                mark_tail_calls(node.statements[-1], in_return)
+        case ast.IfExpression():
+            mark_tail_calls(node.consequence, in_return)
+            mark_tail_calls(node.alternative, in_return)
+
+
+def return_statements(node: ast.Node | None) -> list[ast.ReturnStatement]:
+    # Returns that exit the function: those reached through blocks and
+    # through if expressions used as statements. A return nested inside a
+    # larger expression only yields a ReturnValue to that expression.
+    match node:
+        case ast.ReturnStatement():
+            return [node]
+        case ast.BlockStatement():
+            stmts: list[ast.ReturnStatement] = []
+            for stmt in node.statements:
+                stmts.extend(return_statements(stmt))
+            return stmts
+        case ast.ExpressionStatement() if isinstance(node.expression, ast.IfExpression):
+            return [*return_statements(node.expression.consequence), *return_statements(node.expression.alternative)]
+        case _:
+            return []
+
+
+def declared_names(node: ast.Node | None) -> list[str]:
+    match node:
+        case ast.BlockStatement():
+            names: list[str] = []
+            for stmt in node.statements:
+                names.extend(declared_names(stmt))
+            return names
+        case ast.LetStatement():
+            return [node.name.value, *declared_names(node.value)]
+        case ast.ExpressionStatement():
+            return declared_names(node.expression)
+        case ast.ReturnStatement():
+            return declared_names(node.return_value)
+        case ast.IfExpression():
+            return [*declared_names(node.condition), *declared_names(node.consequence), *declared_names(node.alternative)]
+        case ast.PrefixExpression():
+            return declared_names(node.right)
+        case ast.InfixExpression():
+            return [*declared_names(node.left), *declared_names(node.right)]
+        case ast.CallExpression():
+            names = declared_names(node.function)
+            for arg in node.arguments:
+                names.extend(declared_names(arg))
+            return names
+        case _:
+            return []
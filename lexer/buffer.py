@@ -0,0 +1,77 @@
+import sys
+from array import array
+from lexer import scanner
+from my_token import token
+from my_token.token import Token, TokenType
+
+# Token types whose literal is always the same text. Their Token objects are
+# immutable in practice, so one instance per type is shared by every use.
+fixed_tokens: dict[TokenType, Token] = {
+    t: Token(t, literal) for t, literal in [
+        (token.EOF, ""),
+        (token.ASSIGN, "="), (token.PLUS, "+"), (token.MINUS, "-"),
+        (token.BANG, "!"), (token.ASTERISK, "*"), (token.SLASH, "/"),
+        (token.LT, "<"), (token.GT, ">"), (token.EQ, "=="), (token.NOT_EQ, "!="),
+        (token.COMMA, ","), (token.SEMICOLON, ";"),
+        (token.LPAREN, "("), (token.RPAREN, ")"),
+        (token.LBRACE, "{"), (token.RBRACE, "}"),
+        *[(t, keyword) for keyword, t in token.keywords.items()],
+    ]
+}
+
+
+class TokenBuffer:
+    # Struct-of-arrays token stream: one byte of type code and two offsets
+    # into the source per token. Literals are sliced only when asked for.
+    def __init__(self, source: str | memoryview) -> None:
+        self.source = source
+        self.types = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def type(self, i: int) -> TokenType:
+        return token.token_types[self.types[i]]
+
+    def literal(self, i: int) -> str:
+        return scanner.literal(self.source, self.starts[i], self.ends[i])
+
+    def token(self, i: int) -> Token:
+        token_type = token.token_types[self.types[i]]
+        fixed = fixed_tokens.get(token_type)
+        if fixed is not None:
+            return fixed
+        # Interned so repeated identifiers share one string.
+        return Token(token_type, sys.intern(self.literal(i)))
+
+    def cursor(self) -> 'TokenCursor':
+        return TokenCursor(self)
+
+
+class TokenCursor:
+    # Feeds a TokenBuffer to parser.Parser one index at a time. Past the end
+    # it keeps returning the EOF token, like the lexers.
+    def __init__(self, buffer: TokenBuffer) -> None:
+        self.buffer = buffer
+        self.index = 0
+
+    def next_token(self) -> Token:
+        i = self.index
+        if i >= len(self.buffer):
+            return fixed_tokens[token.EOF]
+        self.index = i + 1
+        return self.buffer.token(i)
+
+
+def tokenize_all(source: str | memoryview) -> TokenBuffer:
+    buffer = TokenBuffer(source)
+    types, starts, ends = buffer.types, buffer.starts, buffer.ends
+    codes = token.token_codes
+    for token_type, start, end in scanner.scan_tokens(source):
+        types.append(codes[token_type])
+        starts.append(start)
+        ends.append(end)
+        if token_type == token.EOF:
+            return buffer
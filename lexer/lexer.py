@@ -24,51 +24,56 @@ class Lexer:
             return self.input[self.read_position]
 
     def next_token(self) -> Token:
+        token_type, start, end = self.scan()
+        return Token(token_type, self.input[start:end])
+
+    def scan(self) -> tuple[TokenType, int, int]:
+        # Returns the next token as its type and the [start, end) offsets of
+        # its literal, without building a Token or copying the literal.
         self.skip_whitespace()
+        start = self.position
         match self.ch:
             # Operators
             case '=':
                 if self.peek_char() == '=':
-                    ch = self.ch
                     self.read_char()
-                    tok = Token(EQ, ch+self.ch)
+                    token_type = EQ
                 else:
-                    tok = Token(ASSIGN, self.ch)
-            case '+': tok = Token(PLUS, self.ch)
-            case '-': tok = Token(MINUS, self.ch)
+                    token_type = ASSIGN
+            case '+': token_type = PLUS
+            case '-': token_type = MINUS
             case '!':
                 if self.peek_char() == '=':
-                    ch = self.ch
                     self.read_char()
-                    tok = Token(NOT_EQ, ch+self.ch)
+                    token_type = NOT_EQ
                 else:
-                    tok = Token(BANG, self.ch)
-            case '*': tok = Token(ASTERISK, self.ch)
-            case '/': tok = Token(SLASH, self.ch)
-            case '<': tok = Token(LT, self.ch)
-            case '>': tok = Token(GT, self.ch)
+                    token_type = BANG
+            case '*': token_type = ASTERISK
+            case '/': token_type = SLASH
+            case '<': token_type = LT
+            case '>': token_type = GT
             # Delimiters
-            case ';': tok = Token(SEMICOLON, self.ch)
-            case ',': tok = Token(COMMA, self.ch)
-            case '(': tok = Token(LPAREN, self.ch)
-            case ')': tok = Token(RPAREN, self.ch)
-            case '{': tok = Token(LBRACE, self.ch)
-            case '}': tok = Token(RBRACE, self.ch)
+            case ';': token_type = SEMICOLON
+            case ',': token_type = COMMA
+            case '(': token_type = LPAREN
+            case ')': token_type = RPAREN
+            case '{': token_type = LBRACE
+            case '}': token_type = RBRACE
             # EOF
-            case '': tok = Token(EOF, '')
+            case '':
+                self.read_char()
+                return EOF, start, start
             case _:
                 if self.ch.isalpha() or self.ch == '_':
                     literal = self.read_identifier()
-                    token_type = lookup_ident(literal)
-                    tok = Token(token_type, literal)
-                    return tok
+                    return lookup_ident(literal), start, self.position
                 elif self.ch.isdigit():
-                    tok = Token(INT, self.read_number())
-                    return tok
+                    self.read_number()
+                    return INT, start, self.position
                 else:
-                    tok = Token(ILLEGAL, self.ch)
+                    token_type = ILLEGAL
         self.read_char()
-        return tok
+        return token_type, start, self.position
 
     def read_identifier(self) -> str:
         position = self.position
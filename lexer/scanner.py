@@ -0,0 +1,114 @@
+import re
+from typing import Iterator
+from my_token.token import *
+
+# One pattern for the whole token grammar. Each match swallows the
+# whitespace in front of a token; any other non-blank character becomes an
+# ILLEGAL token, so the pattern only fails at the end of the input.
+TOKEN_REGEX = r'''
+    [ \t\n\r]*
+    (?:
+        ([^\W\d]+)                       # 1: identifier or keyword
+      | (\d+)                            # 2: integer
+      | (==|!=|[=+\-!*/<>;,(){}])        # 3: operator or delimiter
+      | ([^ \t\n\r])                     # 4: illegal character
+    )
+'''
+TOKEN_PATTERN = re.compile(TOKEN_REGEX, re.VERBOSE)
+# The same grammar over ASCII bytes, for sources mapped by lexer.source_file.
+BYTES_TOKEN_PATTERN = re.compile(TOKEN_REGEX.encode(), re.VERBOSE)
+
+IDENT_GROUP, INT_GROUP, OPERATOR_GROUP, ILLEGAL_GROUP = 1, 2, 3, 4
+
+operators: dict[str, TokenType] = {
+    "=": ASSIGN, "==": EQ, "+": PLUS, "-": MINUS, "!": BANG, "!=": NOT_EQ,
+    "*": ASTERISK, "/": SLASH, "<": LT, ">": GT,
+    ";": SEMICOLON, ",": COMMA, "(": LPAREN, ")": RPAREN, "{": LBRACE, "}": RBRACE,
+}
+# Literals that always lex to the same type: operators and keywords.
+fixed_literals: dict[str, TokenType] = {**operators, **keywords}
+fixed_byte_literals: dict[bytes, TokenType] = {
+    literal.encode(): t for literal, t in fixed_literals.items()}
+
+
+class Scanner:
+    # Drop-in replacement for lexer.Lexer that matches TOKEN_PATTERN once
+    # per token instead of stepping through the input one character at a time.
+    def __init__(self, input: str | memoryview) -> None:
+        self.input = input
+        self.tokens = scan_tokens(input)
+
+    def next_token(self) -> Token:
+        token_type, start, end = self.scan()
+        return Token(token_type, literal(self.input, start, end))
+
+    def scan(self) -> tuple[TokenType, int, int]:
+        return next(self.tokens)
+
+
+def literal(input: str | memoryview, start: int, end: int) -> str:
+    text = input[start:end]
+    if isinstance(text, str):
+        return text
+    return str(text, 'ascii')
+
+
+def scan_tokens(input: str | memoryview) -> Iterator[tuple[TokenType, int, int]]:
+    # Yields (type, start, end) for every token, then EOF forever.
+    if not isinstance(input, str):
+        return scan_bytes(input)
+    return scan_text(input)
+
+
+def scan_text(input: str) -> Iterator[tuple[TokenType, int, int]]:
+    match = TOKEN_PATTERN.match
+    # The regex classes only agree with str.isalpha/isdigit on ASCII.
+    ascii = input.isascii()
+    position = 0
+    while (m := match(input, position)) is not None:
+        group = m.lastindex
+        start = m.start(group)
+        position = m.end()
+        if not ascii and group != OPERATOR_GROUP and not input[start:position + 1].isascii():
+            token_type, position = scan_unicode(input, start)
+        else:
+            literal = m[group]
+            token_type = fixed_literals.get(literal)
+            if token_type is None:
+                token_type = IDENT if group == IDENT_GROUP else INT if group == INT_GROUP else ILLEGAL
+        yield token_type, start, position
+    end = len(input)
+    while True:
+        yield EOF, end, end
+
+
+def scan_bytes(input: memoryview) -> Iterator[tuple[TokenType, int, int]]:
+    # ASCII only: bytes patterns match letters and digits by their ASCII
+    # meaning, which is what str.isalpha/isdigit give for ASCII text.
+    match = BYTES_TOKEN_PATTERN.match
+    position = 0
+    while (m := match(input, position)) is not None:
+        group = m.lastindex
+        start = m.start(group)
+        position = m.end()
+        token_type = fixed_byte_literals.get(m[group])
+        if token_type is None:
+            token_type = IDENT if group == IDENT_GROUP else INT if group == INT_GROUP else ILLEGAL
+        yield token_type, start, position
+    end = len(input)
+    while True:
+        yield EOF, end, end
+
+
+def scan_unicode(input: str, start: int) -> tuple[TokenType, int]:
+    end = start + 1
+    ch = input[start]
+    if ch.isalpha() or ch == '_':
+        while end < len(input) and (input[end].isalpha() or input[end] == '_'):
+            end += 1
+        return lookup_ident(input[start:end]), end
+    elif ch.isdigit():
+        while end < len(input) and input[end].isdigit():
+            end += 1
+        return INT, end
+    return ILLEGAL, end
@@ -0,0 +1,29 @@
+import io
+import re
+import mmap
+from contextlib import contextmanager
+from typing import Iterator, TextIO
+
+NON_ASCII = re.compile(rb'[\x80-\xff]')
+
+
+@contextmanager
+def open_source(file: TextIO) -> Iterator[str | memoryview]:
+    # Maps the file and yields a read-only view of its bytes, so a large
+    # source is lexed in place instead of being decoded into one big str.
+    # Streams that can't be mapped, empty files and non-ASCII sources are
+    # read as text like before.
+    try:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, io.UnsupportedOperation):
+        yield file.read()
+        return
+    view = memoryview(mapped)
+    try:
+        if NON_ASCII.search(view) is None:
+            yield view
+        else:
+            yield file.read()
+    finally:
+        view.release()
+        mapped.close()
@@ -1,28 +1,193 @@
+import os
 import sys
+import glob
 import getpass
 import argparse
 from repl import repl
+from batch import batch
+from server import server
+from prefork import prefork
+from cache import cache, snapshot
+from evaluator import evaluator, machine, memo, budget
+from profiler import profiler, sampler
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Monkey Programming Language")
-    parser.add_argument("source", nargs="?",
-                        type=argparse.FileType("r"), default=sys.stdin, help="Source code file to interpret (Optional)")
+    parser.add_argument("sources", nargs="*", metavar="source",
+                        help="Source code files, directories or globs to interpret (Optional; more than one runs them as a batch)")
     parser.add_argument(
         "--mode", choices=["l", "p", "e"], default="e", help="Set the mode of the REPL {l: lex, p: parse, e: evaluate} (default: e)")
-    return parser.parse_args()
+    parser.add_argument(
+        "--engine", choices=list(repl.engines), default="eval", help="Set the evaluation engine {eval: tree-walking evaluator, vm: bytecode virtual machine, closure: compiled closures, stack: explicit-stack evaluator, transpile: Python code generated ahead of time} (default: eval)")
+    parser.add_argument(
+        "-O", "--optimize", action="store_true", help="Fold constants and simplify the program before running it")
+    parser.add_argument(
+        "--stream", action="store_true", help="Evaluate a source file one top-level statement at a time as it is parsed (eval engine only)")
+    parser.add_argument(
+        "--cache-dir", default=cache.DEFAULT_CACHE_DIR, help=f"Directory for cached parsed programs and transpiled code (default: {cache.DEFAULT_CACHE_DIR})")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Always lex and parse the source file instead of using the cache")
+    parser.add_argument(
+        "--memo", action="store_true", help="Cache results of pure function calls (eval engine only)")
+    parser.add_argument(
+        "--memo-size", type=int, metavar="SIZE", help=f"Number of most recently used results --memo keeps (default: {memo.DEFAULT_SIZE})")
+    parser.add_argument(
+        "--memo-stats", action="store_true", help="Print memoization hits and misses to stderr when done")
+    parser.add_argument(
+        "--profile", action="store_true", help="Print calls and time per Monkey function and evaluations per node type to stderr when done (eval engine only)")
+    parser.add_argument(
+        "--sample-out", metavar="FILE", help="Sample the Monkey call stack while running and write it to FILE as folded stacks for flame graph tools (eval engine only)")
+    parser.add_argument(
+        "--sample-rate", type=float, default=sampler.DEFAULT_RATE, metavar="HZ", help=f"Samples per second taken for --sample-out (default: {sampler.DEFAULT_RATE})")
+    parser.add_argument(
+        "--max-nodes", type=int, metavar="N", help="End evaluation with an error after about N nodes are evaluated (eval engine only)")
+    parser.add_argument(
+        "--max-depth", type=int, metavar="N", help=f"End evaluation with an error when Monkey calls nest deeper than N (eval and stack engines only; the stack engine's default is {machine.DEFAULT_MAX_DEPTH})")
+    parser.add_argument(
+        "--timeout", type=float, metavar="SECONDS", help="End evaluation with an error once it has run for SECONDS (eval engine only)")
+    parser.add_argument(
+        "--max-allocations", type=int, metavar="N", help="End evaluation with an error after about N objects are allocated (eval engine only)")
+    parser.add_argument(
+        "-j", "--jobs", type=int, metavar="N", help="Run a batch of source files in N worker processes (default: one per CPU)")
+    parser.add_argument(
+        "--prefix", action="store_true", help="In a batch, write each file's output as soon as it is done, every line prefixed with the file's path, instead of in input order")
+    parser.add_argument(
+        "--pattern", default="*", help="Names of the files run from a directory given as a source (default: *)")
+    parser.add_argument(
+        "--serve", nargs="?", const=server.DEFAULT_ADDRESS, metavar="ADDRESS", help=f"Serve evaluation requests as newline-delimited JSON on ADDRESS, host:port or a Unix socket path (default: {server.DEFAULT_ADDRESS}); --jobs sets the number of worker processes, limits and --timeout apply to each request (default timeout: {server.DEFAULT_TIMEOUT:g})")
+    parser.add_argument(
+        "--prefork", nargs="?", const=prefork.DEFAULT_ADDRESS, metavar="ADDRESS", help=f"Run scripts sent to ADDRESS, a Unix socket path or host:port (default: {prefork.DEFAULT_ADDRESS}), in --jobs workers forked once the interpreter is loaded; each connection sends one script and gets back what main.py would print")
+    parser.add_argument(
+        "--prelude", type=argparse.FileType("r"), metavar="FILE", help="Monkey source run once before the workers are forked; its definitions are visible to every script (--prefork only)")
+    parser.add_argument(
+        "--max-requests", type=int, metavar="N", help="Replace each worker by a fresh fork after it has run N scripts (--prefork only)")
+    parser.add_argument(
+        "--snapshot-in", metavar="FILE", help="Start from the global environment saved in FILE by --snapshot-out instead of an empty one")
+    parser.add_argument(
+        "--snapshot-out", metavar="FILE", help="Save the global environment to FILE when done, functions included (not with --engine transpile)")
+    args = parser.parse_args()
+    snapshots = args.snapshot_in is not None or args.snapshot_out is not None
+    if snapshots and (args.mode != "e" or args.serve is not None or args.prefork is not None):
+        parser.error("--snapshot-in and --snapshot-out cannot be combined with --mode, --serve or --prefork")
+    if args.snapshot_out is not None and args.engine == "transpile":
+        parser.error("--snapshot-out is not supported with --engine transpile")
+    if args.prefork is not None and (args.sources or args.mode != "e" or args.stream or args.profile or args.sample_out is not None
+                                     or args.memo_stats or args.prefix or args.serve is not None):
+        parser.error("--prefork cannot be combined with source files, --mode, --stream, --profile, --sample-out, --memo-stats, --prefix or --serve")
+    if args.prefork is None and (args.prelude is not None or args.max_requests is not None):
+        parser.error("--prelude and --max-requests require --prefork")
+    if args.max_requests is not None and args.max_requests < 1:
+        parser.error("--max-requests must be at least 1")
+    if args.serve is not None and (args.sources or args.mode != "e" or args.engine != "eval" or args.stream or args.memo
+                                   or args.profile or args.sample_out is not None or args.prefix):
+        parser.error("--serve cannot be combined with source files, --mode, --engine, --stream, --memo, --profile, --sample-out or --prefix")
+    args.batch = args.jobs is not None or len(args.sources) > 1 or any(
+        os.path.isdir(source) or (glob.has_magic(source) and not os.path.exists(source)) for source in args.sources)
+    if args.batch and (args.profile or args.sample_out is not None or args.memo_stats):
+        parser.error("--profile, --sample-out and --memo-stats cannot be used with a batch of files")
+    if args.batch and snapshots:
+        parser.error("--snapshot-in and --snapshot-out cannot be used with a batch of files")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if not args.batch and len(args.sources) == 1 and args.sources[0] != "-":
+        try:
+            args.source = open(args.sources[0])
+        except OSError as e:
+            parser.error(f"can't open '{args.sources[0]}': {e}")
+    else:
+        args.source = sys.stdin
+    if args.stream and args.engine != "eval":
+        parser.error("--stream is only supported with --engine eval")
+    if args.memo and args.engine != "eval":
+        parser.error("--memo is only supported with --engine eval")
+    if args.memo_size is not None and not args.memo:
+        parser.error("--memo-size requires --memo")
+    if args.memo_size is not None and args.memo_size < 1:
+        parser.error("--memo-size must be at least 1")
+    if args.memo_stats and not args.memo:
+        parser.error("--memo-stats requires --memo")
+    if args.profile and args.engine != "eval":
+        parser.error("--profile is only supported with --engine eval")
+    if args.sample_out is not None and args.engine != "eval":
+        parser.error("--sample-out is only supported with --engine eval")
+    if args.sample_out is not None and args.profile:
+        parser.error("--sample-out cannot be combined with --profile")
+    if args.sample_rate <= 0:
+        parser.error("--sample-rate must be positive")
+    limited = any(limit is not None for limit in (
+        args.max_nodes, args.timeout, args.max_allocations))
+    if limited and args.engine != "eval":
+        parser.error("--max-nodes, --timeout and --max-allocations are only supported with --engine eval")
+    if args.max_depth is not None and args.engine not in ("eval", "stack"):
+        parser.error("--max-depth is only supported with --engine eval or stack")
+    if args.max_depth is not None and args.max_depth < 1:
+        parser.error("--max-depth must be at least 1")
+    return args
 
 
 if __name__ == "__main__":
     args = parse_args()
+    memo_size = args.memo_size or memo.DEFAULT_SIZE
+    if args.memo:
+        evaluator.memo_cache = memo.Memo(memo_size)
+    prof = None
+    if args.profile:
+        prof = profiler.Profiler()
+        prof.enable()
+    sampling = None
+    if args.sample_out is not None:
+        sampling = sampler.Sampler(args.sample_rate)
+        sampling.enable()
+    limits = None
+    if any(limit is not None for limit in (args.max_nodes, args.max_depth, args.timeout, args.max_allocations)):
+        limits = budget.Budget(args.max_nodes, args.max_depth,
+                               args.timeout, args.max_allocations)
 
-    if args.source != sys.stdin:
-        repl.interpret_file(args.source, sys.stdout, args.mode)
+    cache_dir = None if args.no_cache else args.cache_dir
+    env = None
+    if args.snapshot_in is not None:
+        try:
+            env = snapshot.load(args.snapshot_in, args.engine)
+        except (OSError, snapshot.SnapshotError) as e:
+            sys.exit(f"main.py: error: {e}")
+    if args.serve is not None:
+        timeout = server.DEFAULT_TIMEOUT if args.timeout is None else args.timeout
+        server.serve(args.serve, args.jobs or os.cpu_count() or 1, limits, timeout)
+    elif args.prefork is not None:
+        prefork.serve(args.prefork, args.jobs or os.cpu_count() or 1, args.prelude,
+                      args.engine, args.optimize, limits, args.max_requests)
+    elif args.batch:
+        options = batch.Options(args.mode, args.engine, args.optimize,
+                                args.stream, cache_dir, limits, memo_size if args.memo else None)
+        paths = batch.expand_paths(args.sources, args.pattern)
+        summary = batch.run_batch(paths, sys.stdout, options,
+                                  args.jobs or os.cpu_count() or 1, args.prefix)
+        summary.report(sys.stderr)
+        sys.exit(1 if summary.failures else 0)
+    elif args.source != sys.stdin:
+        env = repl.interpret_file(args.source, sys.stdout, args.mode, args.engine,
+                                  args.optimize, args.stream, cache_dir, limits, env)
     else:
         print(
             f"Hello {getpass.getuser()}! This is the Monkey programming language!")
         print("Feel free to type in commands")
-        repl.start(sys.stdin, sys.stdout, args.mode)
+        env = repl.start(sys.stdin, sys.stdout, args.mode,
+                         args.engine, args.optimize, limits, env)
+    if args.snapshot_out is not None:
+        try:
+            snapshot.save(env, args.snapshot_out, args.engine)
+        except (OSError, snapshot.SnapshotError) as e:
+            sys.exit(f"main.py: error: {e}")
+    if prof is not None:
+        prof.disable()
+        prof.report(sys.stderr)
+    if sampling is not None:
+        sampling.disable()
+        with open(args.sample_out, "w") as f:
+            sampling.write_folded(f)
+    if args.memo_stats:
+        print(evaluator.memo_cache.stats(), file=sys.stderr)
 
     #     with open(source_code) as f:
     #         repl.interpret_file(f, sys.stdout)
@@ -0,0 +1,150 @@
+from types import CodeType
+from typing import Any
+from lexer import scanner
+from parser import parser
+from my_ast import ast
+from object import object, environment
+from evaluator import evaluator, budget
+from compiler import transpiler
+from optimizer import optimizer
+
+# Embedding API: compile a program once, then run it in sessions and call
+# the functions it defines from Python as often as needed, without going
+# through source text or output streams.
+#
+#   program = monkey.compile("let price = fn(n, vip) { ... };")
+#   session = monkey.Session(program)
+#   session.call("price", 3, True)
+#
+# Python ints, bools and None become Monkey integers, booleans and null,
+# and Monkey values are converted back the same way. Other Monkey values,
+# such as functions, are passed through as objects.
+
+ENGINES = ('eval', 'transpile')
+
+
+class CompileError(Exception):
+    def __init__(self, errors: list[str]) -> None:
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class EvaluationError(Exception):
+    # Raised in place of the object.Error an evaluation ended with.
+    def __init__(self, error: object.Error) -> None:
+        super().__init__(error.message)
+        self.error = error
+
+
+class Program:
+    def __init__(self, node: ast.Program) -> None:
+        self.node = node
+        # Python code of the program, generated the first time a session
+        # runs it with the transpile engine.
+        self.code: CodeType | None = None
+
+
+def compile(source: str, optimize: bool = False) -> Program:
+    p = parser.Parser(scanner.Scanner(source))
+    node = p.parse_program()
+    if len(p.errors) != 0:
+        raise CompileError(p.errors)
+    if optimize:
+        optimizer.optimize(node)
+    return Program(node)
+
+
+class Session:
+    # Global scope programs are run in and functions are called from. The
+    # tree-walking evaluator runs them unless engine is 'transpile'; limits
+    # apply to the evaluator only, to each run and call separately.
+    def __init__(self, program: Program | None = None, engine: str = 'eval', limits: budget.Budget | None = None, env: environment.Environment | None = None) -> None:
+        if engine not in ENGINES:
+            raise ValueError(f"unknown engine: {engine}")
+        if limits is not None and engine != 'eval':
+            raise ValueError("limits apply to the eval engine only")
+        self.env = environment.Environment() if env is None else env
+        self.engine = engine
+        self.limits = limits
+        if program is not None:
+            self.run(program)
+
+    def run(self, program: Program | str) -> Any:
+        if isinstance(program, str):
+            program = compile(program)
+        if self.engine == 'transpile':
+            if program.code is None:
+                try:
+                    program.code = transpiler.compile_program(program.node)
+                except transpiler.compile_errors:
+                    return from_object(evaluator.eval(program.node, self.env))
+            return from_object(transpiler.run_code(program.code, self.env))
+        if self.limits is not None:
+            return from_object(self.limits.run(program.node, self.env))
+        return from_object(evaluator.eval(program.node, self.env))
+
+    def fork(self) -> 'Session':
+        # Sees everything defined in this session so far, but what it
+        # defines itself stays its own.
+        return Session(engine=self.engine, limits=self.limits, env=self.env.fork())
+
+    def get(self, name: str) -> Any:
+        val = self.env.get(name)
+        if val is None:
+            raise EvaluationError(object.Error(f"identifier not found: {name}"))
+        return from_object(val)
+
+    def call(self, fn_name: str, *values: Any) -> Any:
+        fn = self.env.get(fn_name)
+        if fn is None:
+            raise EvaluationError(object.Error(f"identifier not found: {fn_name}"))
+        args = [to_object(value) for value in values]
+        if type(fn) is object.TranspiledFunction:
+            check_arguments(fn_name, fn.parameters, args)
+            try:
+                return from_object(fn.fn(*args))
+            except transpiler.MonkeyError as e:
+                raise EvaluationError(e.error) from None
+        if type(fn) is object.Function:
+            check_arguments(fn_name, fn.parameters, args)
+        if self.limits is None:
+            return from_object(evaluator.apply_function(fn, args))
+        self.limits.enable()
+        try:
+            evaluated = evaluator.apply_function(fn, args)
+        finally:
+            self.limits.disable()
+        return from_object(evaluated)
+
+
+def check_arguments(fn_name: str, parameters: list | tuple, args: list[object.Object]) -> None:
+    # Monkey ignores extra arguments, but missing ones would crash the
+    # engines.
+    if len(args) < len(parameters):
+        raise TypeError(f"{fn_name} takes {len(parameters)} arguments, got {len(args)}")
+
+
+def to_object(value: Any) -> object.Object:
+    # bool is a subclass of int, so it is checked first.
+    if value is True:
+        return evaluator.TRUE
+    if value is False:
+        return evaluator.FALSE
+    if type(value) is int:
+        return object.new_integer(value)
+    if value is None:
+        return evaluator.NULL
+    if isinstance(value, object.Object):
+        return value
+    raise TypeError(f"cannot convert {type(value).__name__} to a Monkey value")
+
+
+def from_object(obj: object.Object) -> Any:
+    t = type(obj)
+    if t is object.Integer or t is object.Boolean:
+        return obj.value
+    if t is object.Null:
+        return None
+    if t is object.Error:
+        raise EvaluationError(obj)
+    return obj
@@ -58,6 +58,9 @@ class IntegerLiteral(Expression):
     def __init__(self, token: token.Token, value: int) -> None:
         self.token = token
         self.value = value
+        # object.Integer built once by the parser and returned on every
+        # evaluation of this literal.
+        self.obj = None
 
     def __str__(self) -> str:
         return self.token.literal
@@ -67,6 +70,9 @@ class Identifier(Expression):
     def __init__(self, token: token.Token, value: str) -> None:
         self.token = token
         self.value = value
+        # Lexical address filled in by evaluator.resolver.
+        self.depth: int | None = None
+        self.slot: int | None = None
 
     def __str__(self) -> str:
         return self.value
@@ -106,6 +112,8 @@ class FunctionLiteral(Expression):
         self.token = token
         self.parameters = parameters
         self.body = body
+        # object.environment.FrameLayout filled in by evaluator.resolver.
+        self.layout = None
 
     def __str__(self) -> str:
         params = ', '.join(map(str, self.parameters))
@@ -117,6 +125,8 @@ class CallExpression(Expression):
         self.token = token
         self.function = function
         self.arguments = arguments if arguments is not None else []
+        # Set by evaluator.resolver when the call's value is returned as-is.
+        self.tail = False
 
     def __str__(self) -> str:
         args = ', '.join([str(a) for a in self.arguments])
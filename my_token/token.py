@@ -51,6 +51,17 @@ keywords: dict[str, TokenType] = {
 }
 
 
+# Compact integer codes for token types, used by lexer.buffer.
+token_types: list[TokenType] = [
+    ILLEGAL, EOF, IDENT, INT,
+    ASSIGN, PLUS, MINUS, BANG, ASTERISK, SLASH, LT, GT, EQ, NOT_EQ,
+    COMMA, SEMICOLON, LPAREN, RPAREN, LBRACE, RBRACE,
+    FUNCTION, LET, TRUE, FALSE, IF, ELSE, RETURN,
+]
+token_codes: dict[TokenType, int] = {
+    t: code for code, t in enumerate(token_types)}
+
+
 def lookup_ident(ident: str) -> TokenType:
     return keywords.get(ident, IDENT)
 
@@ -2,10 +2,26 @@ from object import object
 
 
 class Environment:
+    __slots__ = ('store', 'outer')
+
     def __init__(self, outer: 'Environment | None' = None) -> None:
         self.store: dict[str, object.Object] = {}
         self.outer = outer
 
+    @property
+    def globals(self) -> 'Environment':
+        # Scope that identifiers resolved as global are looked up in. Not
+        # a reference to itself, so dropping a scope frees it at once
+        # rather than at the next cyclic collection.
+        return self
+
+    def fork(self) -> 'Environment':
+        # Copy-on-write child: reads fall through to this scope, lets stay
+        # in the child. Nothing is copied, so a fork costs the same however
+        # much is defined here, and discarding it frees only its own
+        # bindings.
+        return Environment(self)
+
     def get(self, name: str) -> object.Object | None:
         obj = self.store.get(name)
         if obj is None and self.outer is not None:
@@ -15,3 +31,34 @@ class Environment:
     def set(self, name: str, val: object.Object) -> object.Object:
         self.store[name] = val
         return val
+
+
+class FrameLayout:
+    def __init__(self, slots: dict[str, int], param_slots: tuple[int, ...]) -> None:
+        self.slots = slots
+        self.param_slots = param_slots
+        self.size = len(slots)
+
+
+class Frame(Environment):
+    # Function scope whose bindings live in a fixed-size list, indexed by the
+    # slots the resolver assigned. Unset slots hold None.
+    __slots__ = ('layout', 'slots', 'globals')
+
+    def __init__(self, layout: FrameLayout, outer: Environment) -> None:
+        self.layout = layout
+        self.slots: list[object.Object | None] = [None] * layout.size
+        self.outer = outer
+        self.globals = outer.globals
+
+    def get(self, name: str) -> object.Object | None:
+        idx = self.layout.slots.get(name)
+        if idx is not None:
+            obj = self.slots[idx]
+            if obj is not None:
+                return obj
+        return self.outer.get(name)
+
+    def set(self, name: str, val: object.Object) -> object.Object:
+        self.slots[self.layout.slots[name]] = val
+        return val
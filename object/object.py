@@ -1,4 +1,4 @@
-from typing import NewType
+from typing import Callable, NewType
 from abc import ABC, abstractmethod
 from my_ast import ast
 
@@ -8,11 +8,15 @@ INTEGER_OBJ = ObjectType('INTEGER')
 BOOLEAN_OBJ = ObjectType('BOOLEAN')
 NULL_OBJ = ObjectType('NULL')
 RETURN_VALUE_OBJ = ObjectType('RETURN_VALUE')
+TAIL_CALL_OBJ = ObjectType('TAIL_CALL')
 ERROR_OBJ = ObjectType('ERROR')
 FUNCTION_OBJ = ObjectType('FUNCTION')
+COMPILED_FUNCTION_OBJ = ObjectType('COMPILED_FUNCTION')
 
 
 class Object(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def type(self) -> ObjectType:
         pass
@@ -23,6 +27,8 @@ class Object(ABC):
 
 
 class Integer(Object):
+    __slots__ = ('value',)
+
     def __init__(self, value: int) -> None:
         self.value = value
 
@@ -33,7 +39,33 @@ class Integer(Object):
         return str(self.value)
 
 
+# Shared Integer objects for small values, like the TRUE/FALSE/NULL
+# singletons in the evaluator. Integers are never mutated, so sharing is safe.
+SMALL_INTEGER_MIN = -128
+SMALL_INTEGER_MAX = 1024
+small_integers: dict[int, Integer] = {}
+
+
+def set_small_integer_range(minimum: int, maximum: int) -> None:
+    # Updated in place so modules holding a reference see the new range.
+    small_integers.clear()
+    small_integers.update((value, Integer(value))
+                          for value in range(minimum, maximum + 1))
+
+
+def new_integer(value: int) -> Integer:
+    obj = small_integers.get(value)
+    if obj is None:
+        return Integer(value)
+    return obj
+
+
+set_small_integer_range(SMALL_INTEGER_MIN, SMALL_INTEGER_MAX)
+
+
 class Boolean(Object):
+    __slots__ = ('value',)
+
     def __init__(self, value: bool) -> None:
         self.value = value
 
@@ -45,6 +77,8 @@ class Boolean(Object):
 
 
 class Null(Object):
+    __slots__ = ()
+
     def __init__(self) -> None:
         pass
 
@@ -56,6 +90,8 @@ class Null(Object):
 
 
 class ReturnValue(Object):
+    __slots__ = ('value',)
+
     def __init__(self, value: Object) -> None:
         self.value = value
 
@@ -66,13 +102,76 @@ class ReturnValue(Object):
         return self.value.inspect()
 
 
+class TailCall(Object):
+    # Pending call in tail position, run by the caller's trampoline.
+    def __init__(self, fn: Object, args: list[Object]) -> None:
+        self.fn = fn
+        self.args = args
+
+    def type(self) -> ObjectType:
+        return TAIL_CALL_OBJ
+
+    def inspect(self) -> str:
+        return f"tail call of {self.fn.inspect()}"
+
+
 class Function(Object):
     from object import environment
 
-    def __init__(self, parameters: list[ast.Identifier], env: environment.Environment, body: ast.BlockStatement) -> None:
+    def __init__(self, parameters: list[ast.Identifier], env: environment.Environment, body: ast.BlockStatement, compiled: 'Callable[[environment.Environment], Object] | None' = None, layout: 'environment.FrameLayout | None' = None) -> None:
         self.parameters = parameters
         self.env = env
         self.body = body
+        # Slot layout of the call frame when the body has been resolved.
+        self.layout = layout
+        # Body translated by compiler.closure_compiler, filled in lazily.
+        self.compiled = compiled
+
+    def type(self) -> ObjectType:
+        return FUNCTION_OBJ
+
+    def inspect(self) -> str:
+        params = ', '.join(map(str, self.parameters))
+        return f"fn({params}) {{\n{str(self.body)}\n}}"
+
+    def __getstate__(self) -> dict:
+        # The compiled body is Python code and is not saved; it is compiled
+        # again on the next call.
+        state = self.__dict__.copy()
+        state['compiled'] = None
+        return state
+
+
+class CompiledFunction(Object):
+    def __init__(self, instructions: list[int], constants: list[Object], names: list[str], parameters: list[ast.Identifier], body: ast.BlockStatement) -> None:
+        self.instructions = instructions
+        self.constants = constants
+        self.names = names
+        self.parameters = parameters
+        self.parameter_names = tuple(param.value for param in parameters)
+        self.body = body
+
+    def type(self) -> ObjectType:
+        return COMPILED_FUNCTION_OBJ
+
+    def inspect(self) -> str:
+        return f"CompiledFunction[{id(self):#x}]"
+
+
+class Closure(Object):
+    from object import environment
+
+    def __init__(self, fn: CompiledFunction, env: environment.Environment) -> None:
+        self.fn = fn
+        self.env = env
+
+    @property
+    def parameters(self) -> list[ast.Identifier]:
+        return self.fn.parameters
+
+    @property
+    def body(self) -> ast.BlockStatement:
+        return self.fn.body
 
     def type(self) -> ObjectType:
         return FUNCTION_OBJ
@@ -82,7 +181,25 @@ class Function(Object):
         return f"fn({params}) {{\n{str(self.body)}\n}}"
 
 
+class TranspiledFunction(Object):
+    # Function compiled to Python by compiler.transpiler. Only the text of
+    # its parameters and body is kept, for inspect().
+    def __init__(self, fn: Callable[..., Object], parameters: tuple[str, ...], body: str) -> None:
+        self.fn = fn
+        self.parameters = parameters
+        self.body = body
+
+    def type(self) -> ObjectType:
+        return FUNCTION_OBJ
+
+    def inspect(self) -> str:
+        params = ', '.join(self.parameters)
+        return f"fn({params}) {{\n{self.body}\n}}"
+
+
 class Error(Object):
+    __slots__ = ('message',)
+
     def __init__(self, message: str) -> None:
         self.message = message
 
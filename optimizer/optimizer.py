@@ -0,0 +1,205 @@
+from my_ast import ast
+from my_token import token
+from object import object
+
+# Folds are only applied where the evaluator's result is known statically,
+# so an optimized program produces the same values and errors as the
+# original. Anything that may fail at runtime (1 / 0, true + 1, ...) is
+# left for the evaluator.
+
+arithmetic_operators = {'+', '-', '*', '/'}
+comparison_operators = {'<', '>', '==', '!='}
+
+
+def optimize(node: ast.Node | None) -> ast.Node | None:
+    match node:
+        # Statements
+        case ast.Program():
+            node.statements = optimize_statements(node.statements)
+        case ast.BlockStatement():
+            node.statements = optimize_statements(node.statements)
+        case ast.ExpressionStatement():
+            node.expression = optimize(node.expression)
+        case ast.ReturnStatement():
+            node.return_value = optimize(node.return_value)
+        case ast.LetStatement():
+            node.value = optimize(node.value)
+
+        # Expressions
+        case ast.PrefixExpression():
+            node.right = optimize(node.right)
+            return fold_prefix_expression(node)
+        case ast.InfixExpression():
+            node.left = optimize(node.left)
+            node.right = optimize(node.right)
+            return fold_infix_expression(node)
+        case ast.IfExpression():
+            node.condition = optimize(node.condition)
+            node.consequence = optimize(node.consequence)
+            node.alternative = optimize(node.alternative)
+            return fold_if_expression(node)
+        case ast.FunctionLiteral():
+            node.body = optimize(node.body)
+        case ast.CallExpression():
+            node.function = optimize(node.function)
+            node.arguments = [optimize(arg) for arg in node.arguments]
+    return node
+
+
+def optimize_statements(stmts: list[ast.Statement]) -> list[ast.Statement]:
+    result: list[ast.Statement] = []
+    for i, stmt in enumerate(stmts):
+        stmt = optimize(stmt)
+        last = i == len(stmts) - 1
+        if isinstance(stmt, ast.ExpressionStatement) and isinstance(stmt.expression, ast.IfExpression) \
+                and is_constant(stmt.expression.condition):
+            # Blocks do not open scopes, so a statically chosen branch can be
+            # spliced into the enclosing statement list.
+            ie = stmt.expression
+            branch = ie.consequence if is_truthy(ie.condition) else ie.alternative
+            if branch is not None and len(branch.statements) > 0:
+                result.extend(branch.statements)
+                continue
+            if not last:
+                # Evaluates to null and its value is discarded.
+                continue
+        result.append(stmt)
+    return result
+
+
+def fold_prefix_expression(node: ast.PrefixExpression) -> ast.Expression:
+    right = node.right
+    match node.operator:
+        case '-':
+            if isinstance(right, ast.IntegerLiteral):
+                return integer_literal(-right.value)
+            if isinstance(right, ast.PrefixExpression) and right.operator == '-' \
+                    and is_integer_expression(right.right):
+                # -(-x) is x whenever x yields an integer or an error.
+                return right.right
+        case '!':
+            if is_constant(right):
+                return boolean(not is_truthy(right))
+            if isinstance(right, ast.PrefixExpression) and right.operator == '!' \
+                    and is_boolean_expression(right.right):
+                return right.right
+    return node
+
+
+def fold_infix_expression(node: ast.InfixExpression) -> ast.Expression:
+    left, op, right = node.left, node.operator, node.right
+    if isinstance(left, ast.IntegerLiteral) and isinstance(right, ast.IntegerLiteral):
+        return fold_integer_infix_expression(node, left.value, right.value)
+    if isinstance(left, (ast.IntegerLiteral, ast.Boolean)) and isinstance(right, (ast.IntegerLiteral, ast.Boolean)):
+        # Mixed or boolean operands: only equality is defined, everything else
+        # is a runtime error.
+        same = type(left) is type(right) and left.value == right.value
+        if op == '==':
+            return boolean(same)
+        if op == '!=':
+            return boolean(not same)
+        return node
+    return simplify_identity(node)
+
+
+def fold_integer_infix_expression(node: ast.InfixExpression, left: int, right: int) -> ast.Expression:
+    match node.operator:
+        case '+':
+            return integer_literal(left + right)
+        case '-':
+            return integer_literal(left - right)
+        case '*':
+            return integer_literal(left * right)
+        case '/':
+            if right == 0:
+                return node
+            return integer_literal(left // right)
+        case '<':
+            return boolean(left < right)
+        case '>':
+            return boolean(left > right)
+        case '==':
+            return boolean(left == right)
+        case '!=':
+            return boolean(left != right)
+        case _:
+            return node
+
+
+def simplify_identity(node: ast.InfixExpression) -> ast.Expression:
+    # x + 0, x - 0, x * 1 and x / 1 are x only when x is known to yield an
+    # integer (or an error, which the simplified form still reports).
+    left, op, right = node.left, node.operator, node.right
+    if is_integer_literal(right, 0) and op in ('+', '-') and is_integer_expression(left):
+        return left
+    if is_integer_literal(right, 1) and op in ('*', '/') and is_integer_expression(left):
+        return left
+    if is_integer_literal(left, 0) and op == '+' and is_integer_expression(right):
+        return right
+    if is_integer_literal(left, 1) and op == '*' and is_integer_expression(right):
+        return right
+    return node
+
+
+def fold_if_expression(node: ast.IfExpression) -> ast.Expression:
+    if not is_constant(node.condition):
+        return node
+    branch = node.consequence if is_truthy(node.condition) else node.alternative
+    if branch is not None and len(branch.statements) == 1 \
+            and isinstance(branch.statements[0], ast.ExpressionStatement) \
+            and branch.statements[0].expression is not None:
+        return branch.statements[0].expression
+    return node
+
+
+def is_constant(node: ast.Node | None) -> bool:
+    return isinstance(node, (ast.IntegerLiteral, ast.Boolean))
+
+
+def is_truthy(node: ast.IntegerLiteral | ast.Boolean) -> bool:
+    # Any integer is truthy, mirroring evaluator.is_truthy.
+    if isinstance(node, ast.Boolean):
+        return node.value
+    return True
+
+
+def is_integer_literal(node: ast.Node | None, value: int) -> bool:
+    return isinstance(node, ast.IntegerLiteral) and node.value == value
+
+
+def is_integer_expression(node: ast.Node | None) -> bool:
+    # Arithmetic and negation evaluate to an Integer or an Error, never to
+    # anything else.
+    match node:
+        case ast.IntegerLiteral():
+            return True
+        case ast.PrefixExpression():
+            return node.operator == '-'
+        case ast.InfixExpression():
+            return node.operator in arithmetic_operators
+        case _:
+            return False
+
+
+def is_boolean_expression(node: ast.Node | None) -> bool:
+    match node:
+        case ast.Boolean():
+            return True
+        case ast.PrefixExpression():
+            return node.operator == '!'
+        case ast.InfixExpression():
+            return node.operator in comparison_operators
+        case _:
+            return False
+
+
+def integer_literal(value: int) -> ast.IntegerLiteral:
+    lit = ast.IntegerLiteral(token.Token(token.INT, str(value)), value)
+    lit.obj = object.new_integer(value)
+    return lit
+
+
+def boolean(value: bool) -> ast.Boolean:
+    if value:
+        return ast.Boolean(token.Token(token.TRUE, "true"), True)
+    return ast.Boolean(token.Token(token.FALSE, "false"), False)
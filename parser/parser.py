@@ -1,8 +1,9 @@
 from my_ast import ast
-from lexer import lexer
+from lexer import lexer, scanner, buffer
+from object import object
 from my_token import token
 from my_token.token import TokenType
-from typing import Callable
+from typing import Callable, Iterator
 
 LOWEST = 1
 EQUALS = 2  # ==
@@ -29,7 +30,7 @@ infix_parse_fn = Callable[[ast.Expression], ast.Expression]
 
 
 class Parser:
-    def __init__(self, l: lexer.Lexer) -> None:
+    def __init__(self, l: lexer.Lexer | scanner.Scanner | buffer.TokenCursor) -> None:
         self.l = l
         self.errors: list[str] = []
 
@@ -72,14 +73,20 @@ class Parser:
     def parse_program(self) -> ast.Program:
         program = ast.Program()
 
+        for stmt in self.parse_statements():
+            program.statements.append(stmt)
+
+        return program
+
+    def parse_statements(self) -> Iterator[ast.Statement]:
+        # Yields top-level statements as they are parsed. Errors are still
+        # collected in self.errors; check it before trusting a statement.
         while self.cur_token.type != token.EOF:
             stmt = self.parse_statement()
             if stmt is not None:
-                program.statements.append(stmt)
+                yield stmt
             self.next_token()
 
-        return program
-
     def parse_statement(self) -> ast.Statement | None:
         match self.cur_token.type:
             case token.LET: return self.parse_let_statement()
@@ -132,6 +139,7 @@ class Parser:
             self.errors.append(msg)
             return None
         lit = ast.IntegerLiteral(self.cur_token, value)
+        lit.obj = object.new_integer(value)
         return lit
 
     def parse_call_expression(self, function: ast.Expression) -> ast.CallExpression:
@@ -0,0 +1,208 @@
+import gc
+import io
+import os
+import sys
+import time
+import signal
+import socket
+import traceback
+from types import FrameType
+from typing import TextIO
+from repl import repl
+from object import object, environment
+from evaluator import budget
+from optimizer import optimizer
+
+# Pre-forking script server. The parent imports the interpreter, runs the
+# prelude into a global environment and binds the socket once, then forks
+# workers that inherit all of it copy-on-write and accept connections
+# themselves. A connection sends one script and half-closes; the worker
+# writes back what main.py would print for it and closes. Scripts run in a
+# scope of their own on top of the prelude, so they see its definitions
+# but not each other's.
+#
+#   printf 'square(4)' | nc -U /tmp/monkey.sock
+
+DEFAULT_ADDRESS = "/tmp/monkey.sock"
+BACKLOG = 128
+# A client has READ_TIMEOUT seconds to send its whole script, and as long
+# again to read the output, so a slow or stalled one cannot hold on to a
+# worker.
+READ_TIMEOUT = 10.0
+MAX_SCRIPT_BYTES = 16 * 1024 * 1024
+
+# What a client gets instead of output when it breaks those limits.
+SCRIPT_TOO_LARGE = "error: script over {} bytes\n"
+SCRIPT_TIMED_OUT = "error: script not received within {} seconds\n"
+
+
+class PreforkServer:
+    def __init__(self, address: str = DEFAULT_ADDRESS, workers: int = 1, prelude: str | None = None, engine: str = 'eval', optimize: bool = False, limits: budget.Budget | None = None, max_requests: int | None = None, read_timeout: float = READ_TIMEOUT, max_script_bytes: int = MAX_SCRIPT_BYTES) -> None:
+        self.address = address
+        self.workers = workers
+        self.prelude = prelude
+        self.engine = engine
+        self.optimize = optimize
+        self.limits = limits
+        # Scripts a worker runs before it is replaced by a fresh fork, so
+        # memory a script leaves behind does not pile up.
+        self.max_requests = max_requests
+        self.read_timeout = read_timeout
+        self.max_script_bytes = max_script_bytes
+        self.env = environment.Environment()
+        self.sock: socket.socket | None = None
+        self.unix = False
+        self.pids: set[int] = set()
+        self.stopping = False
+
+    def start(self) -> None:
+        if self.prelude is not None:
+            self.run_prelude(self.prelude)
+        host, _, port = self.address.rpartition(":")
+        if host and port.isdigit():
+            self.sock = socket.create_server((host, int(port)), backlog=BACKLOG)
+        else:
+            self.unix = True
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            self.sock = socket.socket(socket.AF_UNIX)
+            self.sock.bind(self.address)
+            self.sock.listen(BACKLOG)
+        # Objects that survive to here are never collected, so the
+        # collector need not touch, and so copy, the pages they live on.
+        gc.collect()
+        gc.freeze()
+        for _ in range(self.workers):
+            self.fork_worker()
+
+    def run_prelude(self, source: str) -> None:
+        program, errors = repl.parse_program(source)
+        if len(errors) != 0:
+            raise ValueError(f"prelude has parser errors: {'; '.join(errors)}")
+        if self.optimize:
+            optimizer.optimize(program)
+        evaluated = repl.engines[self.engine](program, self.env)
+        if isinstance(evaluated, object.Error):
+            raise ValueError(f"prelude failed: {evaluated.message}")
+
+    def fork_worker(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                self.work()
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self.pids.add(pid)
+
+    def serve_forever(self) -> None:
+        # The parent only replaces workers that exit, until SIGINT or
+        # SIGTERM, which it passes on to them.
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        self.start()
+        try:
+            while self.pids:
+                pid, _ = os.wait()
+                self.pids.discard(pid)
+                if not self.stopping:
+                    self.fork_worker()
+        finally:
+            self.close()
+
+    def stop(self, signum: int = signal.SIGTERM, frame: FrameType | None = None) -> None:
+        self.stopping = True
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def close(self) -> None:
+        self.sock.close()
+        if self.unix and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def work(self) -> None:
+        served = 0
+        while self.max_requests is None or served < self.max_requests:
+            conn, _ = self.sock.accept()
+            with conn:
+                try:
+                    self.handle(conn)
+                except OSError:
+                    # The client went away.
+                    pass
+            served += 1
+
+    def handle(self, conn: socket.socket) -> None:
+        try:
+            source = self.receive(conn)
+        except TimeoutError:
+            conn.sendall(SCRIPT_TIMED_OUT.format(self.read_timeout).encode())
+            return
+        if source is None:
+            conn.sendall(SCRIPT_TOO_LARGE.format(self.max_script_bytes).encode())
+            return
+        out = io.StringIO()
+        try:
+            repl.print_program(out, source.decode(), 'e', self.env.fork(),
+                               self.engine, self.optimize, limits=self.limits)
+        except Exception as e:
+            # Where main.py would have crashed with a traceback.
+            out.write(f"{type(e).__name__}: {e}\n")
+        conn.settimeout(self.read_timeout)
+        conn.sendall(out.getvalue().encode())
+
+    def receive(self, conn: socket.socket) -> bytes | None:
+        # The script, or None if it is over max_script_bytes. The timeout
+        # is for the whole script, so it cannot be trickled in either.
+        deadline = time.monotonic() + self.read_timeout
+        chunks = []
+        size = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError
+            conn.settimeout(remaining)
+            chunk = conn.recv(65536)
+            if not chunk:
+                return b"".join(chunks)
+            size += len(chunk)
+            if size > self.max_script_bytes:
+                return None
+            chunks.append(chunk)
+
+
+def run(address: str, source: str) -> str:
+    # Sends source to a server and returns what it printed.
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        conn = socket.create_connection((host, int(port)))
+    else:
+        conn = socket.socket(socket.AF_UNIX)
+        conn.connect(address)
+    with conn:
+        conn.sendall(source.encode())
+        conn.shutdown(socket.SHUT_WR)
+        chunks = []
+        while chunk := conn.recv(65536):
+            chunks.append(chunk)
+    return b"".join(chunks).decode()
+
+
+def serve(address: str, workers: int, prelude_file: TextIO | None = None, engine: str = 'eval', optimize: bool = False, limits: budget.Budget | None = None, max_requests: int | None = None) -> None:
+    prelude = None if prelude_file is None else prelude_file.read()
+    server = PreforkServer(address, workers, prelude, engine, optimize, limits, max_requests)
+    sys.stderr.write(f"serving on {address} with {workers} pre-forked workers\n")
+    sys.stderr.flush()
+    try:
+        server.serve_forever()
+    except ValueError as e:
+        # The prelude could not be run.
+        sys.exit(str(e))
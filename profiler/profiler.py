@@ -0,0 +1,116 @@
+import time
+from collections import Counter
+from typing import Callable, TextIO
+from my_ast import ast
+from object import object
+from evaluator import evaluator
+
+
+class FunctionStats:
+    __slots__ = ('calls', 'self_time', 'cumulative_time')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.self_time = 0.0
+        # Time of the outermost active call only, so recursion is not
+        # counted twice.
+        self.cumulative_time = 0.0
+
+
+class FunctionNames:
+    # Functions are named after the let that binds them, qualified by the
+    # functions they are nested in. Tokens carry no source positions, so an
+    # anonymous function is named by its parameter list instead.
+    def __init__(self) -> None:
+        self.names: dict[ast.BlockStatement, str] = {}
+
+    def name_of(self, fn: object.Function) -> str:
+        name = self.names.get(fn.body)
+        if name is None:
+            name = self.names[fn.body] = anonymous_name(fn.parameters)
+        return name
+
+    def name_functions(self, node: ast.Node | None, prefix: str = "") -> None:
+        match node:
+            case ast.LetStatement() if isinstance(node.value, ast.FunctionLiteral):
+                self.name_function(node.value, prefix + node.name.value)
+            case ast.FunctionLiteral():
+                self.name_function(node, prefix + anonymous_name(node.parameters))
+            case ast.Node():
+                for child in vars(node).values():
+                    if isinstance(child, list):
+                        for item in child:
+                            self.name_functions(item, prefix)
+                    elif isinstance(child, ast.Node):
+                        self.name_functions(child, prefix)
+
+    def name_function(self, fn: ast.FunctionLiteral, name: str) -> None:
+        self.names.setdefault(fn.body, name)
+        self.name_functions(fn.body, name + ".")
+
+
+class Profiler(evaluator.CallHook):
+    # Profiles the tree-walking evaluator by registering as a call and node
+    # hook while enabled. A tail call runs once the call that made it has
+    # finished, so it is charged to that call's caller.
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.clock = clock
+        self.functions: dict[str, FunctionStats] = {}
+        self.nodes: Counter[str] = Counter()
+        self.names = FunctionNames()
+        # [name, time spent in calls made from it, start] per active call.
+        self.stack: list[list] = []
+        self.active: Counter[str] = Counter()
+        self.total_time = 0.0
+        self.start = 0.0
+
+    def enable(self) -> None:
+        evaluator.add_call_hook(self)
+        self.start = self.clock()
+
+    def disable(self) -> None:
+        self.total_time += self.clock() - self.start
+        evaluator.remove_call_hook(self)
+
+    def node(self, node: ast.Node | None) -> None:
+        t = type(node)
+        self.nodes[t.__name__] += 1
+        if t is ast.Program or (t is ast.LetStatement and not self.stack):
+            self.names.name_functions(node)
+
+    def enter(self, fn: object.Function, args: list[object.Object]) -> object.Object | None:
+        name = self.names.name_of(fn)
+        self.active[name] += 1
+        self.stack.append([name, 0.0, self.clock()])
+        return None
+
+    def leave(self, fn: object.Function, result: object.Object | None) -> None:
+        name, callee_time, start = self.stack.pop()
+        elapsed = self.clock() - start
+        self.active[name] -= 1
+        stats = self.functions.get(name)
+        if stats is None:
+            stats = self.functions[name] = FunctionStats()
+        stats.calls += 1
+        stats.self_time += elapsed - callee_time
+        if self.active[name] == 0:
+            stats.cumulative_time += elapsed
+        if self.stack:
+            self.stack[-1][1] += elapsed
+
+    def report(self, out: TextIO, limit: int | None = None) -> None:
+        calls = sum(stats.calls for stats in self.functions.values())
+        out.write(f"{calls} function calls in {self.total_time:.3f} seconds\n\n")
+        out.write(f"{'calls':>10}{'self (s)':>12}{'cumul (s)':>12}  function\n")
+        ordered = sorted(self.functions.items(),
+                         key=lambda item: item[1].self_time, reverse=True)
+        for name, stats in ordered[:limit]:
+            out.write(f"{stats.calls:>10}{stats.self_time:>12.3f}{stats.cumulative_time:>12.3f}  {name}\n")
+        out.write(f"\n{'evaluated':>10}  node\n")
+        for node, count in self.nodes.most_common(limit):
+            out.write(f"{count:>10}  {node}\n")
+
+
+def anonymous_name(parameters: list[ast.Identifier]) -> str:
+    params = ', '.join(param.value for param in parameters)
+    return f"<fn({params})>"
@@ -0,0 +1,86 @@
+import threading
+from collections import Counter
+from typing import Callable, TextIO
+from my_ast import ast
+from object import object
+from evaluator import evaluator, resolver
+from profiler import profiler
+
+DEFAULT_RATE = 1000
+ROOT = "<program>"
+
+
+class Sampler(evaluator.CallHook):
+    # Statistical profiler for the tree-walking evaluator. While enabled,
+    # it is registered as a call hook that keeps a shadow stack of the
+    # bodies of the Monkey functions being run, where a tail call replaces
+    # its caller's entry, and a background thread records a copy of it
+    # every interval. Bodies rather than functions, so samples do not keep
+    # closures and the environments they captured alive. Nothing is timed
+    # on the evaluating thread, but the call hook still costs each call:
+    # bench/sampling.py measures up to about 10% on call-heavy programs.
+    #
+    # Threads only switch every sys.getswitchinterval() seconds (5 ms by
+    # default), which caps the rate samples are actually taken at.
+    def __init__(self, rate: float = DEFAULT_RATE) -> None:
+        self.interval = 1 / rate
+        self.stack: list[ast.BlockStatement] = []
+        self.samples: Counter[tuple[ast.BlockStatement, ...]] = Counter()
+        self.names = profiler.FunctionNames()
+        self.stopped = threading.Event()
+        self.thread: threading.Thread | None = None
+        self.original: Callable | None = None
+
+    def enable(self) -> None:
+        self.original = resolver.resolve
+        resolver.resolve = self.resolve
+        evaluator.add_call_hook(self)
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def disable(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+        evaluator.remove_call_hook(self)
+        resolver.resolve = self.original
+        self.original = None
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        # Copying a list is a single step for the interpreter, so the stack
+        # cannot change halfway through.
+        self.samples[tuple(self.stack)] += 1
+
+    def resolve(self, node: ast.Node | None, scopes: list[dict[str, int]] | None = None) -> None:
+        # Every program is resolved before it runs, which is when the
+        # functions it defines get their names.
+        if type(node) is ast.Program:
+            self.names.name_functions(node)
+        self.original(node, scopes)
+
+    def enter(self, fn: object.Function, args: list[object.Object]) -> object.Object | None:
+        if fn.body not in self.names.names:
+            # Defined by a program resolved before sampling started.
+            self.names.name_of(fn)
+        self.stack.append(fn.body)
+        return None
+
+    def leave(self, fn: object.Function, result: object.Object | None) -> None:
+        self.stack.pop()
+
+    def folded(self) -> list[str]:
+        # One line per distinct stack, outermost call first, in the format
+        # flame graph tools read: "<program>;f;g 12".
+        counts: Counter[str] = Counter()
+        for stack, count in self.samples.items():
+            counts[";".join([ROOT, *(self.names.names[body] for body in stack)])] += count
+        return [f"{stack} {count}" for stack, count in sorted(counts.items())]
+
+    def write_folded(self, out: TextIO) -> None:
+        for line in self.folded():
+            out.write(line + "\n")
@@ -1,10 +1,14 @@
-from typing import TextIO
-from lexer import lexer
+from typing import Callable, TextIO
+from lexer import scanner, source_file
 from parser import parser
 from my_token import token
 from my_ast import ast
-from evaluator import evaluator
+from evaluator import evaluator, machine, resolver, budget
 from object import object, environment
+from compiler import compiler, closure_compiler, transpiler
+from vm import vm
+from optimizer import optimizer
+from cache import cache, snapshot
 from colorama import Fore
 
 MONKEY_FACE = r'''            __,__
@@ -23,52 +27,149 @@ MONKEY_FACE = r'''            __,__
 
 prompt = ">>"
 
+engine_fn = Callable[[ast.Program, environment.Environment], object.Object]
 
-def start(inp: TextIO, out: TextIO, mode: str) -> None:
-    env = environment.Environment()
+
+def run_vm(program: ast.Program, env: environment.Environment) -> object.Object:
+    return vm.run(compiler.compile_program(program), env)
+
+
+engines: dict[str, engine_fn] = {
+    'eval': evaluator.eval,
+    'vm': run_vm,
+    'closure': closure_compiler.run,
+    'stack': machine.eval,
+    'transpile': transpiler.run,
+}
+
+
+def start(inp: TextIO, out: TextIO, mode: str, engine: str = 'eval', optimize: bool = False, limits: budget.Budget | None = None, env: environment.Environment | None = None) -> environment.Environment:
+    # Returns the environment the session ended with. ":save FILE" and
+    # ":load FILE" write it to and replace it by a snapshot.
+    if env is None:
+        env = environment.Environment()
     while True:
         out.write(prompt)
         out.flush()
         line = inp.readline().strip()
         if not line:
             break
-        print_program(out, line, mode, env)
+        command, _, path = line.partition(" ")
+        if command in (":save", ":load"):
+            env = run_snapshot_command(out, command, path.strip(), env, engine)
+            continue
+        print_program(out, line, mode, env, engine, optimize, limits=limits)
+    return env
+
 
+def run_snapshot_command(out: TextIO, command: str, path: str, env: environment.Environment, engine: str) -> environment.Environment:
+    if not path:
+        out.write(f"usage: {command} FILE\n")
+        return env
+    try:
+        if command == ":save":
+            snapshot.save(env, path, engine)
+            out.write(f"saved to {path}\n")
+        else:
+            env = snapshot.load(path, engine)
+            out.write(f"loaded {path}\n")
+    except (OSError, snapshot.SnapshotError) as e:
+        out.write(f"snapshot error: {e}\n")
+    return env
 
-def interpret_file(file: TextIO, out: TextIO, mode: str) -> None:
-    source = file.read()
-    env = environment.Environment()
-    print_program(out, source, mode, env)
 
+def interpret_file(file: TextIO, out: TextIO, mode: str, engine: str = 'eval', optimize: bool = False, stream: bool = False, cache_dir: str | None = None, limits: budget.Budget | None = None, env: environment.Environment | None = None) -> environment.Environment:
+    if env is None:
+        env = environment.Environment()
+    with source_file.open_source(file) as source:
+        if stream and mode == 'e':
+            print_streamed_program(out, source, env, optimize, limits)
+        else:
+            print_program(out, source, mode, env, engine, optimize, cache_dir, limits)
+    return env
 
-def print_program(out: TextIO, source: str, mode: str, env: environment.Environment) -> None:
+
+def print_program(out: TextIO, source: str | memoryview, mode: str, env: environment.Environment, engine: str = 'eval', optimize: bool = False, cache_dir: str | None = None, limits: budget.Budget | None = None) -> None:
     if mode == 'l':
         print_lexer_tokens(out, source)
     elif mode == 'p':
-        print_parsed_program(out, source)
+        print_parsed_program(out, source, optimize, cache_dir)
     elif mode == 'e':
-        print_evaluated_program(out, source, env)
+        print_evaluated_program(out, source, env, engine, optimize, cache_dir, limits)
 
 
-def print_lexer_tokens(out: TextIO, source: str) -> None:
-    l = lexer.Lexer(source)
+def print_lexer_tokens(out: TextIO, source: str | memoryview) -> None:
+    l = scanner.Scanner(source)
     tok = l.next_token()
     while tok.type != token.EOF:
         out.write(f"{tok}\n")
         tok = l.next_token()
 
 
-def print_parsed_program(out: TextIO, source: str) -> None:
-    l = lexer.Lexer(source)
-    p = parser.Parser(l)
+def parse_program(source: str | memoryview, cache_dir: str | None = None) -> tuple[ast.Program, list[str]]:
+    if cache_dir is not None:
+        return cache.parse(source, cache_dir)
+    p = parser.Parser(scanner.Scanner(source))
     program = p.parse_program()
-    if len(p.errors) != 0:
-        print_parser_errors(out, p.errors)
+    return program, p.errors
+
+
+def print_parsed_program(out: TextIO, source: str | memoryview, optimize: bool = False, cache_dir: str | None = None) -> None:
+    program, errors = parse_program(source, cache_dir)
+    if len(errors) != 0:
+        print_parser_errors(out, errors)
         return
+    if optimize:
+        optimizer.optimize(program)
     # out.write(str(program))
     print_parse_tree(out, program)
 
 
+def print_streamed_program(out: TextIO, source: str | memoryview, env: environment.Environment, optimize: bool = False, limits: budget.Budget | None = None) -> None:
+    # Evaluates each top-level statement with the tree-walking evaluator as
+    # soon as it is parsed, so only the statement being run (and functions
+    # it created) stays in memory. Parsing always runs to the end, and a
+    # parse error anywhere still replaces the result, as in
+    # print_evaluated_program.
+    p = parser.Parser(scanner.Scanner(source))
+    evaluated: object.Object = evaluator.NULL
+    done = False
+    # The budget covers the whole file, as it does when it is not streamed.
+    if limits is not None:
+        limits.enable()
+    try:
+        for stmt in p.parse_statements():
+            if done or len(p.errors) != 0:
+                continue
+            program = ast.Program([stmt])
+            if optimize:
+                optimizer.optimize(program)
+            resolver.resolve(program)
+            for stmt in program.statements:
+                if evaluator.statement_hooks:
+                    stopped = evaluator.enter_statement(stmt)
+                    if stopped is not None:
+                        evaluated = stopped
+                        done = True
+                        break
+                evaluated = evaluator.eval(stmt, env)
+                if isinstance(evaluated, object.ReturnValue):
+                    evaluated = evaluated.value
+                    done = True
+                    break
+                if isinstance(evaluated, object.Error):
+                    done = True
+                    break
+    finally:
+        if limits is not None:
+            limits.disable()
+    if len(p.errors) != 0:
+        print_parser_errors(out, p.errors)
+        return
+    if not isinstance(evaluated, object.Null):
+        out.write(evaluated.inspect() + '\n')
+
+
 def print_parser_errors(out: TextIO, errors: list[str]) -> None:
     out.write(MONKEY_FACE)
     out.write("Woops! We ran into some monkey business here!\n")
@@ -135,13 +236,50 @@ def print_parse_tree(out: TextIO, node: ast.Node, indent_width: int = 4, line_sp
     _print_parse_tree(node)
 
 
-def print_evaluated_program(out: TextIO, source: str, env: environment.Environment) -> None:
-    l = lexer.Lexer(source)
-    p = parser.Parser(l)
-    program = p.parse_program()
-    if len(p.errors) != 0:
-        print_parser_errors(out, p.errors)
+def print_evaluated_program(out: TextIO, source: str | memoryview, env: environment.Environment, engine: str = 'eval', optimize: bool = False, cache_dir: str | None = None, limits: budget.Budget | None = None) -> None:
+    if engine == 'transpile' and cache_dir is not None:
+        print_transpiled_program(out, source, env, optimize, cache_dir)
+        return
+    program, errors = parse_program(source, cache_dir)
+    if len(errors) != 0:
+        print_parser_errors(out, errors)
         return
-    evaluated = evaluator.eval(program, env)
+    if optimize:
+        optimizer.optimize(program)
+    if limits is not None and engine == 'stack':
+        # The explicit-stack evaluator bounds its call depth itself and
+        # takes no other limit.
+        max_depth = machine.DEFAULT_MAX_DEPTH if limits.max_depth is None else limits.max_depth
+        evaluated = machine.eval(program, env, max_depth)
+    elif limits is not None:
+        # Budgets apply to the tree-walking evaluator only.
+        evaluated = limits.run(program, env)
+    else:
+        evaluated = engines[engine](program, env)
+    if not isinstance(evaluated, object.Null):
+        out.write(evaluated.inspect() + '\n')
+
+
+def print_transpiled_program(out: TextIO, source: str | memoryview, env: environment.Environment, optimize: bool, cache_dir: str) -> None:
+    # The generated Python code is cached too, so a warm run neither parses
+    # nor transpiles the source.
+    key = transpiler.code_key(source, optimize)
+    code = transpiler.load_code(cache_dir, key)
+    if code is not None:
+        evaluated = transpiler.run_code(code, env)
+    else:
+        program, errors = parse_program(source, cache_dir)
+        if len(errors) != 0:
+            print_parser_errors(out, errors)
+            return
+        if optimize:
+            optimizer.optimize(program)
+        try:
+            code = transpiler.compile_program(program)
+        except transpiler.compile_errors:
+            evaluated = evaluator.eval(program, env)
+        else:
+            transpiler.store_code(cache_dir, key, code)
+            evaluated = transpiler.run_code(code, env)
     if not isinstance(evaluated, object.Null):
         out.write(evaluated.inspect() + '\n')
@@ -0,0 +1,121 @@
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import Any
+from server import server
+
+# Client for the evaluation server, and a load generator built on it:
+#
+#   python -m server.client 127.0.0.1:7777 --requests 2000 --concurrency 8
+#
+# Each connection sends one request at a time, so --concurrency is the
+# number of requests in flight.
+
+DEFAULT_SOURCE = "let fib = fn(n) { if (n < 2) { n } else { fib(n - 1) + fib(n - 2) } }; fib(10)"
+
+
+class Client:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+
+    @classmethod
+    async def connect(cls, address: str) -> 'Client':
+        host, _, port = address.rpartition(":")
+        if host and port.isdigit():
+            reader, writer = await asyncio.open_connection(host, int(port), limit=server.LINE_LIMIT)
+        else:
+            reader, writer = await asyncio.open_unix_connection(address, limit=server.LINE_LIMIT)
+        return cls(reader, writer)
+
+    async def request(self, request: dict[str, Any]) -> dict[str, Any]:
+        self.next_id += 1
+        self.writer.write(json.dumps({**request, "id": self.next_id}).encode() + b"\n")
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return json.loads(line)
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def load(address: str, requests: int, concurrency: int, request: dict[str, Any]) -> tuple[list[float], int, float]:
+    # Sends requests copies of request over concurrency connections and
+    # returns the latency of each, how many failed and the total time.
+    latencies: list[float] = []
+    failures = 0
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal failures, remaining
+        client = await Client.connect(address)
+        try:
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                response = await client.request(request)
+                latencies.append(time.perf_counter() - start)
+                if not response["ok"]:
+                    failures += 1
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, failures, time.perf_counter() - start
+
+
+async def run(args: argparse.Namespace) -> None:
+    source = DEFAULT_SOURCE
+    if args.file is not None:
+        with open(args.file) as f:
+            source = f.read()
+    request: dict[str, Any] = {"op": "eval", "source": source}
+    if args.timeout is not None:
+        request["timeout"] = args.timeout
+    if args.call is not None:
+        client = await Client.connect(args.address)
+        try:
+            compiled = await client.request({"op": "compile", "source": source})
+        finally:
+            await client.close()
+        if not compiled["ok"]:
+            sys.exit(compiled["error"])
+        request = {**request, "op": "call", "program": compiled["program"],
+                   "fn": args.call, "args": args.args}
+
+    latencies, failures, seconds = await load(args.address, args.requests, args.concurrency, request)
+    latency = ", ".join(f"{name} {ms:.2f}" for name, ms in server.latency_report(latencies).items())
+    print(f"{len(latencies)} requests in {seconds:.2f} s ({len(latencies) / seconds:.0f} requests/s), {failures} failed")
+    print(f"client latency (ms): {latency}")
+
+    client = await Client.connect(args.address)
+    try:
+        stats = await client.request({"op": "stats"})
+    finally:
+        await client.close()
+    latency = ", ".join(f"{name} {ms:.2f}" for name, ms in stats["latency_ms"].items())
+    print(f"server latency (ms): {latency}")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Load generator for the Monkey evaluation server")
+    arg_parser.add_argument("address", nargs="?", default=server.DEFAULT_ADDRESS,
+                            help=f"host:port or Unix socket path of the server (default: {server.DEFAULT_ADDRESS})")
+    arg_parser.add_argument("--requests", type=int, default=1000)
+    arg_parser.add_argument("--concurrency", type=int, default=8)
+    arg_parser.add_argument("--file", help="Source to evaluate (default: a small fib program)")
+    arg_parser.add_argument("--call", metavar="FN", help="Compile the source once and call FN instead of evaluating it")
+    arg_parser.add_argument("--args", type=int, nargs="*", default=[], help="Integer arguments for --call")
+    arg_parser.add_argument("--timeout", type=float, help="Deadline of each request in seconds")
+    asyncio.run(run(arg_parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import sys
+import json
+import signal
+import math
+import time
+import asyncio
+import hashlib
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import Connection
+from typing import Any, Iterable, TextIO
+from object import object
+from evaluator import budget
+from monkey import monkey
+
+# Evaluation server speaking newline-delimited JSON: every line a client
+# sends is one request object, answered by one response line carrying the
+# request's "id", in the order requests finish. Requests:
+#
+#   {"op": "eval", "source": "..."}
+#   {"op": "compile", "source": "..."}        -> {"program": id}
+#   {"op": "call", "program": id, "fn": "f", "args": [1, true]}
+#   {"op": "stats"}                           -> counts and latencies
+#
+# eval and call take an optional "timeout" in seconds. Successful replies
+# have "ok": true, the value as JSON when it is an integer, boolean or
+# null, and "result", the value as main.py prints it; failed ones have
+# "ok": false and "error".
+
+DEFAULT_ADDRESS = "127.0.0.1:7777"
+DEFAULT_TIMEOUT = 10.0
+# Evaluations stop themselves at their deadline; a worker that has not
+# replied this long after it is killed and replaced.
+GRACE = 1.0
+LINE_LIMIT = 16 * 1024 * 1024
+# Latencies the percentiles are computed over, most recent first.
+LATENCY_WINDOW = 100_000
+
+# Sessions of the programs this worker process has run, by program id.
+sessions: dict[str, monkey.Session] = {}
+
+
+def program_id(source: str) -> str:
+    return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def latency_report(latencies: Iterable[float]) -> dict[str, float]:
+    ordered = sorted(latencies)
+    report = {f"p{p}": percentile(ordered, p) * 1000 for p in (50, 90, 99)}
+    report["max"] = ordered[-1] * 1000 if ordered else 0.0
+    return report
+
+
+def reply(value: Any) -> dict[str, Any]:
+    if isinstance(value, object.Object):
+        return {"ok": True, "value": None, "result": value.inspect()}
+    return {"ok": True, "value": value, "result": monkey.to_object(value).inspect()}
+
+
+def init_worker() -> None:
+    # Ctrl-C reaches the whole process group; the server shuts the workers
+    # down itself.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def work(conn: Connection) -> None:
+    # Main loop of a worker process: one (request, limits) job in, one
+    # response out, until the server closes its end.
+    init_worker()
+    while True:
+        try:
+            request, limits = conn.recv()
+        except EOFError:
+            return
+        conn.send(run_request(request, limits))
+
+
+class Worker:
+    # A worker process running one job at a time. Unlike a process pool,
+    # it can be killed while it runs a job, without losing the others.
+    def __init__(self) -> None:
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=work, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    async def run(self, request: dict[str, Any], limits: budget.Budget, timeout: float) -> dict[str, Any]:
+        # Raises TimeoutError if there is no response within timeout, and
+        # EOFError or OSError if the process died.
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        fd = self.conn.fileno()
+        loop.add_reader(fd, lambda: readable.done() or readable.set_result(None))
+        try:
+            self.conn.send((request, limits))
+            await asyncio.wait_for(readable, timeout)
+        finally:
+            loop.remove_reader(fd)
+        return self.conn.recv()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+def run_request(request: dict[str, Any], limits: budget.Budget) -> dict[str, Any]:
+    # Runs in a worker process. Each eval gets a fresh session; calls share
+    # the session their program was first run in.
+    try:
+        if request["op"] == "compile":
+            monkey.compile(request["source"])
+            return {"ok": True}
+        if request["op"] == "eval":
+            return reply(monkey.Session(limits=limits).run(request["source"]))
+        session = sessions.get(request["program"])
+        if session is None:
+            session = monkey.Session(limits=limits)
+            session.run(request["source"])
+            sessions[request["program"]] = session
+        session.limits = limits
+        return reply(session.call(request["fn"], *request["args"]))
+    except monkey.CompileError as e:
+        return {"ok": False, "error": f"parser errors: {e}"}
+    except monkey.EvaluationError as e:
+        return {"ok": False, "error": e.error.message}
+    except Exception as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+class Server:
+    def __init__(self, address: str = DEFAULT_ADDRESS, jobs: int = 1, limits: budget.Budget | None = None, timeout: float = DEFAULT_TIMEOUT) -> None:
+        self.address = address
+        self.jobs = jobs
+        # Limits every evaluation gets, besides its deadline.
+        self.limits = limits or budget.Budget()
+        self.timeout = timeout
+        # Sources of compiled programs, by id.
+        self.programs: dict[str, str] = {}
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.workers: list[Worker] = []
+        self.idle: asyncio.Queue[Worker] | None = None
+        self.server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> None:
+        self.idle = asyncio.Queue()
+        for _ in range(self.jobs):
+            self.add_worker()
+        host, _, port = self.address.rpartition(":")
+        if host and port.isdigit():
+            self.server = await asyncio.start_server(self.handle, host, int(port), limit=LINE_LIMIT)
+        else:
+            self.server = await asyncio.start_unix_server(self.handle, self.address, limit=LINE_LIMIT)
+
+    async def serve_until_stopped(self) -> None:
+        # Serves until SIGINT or SIGTERM.
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stopped.set)
+        await self.start()
+        try:
+            await stopped.wait()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+        for worker in self.workers:
+            worker.kill()
+        self.workers.clear()
+
+    def add_worker(self) -> None:
+        worker = Worker()
+        self.workers.append(worker)
+        self.idle.put_nowait(worker)
+
+    def replace_worker(self, worker: Worker) -> None:
+        worker.kill()
+        if worker in self.workers:
+            # Otherwise the server has closed.
+            self.workers.remove(worker)
+            self.add_worker()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Requests on one connection run concurrently, so a client can
+        # pipeline them.
+        pending: set[asyncio.Task] = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self.respond(line, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            await asyncio.gather(*pending)
+        except (ConnectionError, ValueError):
+            # ValueError: a line over LINE_LIMIT.
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        start = time.perf_counter()
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("not an object")
+        except ValueError as e:
+            response = {"ok": False, "error": f"invalid request: {e}"}
+        else:
+            response = await self.dispatch(request)
+            if "id" in request:
+                response["id"] = request["id"]
+        self.requests += 1
+        if not response["ok"]:
+            self.errors += 1
+        self.latencies.append(time.perf_counter() - start)
+        writer.write(json.dumps(response).encode() + b"\n")
+        await writer.drain()
+
+    async def dispatch(self, request: dict[str, Any]) -> dict[str, Any]:
+        op = request.get("op", "eval")
+        if op == "stats":
+            return {"ok": True, **self.stats()}
+        if op not in ("eval", "compile", "call"):
+            return {"ok": False, "error": f"unknown op: {op}"}
+        timeout = request.get("timeout", self.timeout)
+        if type(timeout) not in (int, float) or timeout <= 0:
+            return {"ok": False, "error": "timeout must be a positive number"}
+        if op == "call":
+            source = self.programs.get(request.get("program"))
+            if source is None:
+                return {"ok": False, "error": f"unknown program: {request.get('program')}"}
+            if not isinstance(request.get("fn"), str) or not isinstance(request.get("args", []), list):
+                return {"ok": False, "error": "call needs a fn name and a list of args"}
+            job = {"op": op, "program": request["program"], "source": source,
+                   "fn": request["fn"], "args": request.get("args", [])}
+        elif not isinstance(request.get("source"), str):
+            return {"ok": False, "error": f"{op} needs a source string"}
+        else:
+            job = {"op": op, "source": request["source"]}
+
+        limits = budget.Budget(self.limits.max_nodes, self.limits.max_depth,
+                               timeout, self.limits.max_allocations)
+        worker = await self.idle.get()
+        try:
+            response = await worker.run(job, limits, timeout + GRACE)
+        except TimeoutError:
+            # The evaluation is stuck in a single step its budget cannot
+            # interrupt, such as a multiplication of huge integers.
+            self.replace_worker(worker)
+            response = {"ok": False, "error": budget.DEADLINE_EXCEEDED.format(timeout)}
+        except (EOFError, OSError):
+            self.replace_worker(worker)
+            response = {"ok": False, "error": "worker died"}
+        except BaseException:
+            # Cancelled: its response would be taken for the next job's.
+            self.replace_worker(worker)
+            raise
+        else:
+            self.idle.put_nowait(worker)
+        if response.get("error") == budget.DEADLINE_EXCEEDED.format(timeout):
+            self.timeouts += 1
+        if op == "compile" and response["ok"]:
+            key = program_id(request["source"])
+            self.programs[key] = request["source"]
+            response["program"] = key
+        return response
+
+    def stats(self) -> dict[str, Any]:
+        return {"requests": self.requests, "errors": self.errors, "timeouts": self.timeouts,
+                "latency_ms": latency_report(self.latencies)}
+
+    def report(self, err: TextIO) -> None:
+        stats = self.stats()
+        latency = ", ".join(f"{name} {ms:.2f}" for name, ms in stats["latency_ms"].items())
+        err.write(f"{stats['requests']} requests, {stats['errors']} failed, {stats['timeouts']} timed out; latency (ms): {latency}\n")
+
+
+def serve(address: str, jobs: int, limits: budget.Budget | None = None, timeout: float = DEFAULT_TIMEOUT) -> None:
+    server = Server(address, jobs, limits, timeout)
+    sys.stderr.write(f"serving on {address} with {jobs} workers\n")
+    asyncio.run(server.serve_until_stopped())
+    server.report(sys.stderr)
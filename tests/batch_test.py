@@ -0,0 +1,85 @@
+import io
+import os
+from batch import batch
+from repl import repl
+import pytest
+
+SCRIPTS = {
+    "a.txt": "let x = 5; x * 2",
+    "b.txt": "let add = fn(a, b) { a + b }; add(1, 2); add(3, 4)",
+    "sub/c.txt": "if (1 < 2) { true } else { false }",
+    "sub/d.mk": "\"not a match\"",
+}
+
+
+def write_scripts(root: str) -> None:
+    for name, source in SCRIPTS.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(source)
+
+
+def run_alone(path: str) -> str:
+    out = io.StringIO()
+    with open(path) as f:
+        repl.interpret_file(f, out, 'e')
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('sources, pattern, expected', [
+    (["."], "*.txt", ["a.txt", "b.txt", "sub/c.txt"]),
+    (["."], "*", ["a.txt", "b.txt", "sub/c.txt", "sub/d.mk"]),
+    (["sub/*", "a.txt"], "*", ["sub/c.txt", "sub/d.mk", "a.txt"]),
+    (["**/*.mk", "missing.txt"], "*", ["sub/d.mk", "missing.txt"]),
+])
+def test_expand_paths(tmp_path, monkeypatch, sources: list[str], pattern: str, expected: list[str]) -> None:
+    write_scripts(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    paths = [os.path.normpath(path) for path in batch.expand_paths(sources, pattern)]
+    expected = [os.path.normpath(path) for path in expected]
+    assert paths == expected, f"wrong paths. got={paths}, want={expected}"
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_run_batch_ordered(tmp_path, jobs: int) -> None:
+    write_scripts(str(tmp_path))
+    paths = batch.expand_paths([str(tmp_path)], "*.txt")
+    out = io.StringIO()
+    summary = batch.run_batch(paths, out, batch.Options(), jobs)
+    expected = "".join(run_alone(path) for path in paths)
+    assert out.getvalue() == expected, f"wrong output. got={out.getvalue()!r}, want={expected!r}"
+    assert summary.files == len(paths), f"wrong file count. got={summary.files}, want={len(paths)}"
+    assert not summary.failures, f"unexpected failures. got={[r.error for r in summary.failures]}"
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_run_batch_prefix(tmp_path, jobs: int) -> None:
+    write_scripts(str(tmp_path))
+    paths = batch.expand_paths([str(tmp_path)], "*.txt")
+    out = io.StringIO()
+    batch.run_batch(paths, out, batch.Options(), jobs, prefix=True)
+    lines = sorted(out.getvalue().splitlines())
+    expected = sorted(f"{path}: {line}" for path in paths
+                      for line in run_alone(path).splitlines())
+    assert lines == expected, f"wrong output. got={lines}, want={expected}"
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_failures_do_not_stop_batch(tmp_path, jobs: int) -> None:
+    write_scripts(str(tmp_path))
+    crash = tmp_path / "crash.txt"
+    crash.write_text("1 / 0")
+    paths = [str(tmp_path / "missing.txt"), str(crash), str(tmp_path / "a.txt")]
+    out = io.StringIO()
+    summary = batch.run_batch(paths, out, batch.Options(), jobs)
+    assert summary.files == 3, f"wrong file count. got={summary.files}"
+    failed = [result.path for result in summary.failures]
+    assert failed == paths[:2], f"wrong failures. got={failed}, want={paths[:2]}"
+    assert summary.failures[0].error.startswith("FileNotFoundError"), f"wrong error. got={summary.failures[0].error}"
+    assert summary.failures[1].error.startswith("ZeroDivisionError"), f"wrong error. got={summary.failures[1].error}"
+    assert out.getvalue() == run_alone(paths[2]), f"wrong output. got={out.getvalue()!r}"
+
+    err = io.StringIO()
+    summary.report(err)
+    assert "3 scripts" in err.getvalue() and "2 failed" in err.getvalue(), f"wrong report. got={err.getvalue()}"
@@ -0,0 +1,97 @@
+import io
+from lexer import lexer
+from object import object, environment
+from parser import parser
+from evaluator import evaluator, budget
+from repl import repl
+import pytest
+
+FIB = "let fib = fn(n) { if (n < 2) { n } else { fib(n - 1) + fib(n - 2) } }; fib(15)"
+RUNAWAY = "let f = fn(n) { 1 + f(n + 1) }; f(0)"
+LOOP = "let f = fn(n) { f(n + 1) }; f(0)"
+# Call-free: each statement squares the previous result.
+SQUARES = "let a = 3;" + "let a = a * a;" * 40
+STRAIGHT = "let a = 1;" + "let a = a + 1;" * 1000 + "a"
+
+
+def run(input: str, limits: budget.Budget) -> object.Object:
+    program = parser.Parser(lexer.Lexer(input)).parse_program()
+    return limits.run(program, environment.Environment())
+
+
+@pytest.mark.parametrize('input, limits, expected', [
+    (FIB, budget.Budget(max_nodes=10000), "budget exceeded: more than 10000 nodes evaluated"),
+    (FIB, budget.Budget(max_allocations=1000), "budget exceeded: more than 1000 objects allocated"),
+    (FIB, budget.Budget(max_depth=10), "budget exceeded: call depth over 10"),
+    (LOOP, budget.Budget(timeout=0.05), "budget exceeded: deadline of 0.05 seconds passed"),
+    (LOOP, budget.Budget(max_nodes=5000), "budget exceeded: more than 5000 nodes evaluated"),
+    (RUNAWAY, budget.Budget(), "budget exceeded: call depth over what the Python stack allows"),
+    (RUNAWAY, budget.Budget(max_depth=50), "budget exceeded: call depth over 50"),
+    (SQUARES, budget.Budget(timeout=0.2), "budget exceeded: deadline of 0.2 seconds passed"),
+    (STRAIGHT, budget.Budget(max_nodes=1000), "budget exceeded: more than 1000 nodes evaluated"),
+    (STRAIGHT, budget.Budget(max_allocations=500), "budget exceeded: more than 500 objects allocated"),
+])
+def test_limit_exceeded(input: str, limits: budget.Budget, expected: str) -> None:
+    evaluated = run(input, limits)
+    assert isinstance(
+        evaluated, object.Error), f"object is not Error. got={type(evaluated)} ({evaluated.inspect()})"
+    assert evaluated.message == expected, f"wrong error message. got={evaluated.message}, want={expected}"
+
+
+@pytest.mark.parametrize('limits', [
+    budget.Budget(max_nodes=100000),
+    budget.Budget(max_allocations=100000),
+    budget.Budget(max_depth=20),
+    budget.Budget(timeout=60),
+])
+def test_within_budget(limits: budget.Budget) -> None:
+    evaluated = run(FIB, limits)
+    assert isinstance(
+        evaluated, object.Integer), f"object is not Integer. got={type(evaluated)} ({evaluated.inspect()})"
+    assert evaluated.value == 610, f"object has wrong value. got={evaluated.value}"
+
+
+def test_tail_calls_do_not_add_depth() -> None:
+    input = "let count = fn(n) { if (n == 0) { 0 } else { count(n - 1) } }; count(1000)"
+    evaluated = run(input, budget.Budget(max_depth=2))
+    assert isinstance(
+        evaluated, object.Integer), f"object is not Integer. got={evaluated.inspect()}"
+
+
+def test_budget_resets_per_run() -> None:
+    limits = budget.Budget(max_nodes=5000)
+    for _ in range(3):
+        evaluated = run(FIB.replace("fib(15)", "fib(10)"), limits)
+        assert isinstance(
+            evaluated, object.Integer), f"object is not Integer. got={evaluated.inspect()}"
+
+
+def test_disabled_after_run() -> None:
+    run(RUNAWAY, budget.Budget(max_depth=5))
+    assert evaluator.call_hooks == [], f"call hooks left registered. got={evaluator.call_hooks}"
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_repl_limits(streamed: bool) -> None:
+    out = io.StringIO()
+    limits = budget.Budget(max_depth=10)
+    if streamed:
+        repl.print_streamed_program(out, FIB, environment.Environment(), limits=limits)
+    else:
+        repl.print_evaluated_program(out, FIB, environment.Environment(), limits=limits)
+    assert out.getvalue() == "ERROR: budget exceeded: call depth over 10\n", f"wrong output. got={out.getvalue()!r}"
+
+
+def test_statement_costs_count_only_the_branch_taken() -> None:
+    input = "if (true) { 1 + 2 } else { 1 + 2 + 3 + 4 + 5 + 6 + 7 + 8 + 9 }"
+    limits = budget.Budget()
+    run(input, limits)
+    # if statement, if, condition and the two blocks; then the statement
+    # and the three nodes of 1 + 2.
+    assert limits.nodes == 9, f"wrong nodes charged. got={limits.nodes}"
+
+
+def test_streamed_call_free_program_is_limited() -> None:
+    out = io.StringIO()
+    repl.print_streamed_program(out, STRAIGHT, environment.Environment(), limits=budget.Budget(max_nodes=1000))
+    assert out.getvalue() == "ERROR: budget exceeded: more than 1000 nodes evaluated\n", f"wrong output. got={out.getvalue()!r}"
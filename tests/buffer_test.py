@@ -0,0 +1,66 @@
+from my_token import token
+from lexer import lexer, buffer
+from parser import parser
+import pytest
+
+SOURCES = [
+    '''=+(){},;''',
+    '''
+let five = 5;
+let add = fn(x, y) {
+x + y;
+};
+let result = add(five, 10);
+!-/*5;
+5 < 10 > 5;
+if (5 < 10) { return true; } else { return false; }
+10 == 10;
+10 != 9;
+@
+''',
+    '',
+]
+
+
+def lex_all(source: str) -> list[tuple[token.TokenType, str]]:
+    l = lexer.Lexer(source)
+    tokens = []
+    while True:
+        tok = l.next_token()
+        tokens.append((tok.type, tok.literal))
+        if tok.type == token.EOF:
+            return tokens
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_tokenize_all_matches_lexer(source: str) -> None:
+    buf = buffer.tokenize_all(source)
+    got = [(buf.type(i), buf.literal(i)) for i in range(len(buf))]
+    expected = lex_all(source)
+    assert got == expected, f"token buffer differs from lexer. got={got}, want={expected}"
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_cursor_matches_lexer(source: str) -> None:
+    cursor = buffer.tokenize_all(source).cursor()
+    got = []
+    for _ in range(len(lex_all(source)) + 2):
+        tok = cursor.next_token()
+        got.append((tok.type, tok.literal))
+    expected = lex_all(source)
+    expected += [expected[-1]] * 2
+    assert got == expected, f"cursor differs from lexer. got={got}, want={expected}"
+
+
+@pytest.mark.parametrize("source", [
+    "let x = 5 * (y + 2); fn(a, b) { if (a < b) { return a; } else { b } }(1, 2);",
+    "let = 5; let x 10;",
+])
+def test_parser_from_cursor(source: str) -> None:
+    expected_parser = parser.Parser(lexer.Lexer(source))
+    expected = expected_parser.parse_program()
+    p = parser.Parser(buffer.tokenize_all(source).cursor())
+    program = p.parse_program()
+    assert str(program) == str(
+        expected), f"program differs. got={program}, want={expected}"
+    assert p.errors == expected_parser.errors, f"errors differ. got={p.errors}, want={expected_parser.errors}"
@@ -0,0 +1,111 @@
+import gc
+import os
+import zlib
+import pickle
+from lexer import scanner
+from parser import parser
+from object import object, environment
+from evaluator import evaluator
+from cache import cache
+import pytest
+
+SOURCE = '''let factorial = fn(n) { if (n == 0) { 1 } else { n * factorial(n - 1) } };
+let big = 100000;
+factorial(5) + big'''
+
+
+def parse(source: str) -> str:
+    return str(parser.Parser(scanner.Scanner(source)).parse_program())
+
+
+def test_cached_program_round_trips(tmp_path) -> None:
+    first, errors = cache.parse(SOURCE, str(tmp_path))
+    assert errors == [], f"parser has errors: {errors}"
+    second, errors = cache.parse(SOURCE, str(tmp_path))
+    assert errors == [], f"cache load reported errors: {errors}"
+    assert second is not first
+    assert str(second) == parse(SOURCE), f"cached program differs. got={second}"
+    evaluated = evaluator.eval(second, environment.Environment())
+    assert evaluated.value == 100120, f"cached program evaluated to {evaluated.inspect()}"
+
+
+def test_cached_literals_share_small_integers(tmp_path) -> None:
+    cache.parse("5", str(tmp_path))
+    program, _ = cache.parse("5", str(tmp_path))
+    literal = program.statements[0].expression
+    assert literal.obj is object.new_integer(5), "cached literal is not the shared Integer"
+
+
+def test_load_leaves_collector_alone(tmp_path) -> None:
+    cache.parse(SOURCE, str(tmp_path))
+    frozen = gc.get_freeze_count()
+    for _ in range(3):
+        cache.parse(SOURCE, str(tmp_path))
+    assert gc.get_freeze_count() == frozen, f"load froze objects. got={gc.get_freeze_count() - frozen}"
+    assert gc.isenabled(), "load left the collector disabled"
+
+
+def test_parse_errors_are_not_cached(tmp_path) -> None:
+    _, errors = cache.parse("let = 5;", str(tmp_path))
+    assert len(errors) != 0, "expected parser errors"
+    assert os.listdir(tmp_path) == [], f"program with errors was cached: {os.listdir(tmp_path)}"
+    _, errors = cache.parse("let = 5;", str(tmp_path))
+    assert len(errors) != 0, "errors lost on second parse"
+
+
+def test_key_depends_on_source() -> None:
+    assert cache.cache_key("1 + 2") != cache.cache_key("1 + 3")
+    assert cache.cache_key("1 + 2") == cache.cache_key(memoryview(b"1 + 2"))
+
+
+@pytest.mark.parametrize("content", [b"", b"garbage", cache.MAGIC + b"\x80\x05truncated"])
+def test_corrupt_entry_is_replaced(tmp_path, content: bytes) -> None:
+    path = tmp_path / cache.cache_key(SOURCE)
+    path.write_bytes(content)
+    program, errors = cache.parse(SOURCE, str(tmp_path))
+    assert errors == [] and str(program) == parse(SOURCE), "corrupt entry was not re-parsed"
+    assert cache.load(str(tmp_path), path.name) is not None, "corrupt entry was not rewritten"
+    assert os.listdir(tmp_path) == [path.name], f"stray files left: {os.listdir(tmp_path)}"
+
+
+def test_entry_cannot_load_other_code(tmp_path) -> None:
+    key = cache.cache_key(SOURCE)
+    pickled = pickle.dumps(os.getcwd, pickle.HIGHEST_PROTOCOL)
+    (tmp_path / key).write_bytes(cache.MAGIC + zlib.compress(pickled))
+    assert cache.load(str(tmp_path), key) is None, "entry naming os.getcwd was loaded"
+
+
+def test_too_deep_program_is_parsed_but_not_cached(tmp_path) -> None:
+    source = "+".join(["1"] * 5000)
+    program, errors = cache.parse(source, str(tmp_path))
+    assert errors == [], f"parser has errors: {errors}"
+    assert len(program.statements) == 1, f"deep program parsed to {len(program.statements)} statements"
+    assert os.listdir(tmp_path) == [], f"deep program was cached: {os.listdir(tmp_path)}"
+
+
+def test_entries_are_compressed(tmp_path) -> None:
+    source = "\n".join(f"let f = fn(a, b) {{ if (a < b) {{ a * {i} }} else {{ b - a }} }};" for i in range(200))
+    cache.parse(source, str(tmp_path))
+    size = os.path.getsize(tmp_path / cache.cache_key(source))
+    assert size < len(source), f"entry of {size} bytes for {len(source)} bytes of source"
+
+
+def test_evict_deletes_least_recently_used(tmp_path) -> None:
+    for i, name in enumerate(["old", "used", "new"]):
+        path = tmp_path / name
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (i, i))
+    (tmp_path / ".tmp-pending").write_bytes(b"x" * 100)
+    cache.touch(str(tmp_path / "used"))
+    cache.evict(str(tmp_path), 250)
+    assert sorted(os.listdir(tmp_path)) == [".tmp-pending", "new", "used"], f"got={os.listdir(tmp_path)}"
+    cache.evict(str(tmp_path), 50)
+    assert os.listdir(tmp_path) == [".tmp-pending"], f"got={os.listdir(tmp_path)}"
+
+
+def test_store_keeps_directory_bounded(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(cache, "MAX_CACHE_BYTES", 2000)
+    for i in range(50):
+        cache.parse(f"let x = {i}; x * x + {i}", str(tmp_path))
+    total = sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+    assert 0 < total <= 2000, f"cache directory holds {total} bytes"
@@ -0,0 +1,52 @@
+from lexer import lexer
+from object import object, environment
+from parser import parser
+from compiler import closure_compiler
+from tests import evaluator_test
+from tests.evaluator_test import *
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def use_closure_compiler(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Re-runs every evaluator test against the closure compiler.
+    monkeypatch.setattr(evaluator_test, "eval_input", eval_input)
+
+
+def test_function_body_compiled_once() -> None:
+    input = '''
+    let double = fn(x) { x * 2 };
+    double(1);
+    '''
+    env = environment.Environment()
+    run_input(input, env)
+    fn = env.get("double")
+    assert isinstance(
+        fn, object.Function), f"object is not Function. got={type(fn)}"
+    compiled = fn.compiled
+    assert compiled is not None, "function body was not compiled"
+    run_input("double(2);", env)
+    assert fn.compiled is compiled, "function body was compiled again"
+
+
+def test_deep_recursion() -> None:
+    input = '''
+    let count = fn(n) { if (n == 0) { 0 } else { 1 + count(n - 1) } };
+    count(100);
+    '''
+    assert_integer_object(run_input(input), 100)
+
+
+# Helper functions
+
+def run_input(input: str, env: environment.Environment | None = None) -> object.Object:
+    l = lexer.Lexer(input)
+    p = parser.Parser(l)
+    program = p.parse_program()
+    if env is None:
+        env = environment.Environment()
+    return closure_compiler.run(program, env)
+
+
+def eval_input(input: str) -> object.Object | None:
+    return run_input(input)
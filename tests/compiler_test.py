@@ -0,0 +1,102 @@
+from lexer import lexer
+from parser import parser
+from object import object
+from compiler import code, compiler
+import pytest
+
+
+@pytest.mark.parametrize('op, operands, expected', [
+    (code.OP_CONSTANT, [65534], [code.OP_CONSTANT, 65534]),
+    (code.OP_ADD, [], [code.OP_ADD]),
+    (code.OP_CALL, [2], [code.OP_CALL, 2]),
+])
+def test_make(op: code.Opcode, operands: list[int], expected: list[int]) -> None:
+    instruction = code.make(op, *operands)
+    assert instruction == expected, f"wrong instruction. want={expected}, got={instruction}"
+
+
+def test_make_wrong_operand_count() -> None:
+    with pytest.raises(ValueError):
+        code.make(code.OP_CONSTANT)
+
+
+def test_disassemble() -> None:
+    ins = code.make(code.OP_ADD) + code.make(code.OP_CONSTANT, 2) + \
+        code.make(code.OP_JUMP, 65535)
+    expected = "0000 OpAdd\n0001 OpConstant 2\n0003 OpJump 65535"
+    assert code.disassemble(ins) == expected, f"wrong disassembly. got={code.disassemble(ins)!r}"
+
+
+@pytest.mark.parametrize('input, expected_constants, expected_instructions', [
+    ("1 + 2", [1, 2], [
+        code.make(code.OP_CONSTANT, 0),
+        code.make(code.OP_CONSTANT, 1),
+        code.make(code.OP_ADD),
+    ]),
+    ("1; 2", [1, 2], [
+        code.make(code.OP_CONSTANT, 0),
+        code.make(code.OP_POP),
+        code.make(code.OP_CONSTANT, 1),
+    ]),
+    ("1 < 1", [1], [
+        code.make(code.OP_CONSTANT, 0),
+        code.make(code.OP_CONSTANT, 0),
+        code.make(code.OP_LESS_THAN),
+    ]),
+    ("-1; !true", [1], [
+        code.make(code.OP_CONSTANT, 0),
+        code.make(code.OP_MINUS),
+        code.make(code.OP_POP),
+        code.make(code.OP_TRUE),
+        code.make(code.OP_BANG),
+    ]),
+    ("if (true) { 10 }; 3333;", [10, 3333], [
+        code.make(code.OP_TRUE),
+        code.make(code.OP_JUMP_NOT_TRUTHY, 7),
+        code.make(code.OP_CONSTANT, 0),
+        code.make(code.OP_JUMP, 8),
+        code.make(code.OP_NULL),
+        code.make(code.OP_POP),
+        code.make(code.OP_CONSTANT, 1),
+    ]),
+    ("let one = 1; let two = one;", [1], [
+        code.make(code.OP_CONSTANT, 0),
+        code.make(code.OP_SET_NAME, 0),
+        code.make(code.OP_GET_NAME, 0),
+        code.make(code.OP_SET_NAME, 1),
+        code.make(code.OP_NULL),
+    ]),
+])
+def test_compile(input: str, expected_constants: list[int], expected_instructions: list[list[int]]) -> None:
+    bytecode = compile_input(input)
+    expected = [i for ins in expected_instructions for i in ins]
+    assert bytecode.instructions == expected, \
+        f"wrong instructions.\nwant=\n{code.disassemble(expected)}\ngot=\n{code.disassemble(bytecode.instructions)}"
+    assert len(bytecode.constants) == len(expected_constants), \
+        f"wrong number of constants. want={len(expected_constants)}, got={len(bytecode.constants)}"
+    for constant, expected_value in zip(bytecode.constants, expected_constants):
+        assert isinstance(constant, object.Integer), f"constant is not Integer. got={type(constant)}"
+        assert constant.value == expected_value, f"constant has wrong value. got={constant.value}, want={expected_value}"
+
+
+def test_compile_function_literal() -> None:
+    bytecode = compile_input("fn(a) { return a + 5 }")
+    assert bytecode.instructions == code.make(code.OP_CLOSURE, 1)
+    fn = bytecode.constants[1]
+    assert isinstance(fn, object.CompiledFunction), f"constant is not CompiledFunction. got={type(fn)}"
+    assert fn.parameter_names == ("a",)
+    expected = code.make(code.OP_GET_NAME, 0) + code.make(code.OP_CONSTANT, 0) + \
+        code.make(code.OP_ADD) + code.make(code.OP_RETURN_VALUE) + \
+        code.make(code.OP_RETURN_VALUE)
+    assert fn.instructions == expected, \
+        f"wrong instructions.\nwant=\n{code.disassemble(expected)}\ngot=\n{code.disassemble(fn.instructions)}"
+
+
+# Helper functions
+
+def compile_input(input: str) -> compiler.Bytecode:
+    l = lexer.Lexer(input)
+    p = parser.Parser(l)
+    program = p.parse_program()
+    assert len(p.errors) == 0, f"parser errors: {p.errors}"
+    return compiler.compile_program(program)
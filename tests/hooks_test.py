@@ -0,0 +1,105 @@
+import io
+from lexer import lexer
+from my_ast import ast
+from object import object, environment
+from parser import parser
+from evaluator import evaluator, hooks, budget
+from repl import repl
+import pytest
+
+
+def run(input: str) -> object.Object:
+    program = parser.Parser(lexer.Lexer(input)).parse_program()
+    return evaluator.eval(program, environment.Environment())
+
+
+def test_calls_and_returns_pair_up() -> None:
+    events = []
+
+    def on_call(fn: object.Function, args: list[object.Object]) -> None:
+        events.append(("call", [arg.inspect() for arg in args]))
+
+    def on_return(fn: object.Function, value: object.Object) -> None:
+        events.append(("return", value.inspect()))
+
+    with hooks.subscribed(hooks.ON_CALL, on_call), hooks.subscribed(hooks.ON_RETURN, on_return):
+        run("let double = fn(x) { x * 2 }; let f = fn(x) { double(x) + 1 }; f(2)")
+    assert events == [
+        ("call", ["2"]),
+        ("call", ["2"]),
+        ("return", "4"),
+        ("return", "5"),
+    ], f"wrong events. got={events}"
+
+
+def test_tail_calls_return_in_order() -> None:
+    events = []
+    with hooks.subscribed(hooks.ON_CALL, lambda fn, args: events.append(("call", args[0].value))), \
+            hooks.subscribed(hooks.ON_RETURN, lambda fn, value: events.append(("return", value.value))):
+        run("let count = fn(n) { if (n == 0) { 0 } else { count(n - 1) } }; count(2)")
+    assert events == [
+        ("call", 2), ("call", 1), ("call", 0),
+        ("return", 0), ("return", 0), ("return", 0),
+    ], f"wrong events. got={events}"
+
+
+def test_calls_traced_under_limits() -> None:
+    events = []
+    program = parser.Parser(lexer.Lexer("let count = fn(n) { if (n == 0) { 0 } else { 1 + count(n - 1) } }; count(2)")).parse_program()
+    with hooks.subscribed(hooks.ON_CALL, lambda fn, args: events.append(("call", args[0].value))), \
+            hooks.subscribed(hooks.ON_RETURN, lambda fn, value: events.append(("return", value.value))):
+        budget.Budget(max_nodes=1000, max_depth=10).run(program, environment.Environment())
+    assert events == [
+        ("call", 2), ("call", 1), ("call", 0),
+        ("return", 0), ("return", 1), ("return", 2),
+    ], f"wrong events. got={events}"
+
+
+@pytest.mark.parametrize('input, expected', [
+    ("1 + true; 5", ["type mismatch: INTEGER + BOOLEAN"]),
+    ("let f = fn() { -true }; f()", ["unknown operator: -BOOLEAN"]),
+    ("let a = 1; a(2)", ["not a function: INTEGER"]),
+    ("foobar", ["identifier not found: foobar"]),
+    ("1 + 2", []),
+])
+def test_errors_reported_once(input: str, expected: list[str]) -> None:
+    errors = []
+    with hooks.subscribed(hooks.ON_ERROR, lambda error: errors.append(error.message)):
+        run(input)
+    assert errors == expected, f"wrong errors. got={errors}"
+
+
+def test_node_events() -> None:
+    nodes = []
+    with hooks.subscribed(hooks.ON_NODE, lambda node: nodes.append(type(node).__name__)):
+        run("1 + 2")
+    assert nodes == ["Program", "ExpressionStatement", "InfixExpression",
+                     "IntegerLiteral", "IntegerLiteral"], f"wrong nodes. got={nodes}"
+
+
+def test_node_events_through_repl() -> None:
+    nodes = []
+    errors = []
+    out = io.StringIO()
+    with hooks.subscribed(hooks.ON_NODE, lambda node: nodes.append(type(node).__name__)), \
+            hooks.subscribed(hooks.ON_ERROR, lambda error: errors.append(error.message)):
+        repl.print_evaluated_program(out, "foobar", environment.Environment())
+    assert nodes == ["Program", "ExpressionStatement", "Identifier"], f"wrong nodes. got={nodes}"
+    assert errors == ["identifier not found: foobar"], f"wrong errors. got={errors}"
+
+
+def test_unsubscribing_restores_evaluator() -> None:
+    callback = lambda *args: None
+    for event in [hooks.ON_CALL, hooks.ON_RETURN, hooks.ON_ERROR, hooks.ON_NODE]:
+        hooks.subscribe(event, callback)
+    assert evaluator.node_hooks == [hooks.node_tracer], f"nodes not traced. got={evaluator.node_hooks}"
+    assert evaluator.call_hooks == [hooks.call_tracer], f"calls not traced. got={evaluator.call_hooks}"
+    for event in [hooks.ON_CALL, hooks.ON_RETURN, hooks.ON_ERROR, hooks.ON_NODE]:
+        hooks.unsubscribe(event, callback)
+    assert evaluator.node_hooks == [], f"node hooks left registered. got={evaluator.node_hooks}"
+    assert evaluator.call_hooks == [], f"call hooks left registered. got={evaluator.call_hooks}"
+
+
+def test_unknown_event() -> None:
+    with pytest.raises(ValueError):
+        hooks.subscribe("on_everything", lambda: None)
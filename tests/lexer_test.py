@@ -1,6 +1,6 @@
 import pytest
 from my_token import token
-from lexer import lexer
+from lexer import lexer, scanner
 
 
 @pytest.mark.parametrize(
@@ -118,8 +118,9 @@ if (5 < 10) {
         ]),
      ]
 )
-def test_next_token(my_input: str, expected_tokens: list[tuple[str, str]]) -> None:
-    my_lexer = lexer.Lexer(my_input)
+@pytest.mark.parametrize("new_lexer", [lexer.Lexer, scanner.Scanner])
+def test_next_token(my_input: str, expected_tokens: list[tuple[str, str]], new_lexer: type[lexer.Lexer | scanner.Scanner]) -> None:
+    my_lexer = new_lexer(my_input)
 
     for i, (expected_type, expected_literal) in enumerate(expected_tokens):
         tok = my_lexer.next_token()
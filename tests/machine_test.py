@@ -0,0 +1,70 @@
+import io
+from lexer import lexer
+from object import object, environment
+from parser import parser
+from evaluator import machine, budget
+from repl import repl
+from tests import evaluator_test
+from tests.evaluator_test import *
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def use_machine(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Re-runs every evaluator test against the explicit-stack evaluator.
+    monkeypatch.setattr(evaluator_test, "eval_input", eval_input)
+
+
+def test_deep_non_tail_recursion() -> None:
+    input = '''
+    let count = fn(n) { if (n == 0) { 0 } else { 1 + count(n - 1) } };
+    count(100000);
+    '''
+    assert_integer_object(run_input(input), 100000)
+
+
+@pytest.mark.parametrize('input, max_depth, expected', [
+    ("let f = fn(n) { if (n == 0) { 0 } else { 1 + f(n - 1) } }; f(10)", 11, 10),
+    ("let f = fn(n) { if (n == 0) { 0 } else { f(n - 1) } }; f(10000)", 1, 0),
+    ("let f = fn(n) { if (n == 0) { return 0; } return f(n - 1); }; f(10000)", 1, 0),
+    ("let f = fn(n) { if (n > 0) { return f(n - 1); } 7 }; f(10000)", 1, 7),
+])
+def test_call_depth_within_limit(input: str, max_depth: int, expected: int) -> None:
+    assert_integer_object(run_input(input, max_depth), expected)
+
+
+def test_stack_overflow() -> None:
+    input = "let f = fn(n) { 1 + f(n + 1) }; f(0)"
+    evaluated = run_input(input, 1000)
+    assert isinstance(
+        evaluated, object.Error), f"object is not Error. got={type(evaluated)}({evaluated.__dict__}) instead"
+    expected_message = "stack overflow: maximum call depth 1000 exceeded"
+    assert evaluated.message == expected_message, f"wrong error message. expected={expected_message}, got={evaluated.message}"
+
+
+def test_max_depth_through_repl() -> None:
+    out = io.StringIO()
+    repl.print_program(out, "let f = fn(n) { 1 + f(n + 1) }; f(0)", 'e',
+                       environment.Environment(), 'stack', limits=budget.Budget(max_depth=50))
+    assert out.getvalue() == "ERROR: stack overflow: maximum call depth 50 exceeded\n"
+
+
+def test_environment_persists_between_programs() -> None:
+    env = environment.Environment()
+    run_input("let add = fn(x, y) { x + y }; let one = 1;", env=env)
+    assert_integer_object(run_input("add(one, 41)", env=env), 42)
+
+
+# Helper functions
+
+def run_input(input: str, max_depth: int = machine.DEFAULT_MAX_DEPTH, env: environment.Environment | None = None) -> object.Object:
+    l = lexer.Lexer(input)
+    p = parser.Parser(l)
+    program = p.parse_program()
+    if env is None:
+        env = environment.Environment()
+    return machine.eval(program, env, max_depth)
+
+
+def eval_input(input: str) -> object.Object | None:
+    return run_input(input)
@@ -0,0 +1,102 @@
+from lexer import lexer
+from object import object, environment
+from parser import parser
+from evaluator import evaluator, memo, budget
+from profiler import profiler, sampler
+from tests.evaluator_test import *
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def memo_cache(monkeypatch: pytest.MonkeyPatch) -> memo.Memo:
+    # Re-runs every evaluator test with memoization turned on.
+    cache = memo.Memo(16)
+    monkeypatch.setattr(evaluator, "memo_cache", cache)
+    return cache
+
+
+def test_recursive_calls_hit(memo_cache: memo.Memo) -> None:
+    input = '''
+    let fib = fn(n) { if (n < 2) { n } else { fib(n - 1) + fib(n - 2) } };
+    fib(60);
+    '''
+    assert_integer_object(eval_input(input), 1548008755920)
+    assert memo_cache.misses == 61, f"wrong number of misses. got={memo_cache.misses}"
+    assert memo_cache.hits == 58, f"wrong number of hits. got={memo_cache.hits}"
+
+
+@pytest.mark.parametrize('hook', [
+    budget.Budget(max_nodes=10_000, max_depth=100),
+    profiler.Profiler(),
+    sampler.Sampler(),
+])
+def test_memoized_with_call_hooks(memo_cache: memo.Memo, hook: evaluator.CallHook) -> None:
+    input = "let fib = fn(n) { if (n < 2) { n } else { fib(n - 1) + fib(n - 2) } }; fib(25);"
+    hook.enable()
+    try:
+        evaluated = eval_input(input)
+    finally:
+        hook.disable()
+    assert_integer_object(evaluated, 75025)
+    assert memo_cache.hits == 23, f"wrong number of hits. got={memo_cache.hits}"
+
+
+@pytest.mark.parametrize('input, expected', [
+    ("let x = 1; let f = fn(n) { n + x }; let a = f(1); let x = 10; a * 100 + f(1)", 211),
+    ("let g = fn() { 1 }; let f = fn() { g() }; let a = f(); let g = fn() { 2 }; a * 10 + f()", 12),
+    ("let x = 1; let g = fn() { x }; let f = fn() { g() }; let a = f(); let x = 2; a * 10 + f()", 12),
+    ("let f = fn(x) { let g = fn() { x }; let a = g(); let x = 2; a * 10 + g() }; f(1)", 12),
+    ("let f = fn(n) { if (n > 0) { f(n - 1) } else { 7 } }; f(3) + f(2)", 14),
+    ("let x = 1; let f = fn(c) { if (c) { let x = 2; x } else { x } }; let a = f(false); let x = 5; a * 10 + f(false)", 15),
+    ("let x = 1; let f = fn() { let y = x; let x = 2; y }; let a = f(); let x = 5; a * 10 + f()", 15),
+    ("let x = 1; let f = fn() { let g = fn() { x }; let a = g(); let x = 2; a }; let a = f(); let x = 5; a * 10 + f()", 15),
+])
+def test_rebinding_is_seen(input: str, expected: int) -> None:
+    assert_integer_object(eval_input(input), expected)
+
+
+@pytest.mark.parametrize('input, skipped', [
+    ("let twice = fn(f) { 2 }; twice(fn(x) { x })", 1),
+    ("let f = fn() { g() }; f()", 1),
+    ("let f = fn(c) { if (c) { let x = 2; } x }; f(true)", 1),
+])
+def test_not_memoized(memo_cache: memo.Memo, input: str, skipped: int) -> None:
+    eval_input(input)
+    assert memo_cache.skipped == skipped, f"wrong number of skipped calls. got={memo_cache.skipped}"
+    assert len(memo_cache.results) == 0, f"results were cached. got={memo_cache.results}"
+
+def test_local_recursive_function_is_memoized(memo_cache: memo.Memo) -> None:
+    input = "let f = fn(n) { let go = fn(k) { if (k == 0) { 0 } else { go(k - 1) } }; go(n) }; f(3)"
+    eval_input(input)
+    assert memo_cache.skipped == 0, f"calls were not memoized. got={memo_cache.skipped}"
+
+
+def test_functions_are_not_cached() -> None:
+    input = "let f = fn() { fn() { 1 } }; f() == f()"
+    evaluated = eval_input(input)
+    assert evaluated is evaluator.FALSE, f"object is not FALSE. got={evaluated.inspect()}"
+
+
+def test_least_recently_used_evicted(memo_cache: memo.Memo) -> None:
+    input = '''
+    let id = fn(x) { x };
+    let fill = fn(n) { if (n == 0) { 0 } else { id(n); fill(n - 1) } };
+    fill(20);
+    '''
+    eval_input(input)
+    assert len(memo_cache.results) == 16, f"cache has wrong size. got={len(memo_cache.results)}"
+    assert memo_cache.evictions > 0, "nothing was evicted"
+
+
+@pytest.mark.parametrize('input, expected', [
+    ("fn(x) { x + y }", ["y"]),
+    ("fn(x) { let y = 1; x + y }", []),
+    ("fn(x) { fn(z) { x + z + w } }", ["w"]),
+    ("fn() { if (a) { let b = c; b } else { d(e) } }", ["a", "c", "d", "e"]),
+])
+def test_free_names(input: str, expected: list[str]) -> None:
+    fn = eval_input(input)
+    assert isinstance(
+        fn, object.Function), f"object is not Function. got={type(fn)}"
+    names = sorted(memo.free_names(fn.body, {param.value for param in fn.parameters}))
+    assert names == expected, f"wrong free names. got={names}, want={expected}"
@@ -0,0 +1,96 @@
+from monkey import monkey
+from evaluator import budget
+from object import object
+import pytest
+
+PROGRAM = """
+let price = fn(n, vip) { if (vip) { n * 90 / 100 } else { n } };
+let fib = fn(n) { if (n < 2) { n } else { fib(n - 1) + fib(n - 2) } };
+let adder = fn(x) { fn(y) { x + y } };
+let negative = fn(b) { !b };
+let nothing = fn() { if (false) { 1 } };
+let broken = fn(n) { n + true };
+"""
+
+
+@pytest.fixture(params=monkey.ENGINES)
+def session(request) -> monkey.Session:
+    return monkey.Session(monkey.compile(PROGRAM), request.param)
+
+
+@pytest.mark.parametrize('fn_name, args, expected', [
+    ("price", (100, True), 90),
+    ("price", (100, False), 100),
+    ("fib", (15,), 610),
+    ("negative", (True,), False),
+    ("negative", (False,), True),
+    ("nothing", (), None),
+    ("price", (5000, False, 1), 5000),
+])
+def test_call(session: monkey.Session, fn_name: str, args: tuple, expected: object) -> None:
+    result = session.call(fn_name, *args)
+    assert type(result) is type(expected) and result == expected, f"wrong result. got={result!r}, want={expected!r}"
+
+
+def test_function_values(session: monkey.Session) -> None:
+    add = session.call("adder", 3)
+    assert isinstance(add, object.Object), f"function not passed through. got={add!r}"
+    session.env.set("add3", add)
+    result = session.call("add3", 4)
+    assert result == 7, f"wrong result. got={result}"
+
+
+def test_run(session: monkey.Session) -> None:
+    session.run("let total = price(200, true) + fib(10);")
+    result = session.get("total")
+    assert result == 235, f"wrong result. got={result}"
+    result = session.run("total * 2")
+    assert result == 470, f"wrong result. got={result}"
+
+
+@pytest.mark.parametrize('fn_name, args, error, message', [
+    ("broken", (1,), monkey.EvaluationError, "type mismatch: INTEGER + BOOLEAN"),
+    ("missing", (), monkey.EvaluationError, "identifier not found: missing"),
+    ("price", (1,), TypeError, "price takes 2 arguments, got 1"),
+    ("fib", ("1",), TypeError, "cannot convert str to a Monkey value"),
+])
+def test_call_errors(session: monkey.Session, fn_name: str, args: tuple, error: type, message: str) -> None:
+    with pytest.raises(error) as e:
+        session.call(fn_name, *args)
+    assert str(e.value) == message, f"wrong message. got={e.value}, want={message}"
+
+
+def test_compile_errors() -> None:
+    with pytest.raises(monkey.CompileError) as e:
+        monkey.compile("let = 5;")
+    assert e.value.errors, "no parser errors recorded"
+
+
+def test_sessions_are_separate() -> None:
+    program = monkey.compile("let counter = 1;")
+    first = monkey.Session(program)
+    second = monkey.Session(program)
+    first.run("let counter = 2;")
+    assert second.get("counter") == 1, f"sessions share globals. got={second.get('counter')}"
+
+
+def test_limits() -> None:
+    session = monkey.Session(monkey.compile(PROGRAM), limits=budget.Budget(max_nodes=1000))
+    with pytest.raises(monkey.EvaluationError) as e:
+        session.call("fib", 20)
+    assert str(e.value) == "budget exceeded: more than 1000 nodes evaluated", f"wrong message. got={e.value}"
+    # Every call gets the whole budget.
+    result = session.call("fib", 5)
+    assert result == 5, f"wrong result. got={result}"
+    with pytest.raises(ValueError):
+        monkey.Session(limits=budget.Budget(max_nodes=1000), engine='transpile')
+
+
+def test_fork() -> None:
+    session = monkey.Session(monkey.compile(PROGRAM))
+    first = session.fork()
+    second = session.fork()
+    first.run("let fib = fn(n) { n };")
+    assert first.call("fib", 10) == 10, f"fork does not see its own binding. got={first.call('fib', 10)}"
+    assert second.call("fib", 10) == 55, f"binding leaked into another fork. got={second.call('fib', 10)}"
+    assert session.call("fib", 10) == 55, f"binding leaked into the parent. got={session.call('fib', 10)}"
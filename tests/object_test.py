@@ -0,0 +1,99 @@
+import gc
+from lexer import lexer
+from object import object, environment
+from parser import parser
+from evaluator import evaluator
+import pytest
+
+
+@pytest.mark.parametrize('value', [0, 1, -1, object.SMALL_INTEGER_MIN, object.SMALL_INTEGER_MAX])
+def test_small_integers_are_shared(value: int) -> None:
+    obj = object.new_integer(value)
+    assert obj.value == value, f"object has wrong value. got={obj.value}, want={value}"
+    assert object.new_integer(value) is obj, f"Integer {value} was not shared"
+
+
+@pytest.mark.parametrize('value', [object.SMALL_INTEGER_MIN - 1, object.SMALL_INTEGER_MAX + 1])
+def test_large_integers_are_not_shared(value: int) -> None:
+    assert object.new_integer(value) is not object.new_integer(value)
+
+
+def test_set_small_integer_range() -> None:
+    try:
+        object.set_small_integer_range(0, 10)
+        assert object.new_integer(10) is object.new_integer(10)
+        assert object.new_integer(11) is not object.new_integer(11)
+        assert object.new_integer(-1) is not object.new_integer(-1)
+    finally:
+        object.set_small_integer_range(
+            object.SMALL_INTEGER_MIN, object.SMALL_INTEGER_MAX)
+
+
+@pytest.mark.parametrize('obj', [
+    object.Integer(1),
+    object.Boolean(True),
+    object.Null(),
+    object.ReturnValue(object.Integer(1)),
+    object.Error("message"),
+])
+def test_compact_layout(obj: object.Object) -> None:
+    assert not hasattr(obj, "__dict__"), f"{type(obj).__name__} has a __dict__"
+
+
+def test_integer_literal_reuses_parsed_object() -> None:
+    p = parser.Parser(lexer.Lexer("100000"))
+    program = p.parse_program()
+    literal = program.statements[0].expression
+    assert isinstance(
+        literal.obj, object.Integer), f"literal has no Integer. got={type(literal.obj)}"
+    first = evaluator.eval(program, environment.Environment())
+    second = evaluator.eval(program, environment.Environment())
+    assert first is literal.obj and second is literal.obj, "literal evaluation allocated a new Integer"
+
+
+def eval_in(input: str, env: environment.Environment) -> object.Object:
+    return evaluator.eval(parser.Parser(lexer.Lexer(input)).parse_program(), env)
+
+
+@pytest.mark.parametrize('input, expected', [
+    ("square(limit)", 100),
+    ("let limit = 3; square(limit)", 9),
+    ("let square = fn(x) { x }; square(limit)", 10),
+    ("let sum = fn(n) { if (n == 0) { 0 } else { n + sum(n - 1) } }; sum(limit)", 55),
+])
+def test_fork_reads_through_and_writes_locally(input: str, expected: int) -> None:
+    parent = environment.Environment()
+    eval_in("let square = fn(x) { x * x }; let limit = 10;", parent)
+    fork = parent.fork()
+    evaluated = eval_in(input, fork)
+    assert evaluated.value == expected, f"wrong result. got={evaluated.inspect()}, want={expected}"
+    assert sorted(parent.store) == ["limit", "square"], f"fork wrote to its parent. got={sorted(parent.store)}"
+    assert eval_in("limit", parent.fork()).value == 10, "bindings leaked into the next fork"
+
+
+def test_forks_are_freed_without_cyclic_collection() -> None:
+    parent = environment.Environment()
+    eval_in("let limit = 10;", parent)
+    # Parsing leaves cycles of its own behind.
+    program = parser.Parser(lexer.Lexer("let x = limit + 1;")).parse_program()
+    gc.collect()
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(100):
+            fork = parent.fork()
+            evaluator.eval(program, fork)
+        del fork
+        unreachable = gc.collect()
+    finally:
+        if enabled:
+            gc.enable()
+    assert unreachable == 0, f"discarded forks were left to the cyclic collector. got={unreachable} objects"
+
+
+@pytest.mark.parametrize('env', [
+    environment.Environment(),
+    environment.Frame(environment.FrameLayout({"x": 0}, (0,)), environment.Environment()),
+])
+def test_environment_compact_layout(env: environment.Environment) -> None:
+    assert not hasattr(env, "__dict__"), f"{type(env).__name__} has a __dict__"
@@ -0,0 +1,90 @@
+from lexer import lexer
+from object import object, environment
+from parser import parser
+from my_ast import ast
+from evaluator import evaluator
+from optimizer import optimizer
+import pytest
+
+
+@pytest.mark.parametrize('input, expected', [
+    ("1 + 2 * 3", "7"),
+    ("(5 + 10 * 2 + 15 / 3) * 2 + -10", "50"),
+    ("7 / -2", "-4"),
+    ("-(-5)", "5"),
+    ("!true", "false"),
+    ("!5", "false"),
+    ("!!false", "false"),
+    ("10 > 3", "true"),
+    ("1 == true", "false"),
+    ("true != false", "true"),
+    ("(1 < 2) == true", "true"),
+    ("1 / 0", "(1 / 0)"),
+    ("2 * (1 / 0)", "(2 * (1 / 0))"),
+    ("-true", "(-true)"),
+    ("true + false", "(true + false)"),
+    ("5 + true", "(5 + true)"),
+    ("x * 1", "(x * 1)"),
+    ("x + 0", "(x + 0)"),
+    ("(x + y) * 1", "(x + y)"),
+    ("0 + (x * y)", "(x * y)"),
+    ("(x - y) / 1 - 0", "(x - y)"),
+    ("-(-(x + 1))", "(x + 1)"),
+    ("-(-x)", "(-(-x))"),
+    ("!!(x < y)", "(x < y)"),
+    ("!!x", "(!(!x))"),
+    ("let a = if (1 < 2) { 10 } else { 20 };", "let a = 10;"),
+    ("if (false) { 10 } else { x; y }", "xy"),
+    ("if (false) { 10 }; 5", "5"),
+    ("if (false) { 10 }", "if false {10} "),
+    ("if (x) { 1 + 1 }", "if x {2} "),
+    ("fn(x) { x + (2 * 3) }", "fn(x) (x + 6)"),
+    ("f(1 + 1, !true)", "f(2, false)"),
+])
+def test_optimize(input: str, expected: str) -> None:
+    program = optimizer.optimize(parse(input))
+    assert str(program) == expected, f"expected={expected}, got={str(program)}"
+
+
+@pytest.mark.parametrize('input', [
+    "(5 + 10 * 2 + 15 / 3) * 2 + -10",
+    "let x = true; x + 0",
+    "let x = 5; x * 1 == 5",
+    "let f = fn(x) { (x + 0) * 1 }; f(true)",
+    "let f = fn(x) { -(-(x + 1)) }; f(4)",
+    "let f = fn(x) { !!(x < 3) }; f(false)",
+    "if (10 > 1) { if (10 > 1) { return true + false; } return 1; }",
+    "if (1 > 2) { let a = 1; a } else { let a = 2; return a * 3; 7 }",
+    "let f = fn() { if (true) { return 1; } 2 }; f()",
+    "let f = fn(n) { if (false) { 1 } }; f(1)",
+    "let f = fn() { if (true) { } }; f()",
+    "-true",
+    "missing + 0",
+])
+def test_optimized_program_evaluates_the_same(input: str) -> None:
+    expected = evaluator.eval(parse(input), environment.Environment())
+    evaluated = evaluator.eval(optimizer.optimize(
+        parse(input)), environment.Environment())
+    assert type(evaluated) is type(expected), \
+        f"wrong object type. want={type(expected)}, got={type(evaluated)}"
+    assert evaluated.inspect() == expected.inspect(), \
+        f"wrong result. want={expected.inspect()}, got={evaluated.inspect()}"
+
+
+def test_division_by_zero_is_left_to_runtime() -> None:
+    program = optimizer.optimize(parse("let f = fn() { 1 / 0 }; 5"))
+    evaluated = evaluator.eval(program, environment.Environment())
+    assert isinstance(
+        evaluated, object.Integer), f"object is not Integer. got={type(evaluated)}({evaluated.__dict__}) instead"
+    with pytest.raises(ZeroDivisionError):
+        evaluator.eval(optimizer.optimize(parse("1 / 0")), environment.Environment())
+
+
+# Helper functions
+
+def parse(input: str) -> ast.Program:
+    l = lexer.Lexer(input)
+    p = parser.Parser(l)
+    program = p.parse_program()
+    assert len(p.errors) == 0, f"parser errors: {p.errors}"
+    return program
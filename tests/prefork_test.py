@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import socket
+import subprocess
+from typing import Iterator
+from prefork import prefork
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRELUDE = '''let square = fn(n) { n * n };
+let limit = 10;
+'''
+
+
+def start(tmp_path, prelude: str, *args: str) -> tuple[subprocess.Popen, str]:
+    prelude_path = tmp_path / "prelude.mk"
+    prelude_path.write_text(prelude)
+    address = str(tmp_path / "sock")
+    proc = subprocess.Popen([sys.executable, "main.py", "--prefork", address, "--prelude", str(prelude_path), *args],
+                            cwd=ROOT, stderr=subprocess.PIPE, text=True)
+    deadline = time.monotonic() + 10
+    while not os.path.exists(address) and proc.poll() is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return proc, address
+
+
+@pytest.fixture(scope="module")
+def address(tmp_path_factory) -> Iterator[str]:
+    # Two workers that are replaced after two scripts each, so the tests
+    # also go through freshly forked ones.
+    proc, address = start(tmp_path_factory.mktemp("prefork"), PRELUDE, "--jobs", "2", "--max-requests", "2")
+    yield address
+    proc.terminate()
+    proc.wait()
+
+
+@pytest.mark.parametrize('source, expected', [
+    ("square(4)", "16\n"),
+    ("square(limit) + 1", "101\n"),
+    ("let limit = 3; limit", "3\n"),
+    ("limit", "10\n"),
+    ("let x = square(2);", ""),
+    ("x", "ERROR: identifier not found: x\n"),
+    ("1 + true", "ERROR: type mismatch: INTEGER + BOOLEAN\n"),
+    ("1 / 0", "ZeroDivisionError: integer division or modulo by zero\n"),
+])
+def test_run(address: str, source: str, expected: str) -> None:
+    output = prefork.run(address, source)
+    assert output == expected, f"wrong output. got={output!r}, want={expected!r}"
+
+
+def test_parser_errors(address: str) -> None:
+    output = prefork.run(address, "let = 1;")
+    assert "Parser errors:" in output, f"parser errors not reported. got={output!r}"
+
+
+@pytest.mark.parametrize('prelude, message', [
+    ("let = 1;", "prelude has parser errors"),
+    ("let x = 1 + true;", "prelude failed: type mismatch: INTEGER + BOOLEAN"),
+])
+def test_bad_prelude(tmp_path, prelude: str, message: str) -> None:
+    proc, _ = start(tmp_path, prelude)
+    _, err = proc.communicate(timeout=10)
+    assert proc.returncode != 0, f"server started with a bad prelude. got={proc.returncode}"
+    assert message in err, f"wrong error. got={err}"
+
+
+def handled(data: bytes, close: bool, **limits) -> str:
+    # Runs one connection through a worker's handler, in this process.
+    server = prefork.PreforkServer(**limits)
+    server.run_prelude(PRELUDE)
+    client, conn = socket.socketpair()
+    with client, conn:
+        client.sendall(data)
+        if close:
+            client.shutdown(socket.SHUT_WR)
+        server.handle(conn)
+        conn.shutdown(socket.SHUT_WR)
+        return client.makefile().read()
+
+
+@pytest.mark.parametrize('data, close, limits, expected', [
+    (b"square(3)", True, {"max_script_bytes": 9}, "9\n"),
+    (b"square(30)", True, {"max_script_bytes": 9}, "error: script over 9 bytes\n"),
+    (b"square(", False, {"read_timeout": 0.1}, "error: script not received within 0.1 seconds\n"),
+])
+def test_script_limits(data: bytes, close: bool, limits: dict, expected: str) -> None:
+    output = handled(data, close, **limits)
+    assert output == expected, f"wrong output. got={output!r}, want={expected!r}"
@@ -0,0 +1,93 @@
+import io
+from lexer import scanner
+from parser import parser
+from object import environment
+from evaluator import evaluator
+from profiler import profiler
+from repl import repl
+import pytest
+
+SOURCE = '''let compose = fn(f, g) { fn(x) { g(f(x)) } };
+let adder = fn(n) { let add = fn(x) { x + n }; add };
+let fib = fn(n) { if (n < 2) { n } else { fib(n - 1) + fib(n - 2) } };
+let twice = compose(adder(1), adder(2));
+fib(10) + twice(1) + fn(y) { y }(3)'''
+
+
+class TickClock:
+    # Advances one unit on every reading.
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        self.now += 1
+        return self.now
+
+
+def profile(source: str) -> tuple[profiler.Profiler, str]:
+    prof = profiler.Profiler(TickClock())
+    out = io.StringIO()
+    prof.enable()
+    try:
+        repl.print_evaluated_program(out, source, environment.Environment())
+    finally:
+        prof.disable()
+    return prof, out.getvalue()
+
+
+def test_result_unchanged() -> None:
+    _, got = profile(SOURCE)
+    out = io.StringIO()
+    repl.print_evaluated_program(out, SOURCE, environment.Environment())
+    assert got == out.getvalue(), f"profiled output differs. got={got!r}, want={out.getvalue()!r}"
+
+
+@pytest.mark.parametrize('name, calls', [
+    ("fib", 177),
+    ("compose", 1),
+    ("compose.<fn(x)>", 1),
+    ("adder", 2),
+    ("adder.add", 2),
+    ("<fn(y)>", 1),
+])
+def test_call_counts(name: str, calls: int) -> None:
+    prof, _ = profile(SOURCE)
+    assert name in prof.functions, f"{name} not profiled. got={list(prof.functions)}"
+    assert prof.functions[name].calls == calls, f"{name} has wrong call count. got={prof.functions[name].calls}"
+
+
+def test_self_and_cumulative_time() -> None:
+    prof, _ = profile("let inner = fn() { 1 }; let outer = fn() { inner() + inner() }; outer()")
+    inner = prof.functions["inner"]
+    outer = prof.functions["outer"]
+    assert outer.cumulative_time == outer.self_time + inner.cumulative_time, \
+        f"outer time is not its own plus inner's. got self={outer.self_time}, cumulative={outer.cumulative_time}, inner={inner.cumulative_time}"
+    assert inner.self_time == inner.cumulative_time, f"inner has time in calls it did not make. got={inner.__dict__}"
+
+
+def test_recursion_counted_once() -> None:
+    prof, _ = profile("let f = fn(n) { if (n == 0) { 0 } else { 1 + f(n - 1) } }; f(10)")
+    f = prof.functions["f"]
+    assert f.cumulative_time == f.self_time, f"recursive time counted twice. got self={f.self_time}, cumulative={f.cumulative_time}"
+
+
+def test_node_counts() -> None:
+    prof, _ = profile("let f = fn(x) { x + 1 }; f(1) + f(2)")
+    assert prof.nodes["CallExpression"] == 2, f"wrong CallExpression count. got={prof.nodes}"
+    assert prof.nodes["InfixExpression"] == 3, f"wrong InfixExpression count. got={prof.nodes}"
+    assert prof.nodes["Program"] == 1, f"wrong Program count. got={prof.nodes}"
+
+
+def test_disable_restores_evaluator() -> None:
+    profile("1")
+    assert evaluator.node_hooks == [], f"node hooks left registered. got={evaluator.node_hooks}"
+    assert evaluator.call_hooks == [], f"call hooks left registered. got={evaluator.call_hooks}"
+
+
+def test_report_sorted_by_self_time() -> None:
+    prof, _ = profile(SOURCE)
+    out = io.StringIO()
+    prof.report(out)
+    lines = out.getvalue().splitlines()
+    assert lines[0].startswith("184 function calls"), f"wrong summary. got={lines[0]}"
+    assert lines[3].endswith("  fib"), f"fib is not listed first. got={lines[3]}"
@@ -0,0 +1,91 @@
+from lexer import lexer
+from object import object, environment
+from parser import parser
+from my_ast import ast
+from evaluator import evaluator, resolver
+import pytest
+
+
+def test_resolve_identifiers() -> None:
+    input = '''
+    let a = 1;
+    let f = fn(x, y) {
+        let z = x;
+        fn(w) { w + z + y + a + b };
+    };
+    '''
+    program = parse(input)
+    resolver.resolve(program)
+    outer = program.statements[1].value
+    assert isinstance(
+        outer, ast.FunctionLiteral), f"value is not ast.FunctionLiteral. got={type(outer)}"
+    assert outer.layout.slots == {"x": 0, "y": 1, "z": 2}, f"wrong slots. got={outer.layout.slots}"
+    assert outer.layout.param_slots == (0, 1), f"wrong parameter slots. got={outer.layout.param_slots}"
+
+    inner = outer.body.statements[1].expression
+    assert isinstance(
+        inner, ast.FunctionLiteral), f"expression is not ast.FunctionLiteral. got={type(inner)}"
+    expected = [("w", 0, 0), ("z", 1, 2), ("y", 1, 1),
+                ("a", resolver.GLOBAL, None), ("b", resolver.GLOBAL, None)]
+    idents = collect_identifiers(inner.body.statements[0].expression)
+    assert [(i.value, i.depth, i.slot) for i in idents] == expected, \
+        f"wrong addresses. got={[(i.value, i.depth, i.slot) for i in idents]}"
+
+
+def test_let_in_nested_block_gets_function_slot() -> None:
+    program = parse("fn(x) { if (x) { let y = 1; y } }")
+    resolver.resolve(program)
+    fn = program.statements[0].expression
+    assert fn.layout.slots == {"x": 0, "y": 1}, f"wrong slots. got={fn.layout.slots}"
+
+
+@pytest.mark.parametrize('input, expected', [
+    ("let x = 1; let f = fn() { let y = x; let x = 2; y * 10 + x }; f()", 12),
+    ("let f = fn() { let g = fn() { h() }; let h = fn() { 7 }; g() }; f()", 7),
+    ("let a = 1; let f = fn() { fn() { fn() { a + 1 } } }; f()()()", 2),
+    ("let f = fn(x, x) { x }; f(1, 2)", 2),
+    ("let f = fn(x) { let x = x + 1; x }; f(1)", 2),
+])
+def test_resolved_evaluation(input: str, expected: int) -> None:
+    evaluated = evaluator.eval(parse(input), environment.Environment())
+    assert isinstance(
+        evaluated, object.Integer), f"object is not Integer. got={type(evaluated)}({evaluated.__dict__}) instead"
+    assert evaluated.value == expected, f"object has wrong value. got={evaluated.value}, want={expected}"
+
+
+def test_unresolved_name_inside_function() -> None:
+    evaluated = evaluator.eval(
+        parse("let f = fn() { missing }; f()"), environment.Environment())
+    assert isinstance(
+        evaluated, object.Error), f"object is not Error. got={type(evaluated)}({evaluated.__dict__}) instead"
+    assert evaluated.message == "identifier not found: missing", f"wrong error message. got={evaluated.message}"
+
+
+def test_globals_persist_between_programs() -> None:
+    env = environment.Environment()
+    evaluator.eval(parse("let get = fn() { later };"), env)
+    evaluator.eval(parse("let later = 5;"), env)
+    evaluated = evaluator.eval(parse("get()"), env)
+    assert isinstance(
+        evaluated, object.Integer), f"object is not Integer. got={type(evaluated)}({evaluated.__dict__}) instead"
+    assert evaluated.value == 5, f"object has wrong value. got={evaluated.value}, want=5"
+
+
+# Helper functions
+
+def parse(input: str) -> ast.Program:
+    l = lexer.Lexer(input)
+    p = parser.Parser(l)
+    program = p.parse_program()
+    assert len(p.errors) == 0, f"parser errors: {p.errors}"
+    return program
+
+
+def collect_identifiers(node: ast.Node | None) -> list[ast.Identifier]:
+    match node:
+        case ast.Identifier():
+            return [node]
+        case ast.InfixExpression():
+            return collect_identifiers(node.left) + collect_identifiers(node.right)
+        case _:
+            return []
@@ -0,0 +1,101 @@
+import io
+from my_ast import ast
+from object import object, environment
+from evaluator import evaluator, resolver
+from profiler import sampler
+from repl import repl
+import pytest
+
+SOURCE = '''let fib = fn(n) { if (n < 2) { n } else { fib(n - 1) + fib(n - 2) } };
+let adder = fn(n) { fn(x) { x + n } };
+adder(1)(fib(17))'''
+
+
+def run(s: sampler.Sampler, source: str) -> str:
+    out = io.StringIO()
+    s.enable()
+    try:
+        repl.print_evaluated_program(out, source, environment.Environment())
+    finally:
+        s.disable()
+    return out.getvalue()
+
+
+def test_result_unchanged() -> None:
+    got = run(sampler.Sampler(), SOURCE)
+    assert got == "1598\n", f"sampled output differs. got={got!r}"
+
+
+def test_samples_recursive_calls() -> None:
+    s = sampler.Sampler()
+    run(s, SOURCE)
+    lines = s.folded()
+    assert len(lines) > 0, "no samples taken"
+    assert any(line.startswith("<program>;fib;fib;") for line in lines), f"no recursive fib stack sampled. got={lines}"
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert stack.split(";")[0] == sampler.ROOT, f"stack does not start at the program. got={line}"
+        assert int(count) > 0, f"stack has no samples. got={line}"
+
+
+def test_samples_do_not_keep_functions() -> None:
+    s = sampler.Sampler()
+    run(s, SOURCE)
+    for stack in s.samples:
+        for entry in stack:
+            assert type(entry) is ast.BlockStatement, f"sample holds more than function bodies. got={type(entry)}"
+
+
+def test_functions_defined_before_sampling_are_named(monkeypatch: pytest.MonkeyPatch) -> None:
+    env = environment.Environment()
+    repl.print_evaluated_program(io.StringIO(), "let f = fn(a, b) { a }", env)
+    s = sampler.Sampler(0.001)
+    eval_identifier = evaluator.eval_identifier
+
+    def record(node: ast.Identifier, env: environment.Environment) -> object.Object:
+        s.sample()
+        return eval_identifier(node, env)
+
+    s.enable()
+    try:
+        monkeypatch.setattr(evaluator, "eval_identifier", record)
+        evaluator.apply_function(env.get("f"), [object.new_integer(1), object.new_integer(2)])
+    finally:
+        s.disable()
+    assert "<program>;<fn(a, b)> 1" in s.folded(), f"function not named by its parameters. got={s.folded()}"
+
+
+def test_stack_mirrors_calls(monkeypatch: pytest.MonkeyPatch) -> None:
+    s = sampler.Sampler(0.001)
+    seen = []
+    eval_identifier = evaluator.eval_identifier
+
+    def record(node: ast.Identifier, env: environment.Environment) -> object.Object:
+        seen.append([s.names.names[body] for body in s.stack])
+        return eval_identifier(node, env)
+
+    monkeypatch.setattr(evaluator, "eval_identifier", record)
+    run(s, "let inner = fn(x) { x }; let outer = fn(y) { inner(y) + 1 }; outer(1)")
+    assert ["outer", "inner"] in seen, f"inner call not seen inside outer. got={seen}"
+    assert s.stack == [], f"stack not empty after run. got={s.stack}"
+
+
+def test_tail_call_replaces_caller(monkeypatch: pytest.MonkeyPatch) -> None:
+    s = sampler.Sampler(0.001)
+    depths = []
+    eval_identifier = evaluator.eval_identifier
+
+    def record(node: ast.Identifier, env: environment.Environment) -> object.Object:
+        depths.append(len(s.stack))
+        return eval_identifier(node, env)
+
+    monkeypatch.setattr(evaluator, "eval_identifier", record)
+    run(s, "let count = fn(n) { if (n == 0) { 0 } else { count(n - 1) } }; count(20)")
+    assert max(depths) == 1, f"tail calls grew the shadow stack. got={max(depths)}"
+
+
+def test_disable_restores_evaluator() -> None:
+    resolve = resolver.resolve
+    run(sampler.Sampler(), "1")
+    assert evaluator.call_hooks == [], f"call hooks left registered. got={evaluator.call_hooks}"
+    assert resolver.resolve is resolve, "resolver.resolve was not restored"
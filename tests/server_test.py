@@ -0,0 +1,126 @@
+import asyncio
+from server import server, client
+import pytest
+
+LOOP = "let f = fn(n) { f(n + 1) }; f(0)"
+# Stuck in one multiplication of huge integers, which no budget can stop.
+STUCK = "let sq = fn(x) { x * x }; " + "sq(" * 26 + "3" + ")" * 26
+
+
+async def exchange(address: str, requests: list[dict]) -> list[dict]:
+    s = server.Server(address, jobs=1)
+    await s.start()
+    try:
+        c = await client.Client.connect(address)
+        try:
+            return [await c.request(request) for request in requests]
+        finally:
+            await c.close()
+    finally:
+        await s.close()
+
+
+@pytest.mark.parametrize('request_, expected', [
+    ({"op": "eval", "source": "1 + 2"}, {"ok": True, "value": 3, "result": "3"}),
+    ({"source": "5 > 3"}, {"ok": True, "value": True, "result": "true"}),
+    ({"source": "if (false) { 1 }"}, {"ok": True, "value": None, "result": "null"}),
+    ({"source": "fn(x) { x }"}, {"ok": True, "value": None, "result": "fn(x) {\nx\n}"}),
+    ({"source": "1 + true"}, {"ok": False, "error": "type mismatch: INTEGER + BOOLEAN"}),
+    ({"source": "1 / 0"}, {"ok": False, "error": "ZeroDivisionError: integer division or modulo by zero"}),
+    ({"source": LOOP, "timeout": 0.2}, {"ok": False, "error": "budget exceeded: deadline of 0.2 seconds passed"}),
+    ({"source": LOOP, "timeout": -1}, {"ok": False, "error": "timeout must be a positive number"}),
+    ({"op": "call", "program": "missing", "fn": "f"}, {"ok": False, "error": "unknown program: missing"}),
+    ({"op": "eval"}, {"ok": False, "error": "eval needs a source string"}),
+    ({"op": "nope"}, {"ok": False, "error": "unknown op: nope"}),
+])
+def test_requests(tmp_path, request_: dict, expected: dict) -> None:
+    [response] = asyncio.run(exchange(str(tmp_path / "sock"), [request_]))
+    response.pop("id")
+    assert response == expected, f"wrong response. got={response}, want={expected}"
+
+
+def test_compile_and_call(tmp_path) -> None:
+    source = "let price = fn(n, vip) { if (vip) { n * 9 / 10 } else { n } };"
+
+    async def run() -> list[dict]:
+        address = str(tmp_path / "sock")
+        s = server.Server(address, jobs=1)
+        await s.start()
+        try:
+            c = await client.Client.connect(address)
+            compiled = await c.request({"op": "compile", "source": source})
+            program = compiled["program"]
+            responses = [compiled]
+            for args in ([100, True], [100, False], [1], ["1", True]):
+                responses.append(await c.request({"op": "call", "program": program, "fn": "price", "args": args}))
+            responses.append(await c.request({"op": "compile", "source": "let = 1;"}))
+            responses.append(await c.request({"op": "stats"}))
+            await c.close()
+            return responses
+        finally:
+            await s.close()
+
+    compiled, vip, regular, too_few, bad_arg, bad_source, stats = asyncio.run(run())
+    assert compiled["program"] == server.program_id(source), f"wrong program id. got={compiled}"
+    assert vip["value"] == 90 and regular["value"] == 100, f"wrong results. got={vip}, {regular}"
+    assert too_few["error"] == "TypeError: price takes 2 arguments, got 1", f"wrong error. got={too_few}"
+    assert bad_arg["error"] == "TypeError: cannot convert str to a Monkey value", f"wrong error. got={bad_arg}"
+    assert bad_source["error"].startswith("parser errors: "), f"wrong error. got={bad_source}"
+    assert stats["requests"] == 6 and stats["errors"] == 3, f"wrong stats. got={stats}"
+    assert set(stats["latency_ms"]) == {"p50", "p90", "p99", "max"}, f"wrong latency report. got={stats}"
+
+
+def test_invalid_json(tmp_path) -> None:
+    async def run() -> bytes:
+        address = str(tmp_path / "sock")
+        s = server.Server(address, jobs=1)
+        await s.start()
+        try:
+            c = await client.Client.connect(address)
+            c.writer.write(b"[1, 2\n")
+            await c.writer.drain()
+            line = await c.reader.readline()
+            await c.close()
+            return line
+        finally:
+            await s.close()
+
+    line = asyncio.run(run())
+    assert line.startswith(b'{"ok": false, "error": "invalid request: '), f"wrong response. got={line}"
+
+
+def test_load(tmp_path) -> None:
+    async def run() -> tuple[list[float], int, float]:
+        address = str(tmp_path / "sock")
+        s = server.Server(address, jobs=2)
+        await s.start()
+        try:
+            return await client.load(address, 20, 4, {"op": "eval", "source": "1 + 1"})
+        finally:
+            await s.close()
+
+    latencies, failures, seconds = asyncio.run(run())
+    assert len(latencies) == 20 and failures == 0, f"wrong load result. got={len(latencies)} requests, {failures} failed"
+
+
+def test_stuck_worker_is_replaced(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(server, "GRACE", 0.2)
+    stuck, after, stats = asyncio.run(exchange(str(tmp_path / "sock"), [
+        {"source": STUCK, "timeout": 0.1},
+        {"source": "1 + 2"},
+        {"op": "stats"},
+    ]))
+    assert stuck["error"] == "budget exceeded: deadline of 0.1 seconds passed", f"wrong error. got={stuck}"
+    assert after["ok"] and after["value"] == 3, f"request after a stuck one failed. got={after}"
+    assert stats["timeouts"] == 1, f"wrong stats. got={stats}"
+
+
+@pytest.mark.parametrize('samples, p, expected', [
+    ([], 50, 0.0),
+    ([1.0], 99, 1.0),
+    ([1.0, 2.0, 3.0, 4.0], 50, 2.0),
+    ([float(i) for i in range(1, 101)], 99, 99.0),
+])
+def test_percentile(samples: list[float], p: float, expected: float) -> None:
+    result = server.percentile(samples, p)
+    assert result == expected, f"wrong percentile. got={result}, want={expected}"
@@ -0,0 +1,125 @@
+import io
+import os
+import zlib
+import pickle
+from repl import repl
+from object import object, environment
+from evaluator import evaluator
+from cache import snapshot
+import pytest
+
+PRELUDE = """
+let fib = fn(n) { if (n < 2) { n } else { fib(n - 1) + fib(n - 2) } };
+let adder = fn(x) { fn(y) { x + y } };
+let addtwo = adder(2);
+let alias = addtwo;
+let yes = true;
+let nothing = if (false) { 1 };
+let big = 123456789012345678901234567890;
+"""
+
+
+def run(source: str, env: environment.Environment, engine: str) -> str:
+    out = io.StringIO()
+    repl.print_program(out, source, 'e', env, engine)
+    return out.getvalue()
+
+
+def saved(tmp_path, engine: str) -> str:
+    env = environment.Environment()
+    run(PRELUDE, env, engine)
+    path = str(tmp_path / "env.snap")
+    snapshot.save(env, path, engine)
+    return path
+
+
+@pytest.mark.parametrize('engine', ['eval', 'vm', 'closure', 'stack'])
+@pytest.mark.parametrize('source, expected', [
+    ("fib(15)", "610\n"),
+    ("addtwo(5) + alias(1)", "10\n"),
+    ("adder(10)(5)", "15\n"),
+    ("if (yes) { big + 1 }", "123456789012345678901234567891\n"),
+    ("!nothing", "true\n"),
+])
+def test_round_trip(tmp_path, engine: str, source: str, expected: str) -> None:
+    env = snapshot.load(saved(tmp_path, engine), engine)
+    output = run(source, env, engine)
+    assert output == expected, f"wrong output. got={output!r}, want={expected!r}"
+
+
+def test_sharing_and_cycles(tmp_path) -> None:
+    env = snapshot.load(saved(tmp_path, 'eval'), 'eval')
+    assert env.get("alias") is env.get("addtwo"), "shared function was copied"
+    assert env.get("fib").env is env, "function does not capture the loaded environment"
+    assert env.globals is env, "environment is not its own globals"
+    assert env.get("yes") is evaluator.TRUE, "TRUE is not the evaluator's singleton"
+    assert env.get("nothing") is evaluator.NULL, "NULL is not the evaluator's singleton"
+    assert env.get("addtwo").env.get("x") is object.new_integer(2), "small integer is not shared"
+
+
+def test_compiled_body_is_not_saved(tmp_path) -> None:
+    env = environment.Environment()
+    run(PRELUDE + "fib(5)", env, 'closure')
+    assert env.get("fib").compiled is not None, "closure engine did not compile the body"
+    path = str(tmp_path / "env.snap")
+    snapshot.save(env, path, 'closure')
+    loaded = snapshot.load(path, 'closure')
+    assert loaded.get("fib").compiled is None, "compiled body was saved"
+
+
+@pytest.mark.parametrize('content, engine, message', [
+    (b"let x = 1;", 'eval', "is not a snapshot"),
+    (snapshot.MAGIC + b"0" * 64, 'eval', "was saved by a different version of the interpreter"),
+    (snapshot.MAGIC + snapshot.snapshot_version() + b"garbage", 'eval', "is corrupt"),
+])
+def test_load_errors(tmp_path, content: bytes, engine: str, message: str) -> None:
+    path = tmp_path / "bad.snap"
+    path.write_bytes(content)
+    with pytest.raises(snapshot.SnapshotError) as e:
+        snapshot.load(str(path), engine)
+    assert message in str(e.value), f"wrong error. got={e.value}"
+
+
+class Payload:
+    def __init__(self, marker: str) -> None:
+        self.marker = marker
+
+    def __reduce__(self) -> tuple:
+        return os.mkdir, (self.marker,)
+
+
+def test_only_interpreter_classes_are_loaded(tmp_path) -> None:
+    marker = tmp_path / "ran"
+    path = tmp_path / "evil.snap"
+    pickled = pickle.dumps(('eval', Payload(str(marker))), pickle.HIGHEST_PROTOCOL)
+    path.write_bytes(snapshot.MAGIC + snapshot.snapshot_version() + zlib.compress(pickled))
+    with pytest.raises(snapshot.SnapshotError) as e:
+        snapshot.load(str(path), 'eval')
+    assert "posix.mkdir is not allowed" in str(e.value), f"wrong error. got={e.value}"
+    assert not marker.exists(), "loading called a function it was not allowed to"
+
+
+def test_engine_mismatch(tmp_path) -> None:
+    path = saved(tmp_path, 'eval')
+    with pytest.raises(snapshot.SnapshotError) as e:
+        snapshot.load(path, 'vm')
+    assert "saved with the eval engine, not vm" in str(e.value), f"wrong error. got={e.value}"
+
+
+def test_transpiled_functions_cannot_be_saved(tmp_path) -> None:
+    env = environment.Environment()
+    run(PRELUDE, env, 'transpile')
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.save(env, str(tmp_path / "env.snap"), 'transpile')
+
+
+def test_repl_commands(tmp_path) -> None:
+    path = tmp_path / "repl.snap"
+    inp = io.StringIO(f"let k = 5;\n:save {path}\nlet k = 6;\n:load {path}\nk\n:load\n:load {tmp_path / 'missing'}\n")
+    out = io.StringIO()
+    env = repl.start(inp, out, 'e')
+    lines = out.getvalue().split(repl.prompt)
+    expected = ["", "", f"saved to {path}\n", "", f"loaded {path}\n", "5\n", "usage: :load FILE\n"]
+    assert lines[:len(expected)] == expected, f"wrong output. got={lines}"
+    assert lines[len(expected)].startswith("snapshot error: "), f"wrong output. got={lines}"
+    assert env.get("k").value == 5, f"session did not end with the loaded environment. got={env.get('k')}"
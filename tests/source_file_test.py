@@ -0,0 +1,46 @@
+import io
+from my_token import token
+from lexer import scanner, buffer, source_file
+import pytest
+
+SOURCE = '''let add = fn(x, y) { x + y; };
+if (add(5, 10) != 15) { return false; } else { return true; }
+10 == 10; @
+'''
+
+
+def lex_all(source: str | memoryview) -> list[tuple[token.TokenType, str]]:
+    l = scanner.Scanner(source)
+    tokens = []
+    while True:
+        tok = l.next_token()
+        tokens.append((tok.type, tok.literal))
+        if tok.type == token.EOF:
+            return tokens
+
+
+def test_ascii_file_is_mapped(tmp_path) -> None:
+    path = tmp_path / "source.mk"
+    path.write_text(SOURCE)
+    with open(path) as f, source_file.open_source(f) as source:
+        assert isinstance(
+            source, memoryview), f"source is not mapped. got={type(source)}"
+        got = lex_all(source)
+        buf = buffer.tokenize_all(source)
+        literals = [(buf.type(i), buf.literal(i)) for i in range(len(buf))]
+    expected = lex_all(SOURCE)
+    assert got == expected, f"mapped tokens differ. got={got}, want={expected}"
+    assert literals == expected, f"buffer tokens differ. got={literals}, want={expected}"
+
+
+@pytest.mark.parametrize("text", ["let é = 1; é", ""])
+def test_unmappable_file_is_read(tmp_path, text: str) -> None:
+    path = tmp_path / "source.mk"
+    path.write_text(text, encoding="utf-8")
+    with open(path, encoding="utf-8") as f, source_file.open_source(f) as source:
+        assert source == text, f"source is wrong. got={source!r}, want={text!r}"
+
+
+def test_stream_is_read() -> None:
+    with source_file.open_source(io.StringIO(SOURCE)) as source:
+        assert source == SOURCE, f"source is wrong. got={source!r}, want={SOURCE!r}"
@@ -0,0 +1,47 @@
+import io
+from lexer import scanner
+from parser import parser
+from object import object, environment
+from repl import repl
+import pytest
+
+INPUTS = [
+    "5; 10",
+    "let a = 5; let b = a * 2; b + a",
+    "let add = fn(x) { fn(y) { x + y } }; let add2 = add(2); add2(3)",
+    "return 1; 2",
+    "if (10 > 1) { if (10 > 1) { return 10; } return 1; }; 99",
+    "if (false) { 10 }",
+    "let a = 1; a + true; a",
+    "foobar; let x = ;",
+    "let x = 5; x +",
+    "let f = fn(n) { if (n == 0) { 0 } else { f(n - 1) } }; f(50)",
+]
+
+
+def run(source: str, streamed: bool, optimize: bool) -> str:
+    out = io.StringIO()
+    env = environment.Environment()
+    if streamed:
+        repl.print_streamed_program(out, source, env, optimize)
+    else:
+        repl.print_evaluated_program(out, source, env, 'eval', optimize)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("optimize", [False, True])
+@pytest.mark.parametrize("source", INPUTS)
+def test_streamed_output_matches(source: str, optimize: bool) -> None:
+    got = run(source, True, optimize)
+    expected = run(source, False, optimize)
+    assert got == expected, f"streamed output differs. got={got!r}, want={expected!r}"
+
+
+def test_parse_statements_is_lazy() -> None:
+    p = parser.Parser(scanner.Scanner("let a = 1; let b = 2; c"))
+    statements = p.parse_statements()
+    first = next(statements)
+    assert str(first) == "let a = 1;", f"first statement wrong. got={first}"
+    assert p.cur_token.literal == ";", f"parser ran ahead. cur_token={p.cur_token}"
+    rest = [str(stmt) for stmt in statements]
+    assert rest == ["let b = 2;", "c"], f"remaining statements wrong. got={rest}"
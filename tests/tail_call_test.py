@@ -0,0 +1,118 @@
+from lexer import lexer
+from object import object, environment
+from parser import parser
+from my_ast import ast
+from evaluator import evaluator, resolver
+import pytest
+
+
+@pytest.mark.parametrize('input, expected_tail_calls', [
+    ("fn(n) { f(n) }", ["f(n)"]),
+    ("fn(n) { return f(n); }", ["f(n)"]),
+    ("fn(n) { if (n) { f(n) } else { g(n) } }", ["f(n)", "g(n)"]),
+    ("fn(n) { if (n) { return f(n); } g(n) }", ["f(n)", "g(n)"]),
+    ("fn(n) { f(n); 1 }", []),
+    ("fn(n) { 1 + f(n) }", []),
+    ("fn(n) { f(g(n)) }", ["f(g(n))"]),
+    ("fn(n) { let x = f(n); x }", []),
+    ("fn(n) { if (f(n)) { 1 } }", []),
+    ("fn(n) { return if (n) { return f(n); }; }", []),
+    ("f(n)", []),
+])
+def test_mark_tail_calls(input: str, expected_tail_calls: list[str]) -> None:
+    program = parse(input)
+    resolver.resolve(program)
+    tail_calls = [str(call) for call in collect_calls(program) if call.tail]
+    assert tail_calls == expected_tail_calls, f"wrong tail calls. want={expected_tail_calls}, got={tail_calls}"
+
+
+def test_deep_tail_recursion() -> None:
+    input = '''
+    let loop = fn(n, acc) {
+        if (n == 0) {
+            return acc;
+        }
+        loop(n - 1, acc + 2);
+    };
+    loop(100000, 0);
+    '''
+    assert_integer_object(eval_input(input), 200000)
+
+
+def test_mutual_tail_recursion() -> None:
+    input = '''
+    let even = fn(n) { if (n == 0) { true } else { odd(n - 1) } };
+    let odd = fn(n) { if (n == 0) { false } else { even(n - 1) } };
+    even(100001);
+    '''
+    evaluated = eval_input(input)
+    assert evaluated is evaluator.FALSE, f"object is not FALSE. got={evaluated.inspect()}"
+
+
+@pytest.mark.parametrize('input, expected', [
+    ("let f = fn(n) { if (n == 0) { 0 } else { 1 + f(n - 1) } }; f(10)", 10),
+    ("let f = fn(x) { x }; let g = fn(x) { f(x) * 2 }; g(21)", 42),
+    ("let id = fn(x) { x }; let f = fn() { id(fn() { 5 }) }; f()()", 5),
+])
+def test_non_tail_calls(input: str, expected: int) -> None:
+    assert_integer_object(eval_input(input), expected)
+
+
+@pytest.mark.parametrize('input, expected_message', [
+    ("let f = fn() { g() }; let g = 5; f()", "not a function: INTEGER"),
+    ("let f = fn(n) { if (n == 0) { missing } else { f(n - 1) } }; f(5000)",
+     "identifier not found: missing"),
+])
+def test_tail_call_errors(input: str, expected_message: str) -> None:
+    evaluated = eval_input(input)
+    assert isinstance(
+        evaluated, object.Error), f"object is not Error. got={type(evaluated)}({evaluated.__dict__}) instead"
+    assert evaluated.message == expected_message, f"wrong error message. expected={expected_message}, got={evaluated.message}"
+
+
+# Helper functions
+
+def assert_integer_object(obj: object.Object | None, expected: int) -> None:
+    assert isinstance(
+        obj, object.Integer), f"object is not Integer. got={type(obj)}({obj.__dict__}) instead"
+    assert obj.value == expected, f"object has wrong value. got={obj.value}, want={expected}"
+
+
+def parse(input: str) -> ast.Program:
+    l = lexer.Lexer(input)
+    p = parser.Parser(l)
+    program = p.parse_program()
+    assert len(p.errors) == 0, f"parser errors: {p.errors}"
+    return program
+
+
+def eval_input(input: str) -> object.Object:
+    return evaluator.eval(parse(input), environment.Environment())
+
+
+def collect_calls(node: ast.Node | None) -> list[ast.CallExpression]:
+    match node:
+        case ast.Program() | ast.BlockStatement():
+            calls: list[ast.CallExpression] = []
+            for stmt in node.statements:
+                calls.extend(collect_calls(stmt))
+            return calls
+        case ast.ExpressionStatement():
+            return collect_calls(node.expression)
+        case ast.ReturnStatement():
+            return collect_calls(node.return_value)
+        case ast.LetStatement():
+            return collect_calls(node.value)
+        case ast.FunctionLiteral():
+            return collect_calls(node.body)
+        case ast.IfExpression():
+            return collect_calls(node.condition) + collect_calls(node.consequence) + collect_calls(node.alternative)
+        case ast.InfixExpression():
+            return collect_calls(node.left) + collect_calls(node.right)
+        case ast.CallExpression():
+            calls = [node] + collect_calls(node.function)
+            for arg in node.arguments:
+                calls.extend(collect_calls(arg))
+            return calls
+        case _:
+            return []
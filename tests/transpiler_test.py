@@ -0,0 +1,85 @@
+from lexer import lexer
+from object import object, environment
+from parser import parser
+from my_ast import ast
+from evaluator import evaluator
+from compiler import transpiler
+from tests import evaluator_test
+from tests.evaluator_test import *
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def use_transpiler(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Re-runs every evaluator test against the transpiled code.
+    monkeypatch.setattr(evaluator_test, "eval_input", eval_input)
+
+
+def test_function_object() -> None:
+    input = "fn(x) { x + 2; };"
+    evaluated = eval_input(input)
+    assert isinstance(
+        evaluated, object.TranspiledFunction), f"object is not TranspiledFunction. got={type(evaluated)}"
+    assert evaluated.parameters == (
+        "x",), f"function has wrong parameters. Parameters={evaluated.parameters}"
+    expected_body = "(x + 2)"
+    assert evaluated.body == expected_body, f"body is not {expected_body}. got={evaluated.body}"
+
+
+@pytest.mark.parametrize('input', [
+    "let x = if (true) { return 5 }; x; 10",
+    "1 + if (true) { return 5 }",
+    "let f = fn() { let x = if (true) { return 1 }; x; 2 }; f()",
+    "let f = fn() { return if (true) { return 1 } }; f() + 1",
+    "let f = fn(x) { if (x) { let y = 1; y } else { 2 } }; f(true) + f(false)",
+    "let x = 1; let f = fn() { let g = fn() { x }; let x = 2; g() }; f()",
+    "let f = fn(x, x) { x }; f(1, 2)",
+    "let f = fn(x) { x }; f(1, 2)",
+    "7 / 2; -7 / 2",
+    "let a = 5; a(b)",
+    "if (fn() { 1 }) { 1 } else { 2 }",
+    "!fn() { 1 }; -true",
+    "fn() { 1 } == fn() { 1 }",
+])
+def test_matches_evaluator(input: str) -> None:
+    expected = evaluator.eval(parse(input), environment.Environment())
+    evaluated = eval_input(input)
+    assert type(evaluated) is type(
+        expected), f"object has wrong type. got={type(evaluated)}, want={type(expected)}"
+    assert evaluated.inspect() == expected.inspect(
+    ), f"object has wrong value. got={evaluated.inspect()}, want={expected.inspect()}"
+
+
+def test_self_tail_calls_do_not_grow_stack() -> None:
+    input = '''
+    let sum = fn(n, acc) { if (n == 0) { acc } else { sum(n - 1, acc + n) } };
+    sum(100000, 0);
+    '''
+    assert_integer_object(eval_input(input), 5000050000)
+
+
+def test_code_cache(tmp_path) -> None:
+    input = "let double = fn(x) { x * 2 }; double(21)"
+    key = transpiler.code_key(input, False)
+    assert transpiler.load_code(
+        str(tmp_path), key) is None, "code found in empty cache"
+    transpiler.store_code(
+        str(tmp_path), key, transpiler.compile_program(parse(input)))
+    code = transpiler.load_code(str(tmp_path), key)
+    assert code is not None, "stored code was not loaded"
+    assert_integer_object(transpiler.run_code(
+        code, environment.Environment()), 42)
+    assert transpiler.code_key(
+        input, True) != key, "optimized code shares the key of unoptimized code"
+
+
+# Helper functions
+
+def parse(input: str) -> ast.Program:
+    l = lexer.Lexer(input)
+    p = parser.Parser(l)
+    return p.parse_program()
+
+
+def eval_input(input: str) -> object.Object | None:
+    return transpiler.run(parse(input), environment.Environment())
@@ -0,0 +1,116 @@
+from lexer import lexer
+from object import object, environment
+from parser import parser
+from my_ast import ast
+from evaluator import evaluator
+from compiler import compiler
+from vm import vm
+import pytest
+
+
+@pytest.mark.parametrize('input, expected', [
+    ("5", 5),
+    ("-10", -10),
+    ("5 + 5 + 5 + 5 - 10", 10),
+    ("2 * 2 * 2 * 2 * 2", 32),
+    ("-50 + 100 + -50", 0),
+    ("50 / 2 * 2 + 10", 60),
+    ("7 / -2", -4),
+    ("(5 + 10 * 2 + 15 / 3) * 2 + -10", 50),
+    ("if (1 > 2) { 10 } else { 20 }", 20),
+    ("if (1 < 2) { 10 } else { 20 }", 10),
+    ("return 2 * 5; 9;", 10),
+    ("9; return 2 * 5; 9;", 10),
+    ("if (10 > 1) { if (10 > 1) { return 10; } return 1; }", 10),
+    ("let a = 5; let b = a; let c = a + b + 5; c;", 15),
+    ("let add = fn(x, y) { x + y; }; add(5 + 5, add(5, 5));", 20),
+    ("let f = fn(x) { if (x) { return 5; }; 1 }; f(true) + f(false);", 6),
+    ("let f = fn(x) { if (x) { if (x) { return 5; }; 2 }; 1 }; f(true);", 5),
+    ("let x = if (true) { return 1; }; 2", 2),
+    ("let x = if (true) { return 1; }; x; 2", 1),
+    ("let f = fn() { let x = if (true) { return 1; }; x; 2 }; f() + 1", 2),
+    ("fn(x) { x; }(5)", 5),
+    ("let newAdder = fn(x) { fn(y) { x + y }; }; let addTwo = newAdder(2); addTwo(2);", 4),
+    ("let f = fn() { let g = fn() { h() }; let h = fn() { 7 }; g() }; f()", 7),
+    ("let x = 1; let f = fn() { let y = x; let x = 2; y + x }; f()", 3),
+    ("let fib = fn(n) { if (n < 2) { n } else { fib(n - 1) + fib(n - 2) } }; fib(15)", 610),
+])
+def test_integer_results(input: str, expected: int) -> None:
+    evaluated = run_input(input)
+    assert isinstance(
+        evaluated, object.Integer), f"object is not Integer. got={type(evaluated)}({evaluated.__dict__}) instead"
+    assert evaluated.value == expected, f"object has wrong value. got={evaluated.value}, want={expected}"
+
+
+@pytest.mark.parametrize('input', [
+    "true",
+    "1 < 2",
+    "1 != 1",
+    "!5",
+    "!!false",
+    "(1 > 2) == false",
+    "true != false",
+    "if (false) { 10 }",
+    "",
+    "let a = 1;",
+    "if (true) { }",
+    "fn(x) { x + 2; };",
+    "let f = fn(x) { x }; f == f",
+    "fn(x) { x } == fn(x) { x }",
+    "5 + true;",
+    "5 + true; 5;",
+    "-true",
+    "true + false;",
+    "5; true + false; 5",
+    "if (10 > 1) { if (10 > 1) { return true + false; } return 1; }",
+    "foobar",
+    "let f = fn() { missing }; f()",
+    "5(1)",
+    "let f = fn(x) { x }; f + 1",
+    "let f = fn(x) { 1 + if (x) { return 5; } }; f(true) + 1;",
+    "let f = fn() { return if (true) { return 1; } }; f() + 1",
+    "let f = fn() { let x = if (true) { return 1; }; x }; f() + 1",
+    "let f = fn(g) { g(if (true) { return 1; }) }; f(fn(x) { x }) + 1",
+    "!if (true) { return false; }",
+])
+def test_matches_evaluator(input: str) -> None:
+    expected = evaluator.eval(parse(input), environment.Environment())
+    evaluated = run_input(input)
+    assert type(evaluated) is type(expected) or evaluated.type() == expected.type(), \
+        f"wrong object type. want={expected.type()}, got={evaluated.type()}"
+    assert evaluated.inspect() == expected.inspect(), \
+        f"wrong result. want={expected.inspect()}, got={evaluated.inspect()}"
+
+
+def test_deep_recursion() -> None:
+    input = "let count = fn(n) { if (n == 0) { 0 } else { 1 + count(n - 1) } }; count(20000)"
+    evaluated = run_input(input)
+    assert isinstance(
+        evaluated, object.Integer), f"object is not Integer. got={type(evaluated)}({evaluated.__dict__}) instead"
+    assert evaluated.value == 20000, f"object has wrong value. got={evaluated.value}, want=20000"
+
+
+def test_environment_persists_between_programs() -> None:
+    env = environment.Environment()
+    run_input("let add = fn(x, y) { x + y }; let one = 1;", env)
+    evaluated = run_input("add(one, 41)", env)
+    assert isinstance(
+        evaluated, object.Integer), f"object is not Integer. got={type(evaluated)}({evaluated.__dict__}) instead"
+    assert evaluated.value == 42, f"object has wrong value. got={evaluated.value}, want=42"
+
+
+# Helper functions
+
+def parse(input: str) -> ast.Program:
+    l = lexer.Lexer(input)
+    p = parser.Parser(l)
+    program = p.parse_program()
+    assert len(p.errors) == 0, f"parser errors: {p.errors}"
+    return program
+
+
+def run_input(input: str, env: environment.Environment | None = None) -> object.Object:
+    if env is None:
+        env = environment.Environment()
+    bytecode = compiler.compile_program(parse(input))
+    return vm.run(bytecode, env)
@@ -0,0 +1,184 @@
+from compiler import code
+from compiler.compiler import Bytecode
+from evaluator import evaluator
+from evaluator.evaluator import NULL, TRUE, FALSE
+from object import object, environment
+
+
+class Frame:
+    def __init__(self, instructions: list[int], constants: list[object.Object], names: list[str], env: environment.Environment, base_pointer: int) -> None:
+        self.instructions = instructions
+        self.constants = constants
+        self.names = names
+        self.env = env
+        self.base_pointer = base_pointer
+        self.ip = 0
+
+
+class VM:
+    def __init__(self, bytecode: Bytecode, env: environment.Environment) -> None:
+        self.bytecode = bytecode
+        self.env = env
+        self.stack: list[object.Object] = []
+
+    def run(self) -> object.Object:
+        # The current frame lives in local variables; Monkey calls push the
+        # caller onto `frames` instead of recursing in Python.
+        frames: list[Frame] = []
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        Integer = object.Integer
+        new_integer = object.new_integer
+        Closure = object.Closure
+        ReturnValue = object.ReturnValue
+        Environment = environment.Environment
+
+        ins = self.bytecode.instructions
+        constants = self.bytecode.constants
+        names = self.bytecode.names
+        env = self.env
+        base_pointer = 0
+        ip = 0
+        end = len(ins)
+
+        while True:
+            if ip >= end:
+                # Falling off the end of the main program.
+                result = pop() if stack else NULL
+                return result.value if type(result) is ReturnValue else result
+            op = ins[ip]
+            ip += 1
+
+            if op == code.OP_GET_NAME:
+                name = names[ins[ip]]
+                ip += 1
+                val = env.get(name)
+                if val is None:
+                    return object.Error(f"identifier not found: {name}")
+                push(val)
+            elif op == code.OP_CONSTANT:
+                push(constants[ins[ip]])
+                ip += 1
+            elif op == code.OP_ADD or op == code.OP_SUB or op == code.OP_MUL or op == code.OP_DIV \
+                    or op == code.OP_EQUAL or op == code.OP_NOT_EQUAL or op == code.OP_GREATER_THAN or op == code.OP_LESS_THAN:
+                right = pop()
+                left = pop()
+                if type(left) is Integer and type(right) is Integer:
+                    l, r = left.value, right.value
+                    if op == code.OP_ADD:
+                        push(new_integer(l + r))
+                    elif op == code.OP_SUB:
+                        push(new_integer(l - r))
+                    elif op == code.OP_MUL:
+                        push(new_integer(l * r))
+                    elif op == code.OP_DIV:
+                        push(new_integer(l // r))
+                    elif op == code.OP_EQUAL:
+                        push(TRUE if l == r else FALSE)
+                    elif op == code.OP_NOT_EQUAL:
+                        push(TRUE if l != r else FALSE)
+                    elif op == code.OP_GREATER_THAN:
+                        push(TRUE if l > r else FALSE)
+                    else:
+                        push(TRUE if l < r else FALSE)
+                else:
+                    result = evaluator.eval_infix_expression(
+                        infix_operators[op], left, right)
+                    if type(result) is object.Error:
+                        return result
+                    push(result)
+            elif op == code.OP_JUMP_NOT_TRUTHY:
+                condition = pop()
+                if condition is FALSE or condition is NULL:
+                    ip = ins[ip]
+                else:
+                    ip += 1
+            elif op == code.OP_JUMP:
+                ip = ins[ip]
+            elif op == code.OP_CALL:
+                num_args = ins[ip]
+                ip += 1
+                fn = stack[-1 - num_args]
+                if type(fn) is Closure:
+                    compiled = fn.fn
+                    fn_env = Environment(fn.env)
+                    store = fn_env.store
+                    args_start = len(stack) - num_args
+                    for param_idx, name in enumerate(compiled.parameter_names):
+                        store[name] = stack[args_start + param_idx]
+                    del stack[args_start - 1:]
+                    frame = Frame(ins, constants, names, env, base_pointer)
+                    frame.ip = ip
+                    frames.append(frame)
+                    ins = compiled.instructions
+                    constants = compiled.constants
+                    names = compiled.names
+                    env = fn_env
+                    base_pointer = len(stack)
+                    ip = 0
+                    end = len(ins)
+                else:
+                    args = stack[len(stack) - num_args:]
+                    del stack[len(stack) - num_args - 1:]
+                    result = evaluator.apply_function(fn, args)
+                    if type(result) is object.Error:
+                        return result
+                    push(result)
+            elif op == code.OP_RETURN_VALUE:
+                result = pop()
+                if type(result) is ReturnValue:
+                    result = result.value
+                if not frames:
+                    return result
+                del stack[base_pointer:]
+                frame = frames.pop()
+                ins = frame.instructions
+                constants = frame.constants
+                names = frame.names
+                env = frame.env
+                base_pointer = frame.base_pointer
+                ip = frame.ip
+                end = len(ins)
+                push(result)
+            elif op == code.OP_POP:
+                pop()
+            elif op == code.OP_POP_UNLESS_RETURN:
+                if type(stack[-1]) is ReturnValue:
+                    ip = ins[ip]
+                else:
+                    pop()
+                    ip += 1
+            elif op == code.OP_WRAP_RETURN:
+                push(ReturnValue(pop()))
+            elif op == code.OP_SET_NAME:
+                env.store[names[ins[ip]]] = pop()
+                ip += 1
+            elif op == code.OP_NULL:
+                push(NULL)
+            elif op == code.OP_TRUE:
+                push(TRUE)
+            elif op == code.OP_FALSE:
+                push(FALSE)
+            elif op == code.OP_MINUS:
+                right = pop()
+                if type(right) is Integer:
+                    push(new_integer(-right.value))
+                else:
+                    return object.Error(f"unknown operator: -{right.type()}")
+            elif op == code.OP_BANG:
+                right = pop()
+                push(TRUE if right is FALSE or right is NULL else FALSE)
+            elif op == code.OP_CLOSURE:
+                push(Closure(constants[ins[ip]], env))
+                ip += 1
+            else:
+                raise ValueError(f"opcode {op} undefined")
+
+
+infix_operators: dict[int, str] = {
+    op: operator for operator, op in code.infix_opcodes.items()}
+
+
+def run(bytecode: Bytecode, env: environment.Environment) -> object.Object:
+    return VM(bytecode, env).run()